@@ -8,5 +8,5 @@ if errorlevel 1 (
     exit /b 1
 )
 
-uv run python -m askcli.cli %*
+uv run python -m askcli %*
 endlocal
\ No newline at end of file
@@ -5,7 +5,7 @@ $SCRIPT_DIR = Split-Path -Parent $MyInvocation.MyCommand.Definition
 Push-Location $SCRIPT_DIR
 
 try {
-    uv run python -m askcli.cli @args
+    uv run python -m askcli @args
 } finally {
     Pop-Location
 }
\ No newline at end of file
@@ -12,4 +12,4 @@ if ! command -v uv &> /dev/null; then
     exit 1
 fi
 
-uv run python -m askcli.cli "$@"
\ No newline at end of file
+uv run python -m askcli "$@"
\ No newline at end of file
@@ -1,52 +1,268 @@
 import json
-from typing import Optional, List
-
-try:
-    from rich.console import Console
-    from rich.markdown import Markdown
-    from rich.panel import Panel
-    from rich.table import Table
-    from rich.text import Text
-    from rich.rule import Rule
-except ImportError:
-    # Fallback for environments where rich is not available
-    Console = None
-    Markdown = None
-    Panel = None
-    Table = None
-    Text = None
-    Rule = None
-from .config import load_config
-from .llm.groq_client import GroqClient
-from .search.duckduckgo import DuckDuckGoProvider
-from .fetcher import gather_context
+import math
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional, List, Tuple
+from .config import load_config, get_cache_dir
+from .cache.answers import AnswerCache
+from .cache.pages import PageCache
+from .registry import LLM_PROVIDERS, SEARCH_PROVIDERS
+from .search.cached import CachedSearchProvider
 from .prompts import SYSTEM_PROMPT, build_user_prompt
-from .models import SearchResult, PageContent
+from .models import AskEvent, SearchResult, PageContent, QueryOutcome, Settings, CompressionStats, DedupStats, FetchStats
+from .tokens import chars_per_token, context_budget, estimate_tokens, pack_pages
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .cache.index import PageIndex
+    from .ratelimit import RateGovernor
+
+# Models used for the built-in providers; other providers get ``llm.model``
+DEFAULT_MODELS = {
+    "groq": "qwen/qwen3-32b",
+    "gemini": "gemini-2.5-flash-lite",
+}
 
 
 def get_llm_client(config, provider_override=None):
-    """Factory function to get LLM client."""
-    provider = provider_override or config.llm.provider
-    
-    if provider == "groq":
-        return GroqClient("qwen/qwen3-32b")
-    elif provider == "gemini":
-        from .llm.gemini_client import GeminiClient
-        return GeminiClient("gemini-2.5-flash-lite")
-    else:
-        raise ValueError(f"Unknown LLM provider: {provider}")
+    """Factory function to get LLM client.
+    
+    With several ``llm.providers`` configured (and no override) the client routes
+    across them; providers that cannot be set up, e.g. for a missing API key, are left out.
+    """
+    governor = get_rate_governor(config)
+    
+    def build(provider, patient=True):
+        # The answer gets the tokens the context budget leaves it
+        client = LLM_PROVIDERS.load(provider)(
+            DEFAULT_MODELS.get(provider, config.llm.model), max_tokens=config.llm.answer_tokens
+        )
+        if governor is None:
+            return client
+        from .ratelimit import GovernedLLMClient
+        
+        # In a composite a rate-limited provider fails over at once instead of waiting
+        return GovernedLLMClient(client, provider, governor, patient)
+    
+    if provider_override or len(config.llm.providers) < 2:
+        return build(provider_override or config.llm.provider)
+    
+    from .llm.composite import CompositeLLMClient
+    
+    clients = []
+    errors = []
+    for provider in config.llm.providers:
+        try:
+            clients.append((provider, build(provider, patient=False)))
+        except ValueError as e:
+            errors.append(e)
+    if not clients:
+        raise errors[0]
+    composite = CompositeLLMClient(
+        clients,
+        mode=config.llm.routing,
+        failures=config.llm.breaker_failures,
+        cooldown=config.llm.breaker_cooldown_seconds,
+        slow_seconds=config.llm.slow_seconds,
+    )
+    if governor is None:
+        return composite
+    from .ratelimit import GovernedLLMClient
+    
+    # Queues (and retries) only when every provider is rate limited
+    return GovernedLLMClient(composite, "llm", governor)
+
+
+def build_search_backend(config, name: str):
+    """One search backend by name; ``"index"`` searches the local page index (None when it is off)."""
+    if name == "index":
+        index = get_page_index(config)
+        if index is None:
+            return None
+        from .search.local import LocalIndexProvider
+        
+        return LocalIndexProvider(index, config.index.min_score)
+    factory = SEARCH_PROVIDERS.load(name)
+    provider = factory(config.search.searxng_url) if name == "searxng" else factory()
+    governor = get_rate_governor(config)
+    if governor is None:
+        return provider
+    from .ratelimit import GovernedSearchProvider
+    
+    return GovernedSearchProvider(provider, name, governor)
 
 
 def get_search_provider(config):
-    """Factory function to get search provider."""
-    if config.search.provider == "duckduckgo":
-        return DuckDuckGoProvider()
+    """Factory function to get search provider.
+    
+    ``search.backends``, when set, replaces ``search.provider``; with several they are
+    queried in parallel and their results fused, leaving out backends that cannot be set up.
+    """
+    if len(config.search.backends) < 2:
+        name = config.search.backends[0] if config.search.backends else config.search.provider
+        provider = build_search_backend(config, name)
+        if provider is None:
+            raise ValueError(f"Search provider {name} is not available")
     else:
-        raise ValueError(f"Unknown search provider: {config.search.provider}")
+        from .search.composite import CompositeSearchProvider
+        
+        backends = [(name, build_search_backend(config, name)) for name in config.search.backends]
+        provider = CompositeSearchProvider(
+            [(name, backend) for name, backend in backends if backend is not None],
+            deadlines=config.search.deadlines,
+            default_deadline=config.search.deadline_seconds,
+            min_backends=config.search.min_backends,
+            rrf_k=config.search.rrf_k,
+        )
+    
+    if not config.behavior.cache_enabled:
+        return provider
+    return CachedSearchProvider(
+        provider,
+        get_cache_dir(config) / "search.sqlite",
+        ttl_seconds=config.cache.search_ttl_seconds,
+        stale_seconds=config.cache.search_stale_seconds,
+        max_bytes=config.cache.max_size_mb * 1024 * 1024,
+    )
+
+
+_governors: Dict[Path, "RateGovernor"] = {}
+
+
+def get_rate_governor(config) -> Optional["RateGovernor"]:
+    """The rate governor shared by this process's providers, or None when disabled.
+    
+    Its state file lives in the cache directory, so every ``ask`` process using the
+    same directory draws from the same per-provider budgets.
+    """
+    if not config.ratelimit.enabled:
+        return None
+    from .ratelimit import DEFAULT_REQUESTS_PER_MINUTE, RateGovernor
+    
+    path = get_cache_dir(config) / "ratelimit.sqlite"
+    if path not in _governors:
+        options = config.ratelimit
+        _governors[path] = RateGovernor(
+            path,
+            requests_per_minute={**DEFAULT_REQUESTS_PER_MINUTE, **options.requests_per_minute},
+            burst=options.burst,
+            max_retries=options.max_retries,
+            backoff_base=options.backoff_base_seconds,
+            backoff_max=options.backoff_max_seconds,
+            max_wait=options.max_wait_seconds,
+        )
+    return _governors[path]
+
+
+def get_page_cache(config) -> Optional[PageCache]:
+    """Open the on-disk page cache, or return None when caching is disabled."""
+    if not config.behavior.cache_enabled:
+        return None
+    return PageCache(
+        get_cache_dir(config) / "pages.sqlite",
+        ttl_seconds=config.cache.page_ttl_seconds,
+        max_bytes=config.cache.max_size_mb * 1024 * 1024,
+    )
+
+
+def get_page_index(config) -> Optional["PageIndex"]:
+    """Open the local full-text page index, or return None when it is disabled."""
+    if not (config.behavior.cache_enabled and config.index.enabled):
+        return None
+    from .cache.index import PageIndex
+    
+    return PageIndex(
+        get_cache_dir(config) / "index.sqlite",
+        max_bytes=config.index.max_size_mb * 1024 * 1024,
+        max_age_seconds=config.index.max_age_days * 86400,
+        passage_chars=config.retrieval.passage_chars,
+    )
+
+
+def get_answer_cache(config) -> Optional[AnswerCache]:
+    """Open the on-disk answer cache, or return None when caching is disabled."""
+    if not config.behavior.cache_enabled:
+        return None
+    return AnswerCache(
+        get_cache_dir(config) / "answers.sqlite",
+        ttl_seconds=config.cache.answer_ttl_seconds,
+        similar_enabled=config.cache.similar_answers,
+        similarity=config.cache.similarity_threshold,
+        similar_max_age=config.cache.similar_max_age_seconds,
+        max_bytes=config.cache.max_size_mb * 1024 * 1024,
+    )
+
+
+def context_limits(config, provider_name: str, query: str) -> Tuple[int, int, int]:
+    """Token budget for page content plus the raw character limits to gather with.
+    
+    Gathering collects up to twice the budget (one page at most the whole budget) so
+    the packer has material to share fairly across pages.
+    """
+    budget = context_budget(
+        config.llm.max_context_tokens,
+        SYSTEM_PROMPT,
+        build_user_prompt(query, []),
+        config.llm.answer_tokens,
+        provider_name,
+    )
+    max_page_chars = int(budget * chars_per_token(provider_name))
+    return budget, 2 * max_page_chars, max_page_chars
+
+
+def fetch_plan(config, num_results: Optional[int] = None) -> Tuple[int, dict]:
+    """How many results to ask the search provider for, plus the gather options.
+    
+    In hedged mode the provider is asked for ``overfetch_factor`` times the sources
+    wanted, all candidates are fetched at once, and the first ``accept_pages`` to
+    return text within ``hedge_deadline_seconds`` are kept.
+    """
+    wanted = num_results or config.search.num_results
+    if not config.fetch.hedged:
+        return wanted, {"concurrency": config.fetch.max_concurrency, "deadline": config.behavior.timeout_seconds}
+    
+    accept = config.fetch.accept_pages or wanted
+    candidates = max(accept, math.ceil(accept * config.fetch.overfetch_factor))
+    return candidates, {
+        "concurrency": max(config.fetch.max_concurrency, candidates),
+        "deadline": config.fetch.hedge_deadline_seconds,
+        "accept": accept,
+    }
+
 
+def fit_pages(pages: List[PageContent], budget: int, provider_name: str) -> List[PageContent]:
+    """Pack gathered pages into the token budget, charging each its prompt header."""
+    if not pages:
+        return pages
+    overhead = max(
+        estimate_tokens(f"[{i}] Title: {page.title}\nURL: {page.url}\nContent:\n\n\n", provider_name)
+        for i, page in enumerate(pages, 1)
+    )
+    return pack_pages(pages, budget, provider_name, overhead_tokens=overhead)
 
-def print_debug_info(search_results: List[SearchResult], pages: List[PageContent]):
+
+def select_context(config, query: str, pages: List[PageContent], budget: int, provider_name: str) -> List[PageContent]:
+    """Narrow gathered pages to the passages relevant to the query, then fit the budget."""
+    if config.retrieval.enabled and pages:
+        from .retrieval import rank_passages
+        
+        pages = rank_passages(query, pages, config.retrieval.top_k, config.retrieval.passage_chars)
+    return fit_pages(pages, budget, provider_name)
+
+
+def print_debug_info(
+    search_results: List[SearchResult],
+    pages: List[PageContent],
+    fetch_stats: Optional[FetchStats] = None,
+    dedup_stats: Optional[DedupStats] = None,
+    compression_stats: Optional[CompressionStats] = None,
+):
     """Print colorful debug information about search and content."""
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.table import Table
+    
     console = Console()
     
     # Search results table
@@ -63,49 +279,157 @@ def print_debug_info(search_results: List[SearchResult], pages: List[PageContent
     
     # Content pages info
     if pages:
-        content_info = "\n".join([f"* {page.title} ({len(page.text)} chars)" for page in pages])
+        content_info = "\n".join(
+            [f"* {page.title} ({len(page.text)} chars, ~{estimate_tokens(page.text)} tokens)" for page in pages]
+        )
         console.print(Panel(content_info, title="[bold green]Content Extracted[/bold green]", border_style="green"))
     else:
         console.print(Panel("[yellow]No content extracted from web sources[/yellow]", border_style="yellow"))
+    
+    if fetch_stats and (fetch_stats.pages_fetched or fetch_stats.pages_skipped):
+        console.print(
+            f"[dim]Fetched {fetch_stats.pages_fetched} pages ({fetch_stats.bytes_fetched:,} bytes), "
+            f"skipped {fetch_stats.pages_skipped} binary/unsupported, "
+            f"truncated {fetch_stats.pages_truncated}, "
+            f"{fetch_stats.bytes_skipped:,} bytes not downloaded[/dim]"
+        )
+    if fetch_stats and (fetch_stats.extractions_skipped or fetch_stats.extractions_timed_out):
+        console.print(
+            f"[dim]Extraction skipped {fetch_stats.extractions_skipped} oversized pages and gave up on "
+            f"{fetch_stats.extractions_timed_out} after the timeout[/dim]"
+        )
+    
+    if dedup_stats and (dedup_stats.pages_dropped or dedup_stats.paragraphs_dropped):
+        console.print(
+            f"[dim]Dropped {dedup_stats.pages_dropped} near-duplicate pages and "
+            f"{dedup_stats.paragraphs_dropped} repeated paragraphs (~{dedup_stats.tokens_saved} tokens saved)[/dim]"
+        )
+
+    if compression_stats and compression_stats.steps:
+        ratios = ", ".join(
+            f"{name} {step.ratio:.0%} ({step.seconds * 1000:.1f}ms)" for name, step in compression_stats.steps.items()
+        )
+        console.print(f"[dim]Compression (output/input per step): {ratios}[/dim]")
+    
+    from .transport import STATS
+    
+    if STATS.requests:
+        console.print(
+            f"[dim]HTTP: {STATS.requests} requests over {STATS.connections_opened} new connections "
+            f"({max(0, STATS.requests - STATS.connections_opened)} reused), "
+            f"DNS {STATS.dns_lookups} lookups / {STATS.dns_cache_hits} cached[/dim]"
+        )
+
+
+def print_trace_waterfall(tracer, width: int = 24):
+    """Print recorded spans as a timing waterfall."""
+    from rich.console import Console
+    from rich.table import Table
+    from .tracing import waterfall
+    
+    rows = waterfall(tracer)
+    if not rows:
+        return
+    origin = min(span.start_ns for _, span in rows)
+    total = max(span.end_ns for _, span in rows) - origin or 1
+    
+    table = Table(title="[bold magenta]Timing[/bold magenta]", header_style="bold magenta")
+    table.add_column("Stage", style="cyan", no_wrap=True)
+    table.add_column("start ms", justify="right", style="dim", no_wrap=True)
+    table.add_column("ms", justify="right", no_wrap=True)
+    table.add_column("", no_wrap=True)
+    table.add_column("Details", style="dim", overflow="fold")
+    for depth, span in rows:
+        offset = int((span.start_ns - origin) / total * width)
+        length = max(1, int((span.end_ns - span.start_ns) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        details = ", ".join(f"{key}={value}" for key, value in span.attrs.items())
+        if span.error:
+            details = f"[red]{span.error}[/red] {details}"
+        table.add_row(
+            "  " * depth + span.name,
+            f"{(span.start_ns - origin) / 1e6:.1f}",
+            f"{span.duration_ms:.1f}",
+            f"[green]{bar}[/green]",
+            details,
+        )
+    Console().print(table)
+
+
+def answer_to_dict(answer_markdown: str, search_results: List[SearchResult]) -> dict:
+    """Convert answer to a JSON-serializable dict."""
+    return {
+        "answer": answer_markdown,
+        "sources": [
+            {"title": r.title, "url": r.url, **({"duplicates": r.duplicates} if r.duplicates else {})}
+            for r in search_results
+        ]
+    }
 
 
 def answer_to_json(answer_markdown: str, search_results: List[SearchResult]) -> str:
     """Convert answer to JSON format."""
-    return json.dumps({
-        "answer": answer_markdown,
-        "sources": [{"title": r.title, "url": r.url} for r in search_results]
-    }, indent=2)
+    return json.dumps(answer_to_dict(answer_markdown, search_results), indent=2)
 
 
 def render_markdown_to_terminal(markdown_text: str) -> str:
     """Render colorful formatted output to terminal."""
-    console = Console()
+    from .render import render_markdown_to_terminal as render
     
-    # Parse sections from markdown
-    sections = markdown_text.split('## ')
-    
-    with console.capture() as capture:
-        for i, section in enumerate(sections):
-            if not section.strip():
-                continue
-                
-            lines = section.strip().split('\n')
-            title = lines[0] if lines else ""
-            content = '\n'.join(lines[1:]) if len(lines) > 1 else ""
-            
-            if title == "TL;DR":
-                console.print(Panel(content, title="[bold cyan]>> TL;DR <<[/bold cyan]", border_style="cyan", padding=(1, 2)))
-            elif title == "Explanation":
-                console.print(Panel(content, title="[bold green]>> Explanation <<[/bold green]", border_style="green", padding=(1, 2)))
-            elif title == "Key Points":
-                console.print(Panel(content, title="[bold yellow]>> Key Points <<[/bold yellow]", border_style="yellow", padding=(1, 2)))
-            elif title == "Sources":
-                console.print(Panel(content, title="[bold magenta]>> Sources <<[/bold magenta]", border_style="magenta", padding=(1, 2)))
-            
-            if i < len(sections) - 1:
-                console.print()
-    
-    return capture.get()
+    return render(markdown_text)
+
+
+def stream_answer(llm, system: str, user: str):
+    """Yield answer chunks, falling back to a single chunk for non-streaming clients."""
+    stream = getattr(llm, "stream", None)
+    if stream is None:
+        yield llm.answer(system, user)
+        return
+    yield from stream(system, user)
+
+
+def run_query(
+    query: str,
+    num_results: Optional[int] = None,
+    use_web: bool = True,
+    debug: bool = False,
+    llm_provider: Optional[str] = None,
+    use_cache: bool = True,
+    on_context: Optional[Callable[[QueryOutcome], None]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    config: Optional[Settings] = None,
+    llm=None,
+    search_provider=None,
+    offline: bool = False,
+) -> QueryOutcome:
+    """Run the search → fetch → LLM pipeline once in a short-lived session.
+    
+    ``on_context`` is called once the context is gathered, right before the LLM is
+    asked; ``on_token`` switches the LLM call to streaming. Callers asking more than
+    once should keep an ``AskSession`` instead.
+    """
+    from .session import SyncAskSession
+    
+    def on_event(event: AskEvent) -> None:
+        if event.type == "context" and on_context:
+            on_context(event.outcome)
+        elif event.type == "token" and on_token:
+            on_token(event.text)
+        elif event.type == "warning" and debug:
+            print(event.text)
+        elif event.type == "waiting":
+            print(event.text, file=sys.stderr, flush=True)
+    
+    with SyncAskSession(config, llm=llm, llm_provider=llm_provider, search_provider=search_provider) as session:
+        return session.ask(
+            query,
+            num_results=num_results,
+            use_web=use_web,
+            use_cache=use_cache,
+            offline=offline,
+            stream=on_token is not None,
+            on_event=on_event,
+        )
 
 
 def handle_query(
@@ -114,47 +438,67 @@ def handle_query(
     use_web: bool = True,
     debug: bool = False,
     as_json: bool = False,
-    llm_provider: Optional[str] = None
+    llm_provider: Optional[str] = None,
+    use_cache: bool = True,
+    stream: bool = False,
+    offline: bool = False,
 ) -> str:
-    """Main function to handle a query and return formatted answer."""
-    config = load_config()
-    llm = get_llm_client(config, llm_provider)
+    """Main function to handle a query and return formatted answer.
     
-    search_results = []
-    pages = []
+    With ``stream``, the answer is written to stdout as it is generated (Rich panels,
+    or NDJSON token events with ``as_json``) and only the remainder is returned.
+    """
+    from rich.console import Console
+    from .render import StreamingRenderer
     
-    if use_web:
-        try:
-            provider = get_search_provider(config)
-            search_results = provider.search(
-                query, 
-                n=num_results or config.search.num_results
+    renderer = None
+    
+    def on_context(outcome: QueryOutcome) -> None:
+        nonlocal renderer
+        if debug:
+            print_debug_info(
+                outcome.search_results, outcome.pages, outcome.fetch_stats, outcome.dedup_stats, outcome.compression_stats
             )
-            pages = gather_context(search_results, max_total_chars=8000)
-            
-            # If no content was extracted, fall back to LLM-only
-            if not pages or all(not page.text.strip() for page in pages):
-                if debug:
-                    print("No content extracted from web sources, falling back to LLM-only")
-                use_web = False
-                search_results = []
-                pages = []
-        except Exception as e:
-            if debug:
-                print(f"Web search failed, falling back to LLM-only: {e}")
-            use_web = False
-            search_results = []
-            pages = []
-    
-    if debug:
-        print_debug_info(search_results, pages)
-        console = Console()
-        console.print()
-    
-    user_prompt = build_user_prompt(query, pages)
-    answer_markdown = llm.answer(SYSTEM_PROMPT, user_prompt)
+            console = Console()
+            if outcome.cache_status:
+                console.print(f"[bold green]Cache hit:[/bold green] {outcome.cache_status}")
+            if outcome.local_index:
+                console.print("[bold green]Local index:[/bold green] search and fetch skipped")
+            console.print()
+        if stream and not as_json and outcome.cache_status is None:
+            renderer = StreamingRenderer(status=f"Asking {llm_provider or 'LLM'}...").__enter__()
+    
+    def on_json_token(chunk: str) -> None:
+        print(json.dumps({"type": "token", "text": chunk}), flush=True)
+    
+    def on_token(chunk: str) -> None:
+        renderer.feed(chunk)
+    
+    try:
+        outcome = run_query(
+            query,
+            num_results=num_results,
+            use_web=use_web,
+            debug=debug,
+            llm_provider=llm_provider,
+            use_cache=use_cache,
+            offline=offline,
+            on_context=on_context,
+            on_token=(on_json_token if as_json else on_token) if stream else None,
+        )
+    finally:
+        if renderer is not None:
+            renderer.close()
+    
+    if stream and as_json:
+        return json.dumps({"type": "answer", **answer_to_dict(outcome.answer, outcome.search_results)})
     
     if as_json:
-        return answer_to_json(answer_markdown, search_results)
+        return answer_to_json(outcome.answer, outcome.search_results)
+    
+    if outcome.streamed:
+        # Already rendered while streaming
+        return ""
     
-    return render_markdown_to_terminal(answer_markdown)
\ No newline at end of file
+    with span("render"):
+        return render_markdown_to_terminal(outcome.answer)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+from pydantic import BaseModel
+from .answer import answer_to_dict
+from .models import CompressionStats, FlightStats, Settings
+from .session import AskSession
+
+
+class BatchQuery(BaseModel):
+    id: str
+    query: str
+    num_results: Optional[int] = None
+
+
+class BatchReport(BaseModel):
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed_seconds: float = 0.0
+    stage_latencies: Dict[str, List[float]] = {}
+    coalesced: Dict[str, FlightStats] = {}
+    compression: CompressionStats = CompressionStats()
+
+    @property
+    def queries_per_minute(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return (self.completed + self.failed) / self.elapsed_seconds * 60
+
+
+def load_queries(path: Path) -> List[BatchQuery]:
+    """Read queries from a text file (one per line) or JSONL (``{"query": ..., "id": ...}``)."""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.suffix == ".jsonl":
+                data = json.loads(line)
+                # Numeric ids are common in JSONL; ids are compared as strings on resume
+                data["id"] = str(data.get("id", data["query"]))
+                queries.append(BatchQuery(**data))
+            else:
+                queries.append(BatchQuery(id=line, query=line))
+    return queries
+
+
+def completed_ids(output_path: Path) -> Set[str]:
+    """IDs of queries that already have a successful record in ``output_path``."""
+    done = set()
+    if not output_path.exists():
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Partially written last line of an interrupted run
+                continue
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_batch(
+    queries: List[BatchQuery],
+    output_path: Path,
+    config: Settings,
+    llm,
+    provider=None,
+    provider_name: str = "",
+    num_results: Optional[int] = None,
+    resume: bool = True,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> BatchReport:
+    """Run the search → fetch → LLM pipeline over many queries on one ``AskSession``.
+    
+    Records shaped like ``answer_to_json`` (plus ``id``, ``query`` and ``timings``) are
+    appended to ``output_path`` as each query finishes. With ``resume``, queries that
+    already have a successful record there are skipped.
+    """
+    report = BatchReport(stage_latencies={"search": [], "fetch": [], "llm": [], "total": []})
+    done = completed_ids(output_path) if resume else set()
+    pending = [q for q in queries if q.id not in done]
+    report.skipped = len(queries) - len(pending)
+    
+    session = AskSession(config, llm=llm, llm_provider=provider_name or None, search_provider=provider)
+    
+    async def process(item: BatchQuery, out) -> None:
+        started = time.perf_counter()
+        try:
+            outcome = await session.ask(
+                item.query, num_results=item.num_results or num_results, use_web=provider is not None
+            )
+            timings = outcome.timings
+            record = {"id": item.id, "query": item.query, **answer_to_dict(outcome.answer, outcome.search_results)}
+            report.completed += 1
+            for stage, seconds in timings.items():
+                if stage in report.stage_latencies:
+                    report.stage_latencies[stage].append(seconds)
+        except Exception as e:
+            timings = {"total": time.perf_counter() - started}
+            record = {"id": item.id, "query": item.query, "error": str(e)}
+            report.failed += 1
+        
+        record["timings"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        if on_result:
+            on_result(record)
+    
+    started = time.perf_counter()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if resume and output_path.exists() and output_path.stat().st_size:
+        with open(output_path, 'rb') as f:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                # Terminate a line left half-written by an interrupted run
+                with open(output_path, 'a', encoding='utf-8') as out:
+                    out.write("\n")
+    
+    with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out:
+        async with session:
+            await asyncio.gather(*(process(item, out) for item in pending))
+    report.elapsed_seconds = time.perf_counter() - started
+    report.coalesced = session.coalescing
+    if session.compressor is not None:
+        report.compression = session.compressor.stats
+    return report
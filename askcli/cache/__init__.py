@@ -0,0 +1 @@
+# Cache package
\ No newline at end of file
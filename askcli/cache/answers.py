@@ -0,0 +1,134 @@
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from ..similarity import SIMHASH_BITS, bands, key_terms, query_fingerprint, similarity
+from .keys import hash_key
+from .store import DiskCache
+
+
+class AnswerCache:
+    """Two-tier cache of LLM answers.
+    
+    The exact tier is keyed on a hash of (provider, model, system prompt, user prompt).
+    The optional similar tier matches re-worded repeats of a question by SimHash over
+    the query's key terms and its source URLs, within ``similarity`` and
+    ``similar_max_age``. A match must also have the same key terms, so "python 3.12"
+    never answers "python 3.13". Fingerprints are indexed by bands, so a lookup only
+    compares entries that can be within the threshold.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int = 86400,
+        similar_enabled: bool = False,
+        similarity: float = 0.9,
+        similar_max_age: int = 3600,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.similar_enabled = similar_enabled
+        self.similarity = similarity
+        self.similar_max_age = similar_max_age
+        self.store = DiskCache(path, max_bytes=max_bytes)
+        # One more band than the bits a match may differ in
+        self.bands = min(SIMHASH_BITS, math.floor((1 - similarity) * SIMHASH_BITS + 1e-9) + 1)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS similar ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, terms TEXT NOT NULL, "
+                "fingerprint TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS similar_bands ("
+                "scope TEXT NOT NULL, band INTEGER NOT NULL, value INTEGER NOT NULL, key TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS similar_bands_lookup ON similar_bands (scope, band, value)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.store.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def exact_key(provider: str, model: str, system: str, user: str) -> str:
+        return hash_key(provider, model, system, user)
+
+    def get_exact(self, key: str) -> Optional[str]:
+        entry = self.store.get(key)
+        if entry is None or entry.age >= self.ttl_seconds:
+            return None
+        self.store.incr("hits")
+        return entry.value.decode("utf-8")
+
+    def find_similar(self, scope: str, query: str, urls: Iterable[str]) -> Optional[Tuple[str, float]]:
+        """Return (answer, similarity) of the closest recent answer within the threshold."""
+        if not self.similar_enabled:
+            return None
+        
+        fingerprint = query_fingerprint(query, urls)
+        terms = " ".join(key_terms(query))
+        newer_than = time.time() - min(self.similar_max_age, self.ttl_seconds)
+        band_values = list(enumerate(bands(fingerprint, self.bands)))
+        rows = self._connect().execute(
+            "SELECT DISTINCT similar.key, similar.fingerprint FROM similar_bands "
+            "JOIN similar ON similar.key = similar_bands.key "
+            f"WHERE similar_bands.scope = ? AND ({' OR '.join(['(band = ? AND value = ?)'] * len(band_values))}) "
+            "AND similar.terms = ? AND similar.created_at > ?",
+            (scope, *[part for pair in band_values for part in pair], terms, newer_than),
+        ).fetchall()
+        matches = sorted(
+            ((score, key) for key, stored in rows if (score := similarity(fingerprint, int(stored, 16))) >= self.similarity),
+            reverse=True,
+        )
+        for score, key in matches:
+            entry = self.store.get(key)
+            if entry is None:
+                # Evicted from the store since
+                self._forget(key)
+                continue
+            self.store.incr("similar_hits")
+            return entry.value.decode("utf-8"), score
+        return None
+
+    def put(self, key: str, answer: str, scope: str, query: str, urls: Iterable[str]) -> None:
+        self.store.set(key, answer.encode("utf-8"), {"scope": scope})
+        if not self.similar_enabled:
+            return
+        fingerprint = query_fingerprint(query, urls)
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            self._forget(key, conn)
+            conn.execute(
+                "INSERT INTO similar (key, scope, terms, fingerprint, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, scope, " ".join(key_terms(query)), format(fingerprint, "x"), now),
+            )
+            conn.executemany(
+                "INSERT INTO similar_bands (scope, band, value, key) VALUES (?, ?, ?, ?)",
+                [(scope, band, value, key) for band, value in enumerate(bands(fingerprint, self.bands))],
+            )
+            # Entries past the similar tier's age can no longer match
+            expired = [old for old, in conn.execute(
+                "SELECT key FROM similar WHERE created_at <= ?", (now - min(self.similar_max_age, self.ttl_seconds),)
+            )]
+            for old in expired:
+                self._forget(old, conn)
+
+    def _forget(self, key: str, conn: Optional[sqlite3.Connection] = None) -> None:
+        if conn is None:
+            with self._connect() as conn:
+                self._forget(key, conn)
+            return
+        conn.execute("DELETE FROM similar_bands WHERE key = ?", (key,))
+        conn.execute("DELETE FROM similar WHERE key = ?", (key,))
+
+    def miss(self) -> None:
+        self.store.incr("misses")
@@ -0,0 +1,198 @@
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+from pydantic import BaseModel
+from ..models import PageContent
+from ..retrieval import split_passages, tokenize
+
+
+# A query term in at most this share of the indexed pages is distinctive: a page
+# without it is about something else (another version, product or platform)
+RARE_TERM_SHARE = 0.1
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+class IndexHit(BaseModel):
+    page: PageContent
+    score: float
+    fetched_at: float
+    missing: List[str] = []
+
+
+class PageIndex:
+    """Local full-text index (SQLite FTS5) of every page extracted by a run.
+
+    Pages are split into passages like the retrieval step does. Re-indexing a URL
+    whose text is unchanged only refreshes its fetch time. Pages older than
+    ``max_age_seconds`` are pruned, then the least recently used ones until the
+    indexed text fits ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 100 * 1024 * 1024,
+        max_age_seconds: float = 30 * 86400,
+        passage_chars: int = 600,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.passage_chars = passage_chars
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, title TEXT NOT NULL, "
+                "checksum TEXT NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_fetched ON pages (fetched_at)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5("
+                "text, page_id UNINDEXED, position UNINDEXED, tokenize='porter unicode61')"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, pages: Iterable[PageContent]) -> int:
+        """Add or refresh ``pages``; returns how many were new or changed."""
+        now = time.time()
+        changed = 0
+        conn = self._connect()
+        with conn:
+            # Take the write lock before reading, so concurrent puts of the same URL
+            # (threads or processes) queue instead of racing on the UNIQUE url
+            conn.execute("BEGIN IMMEDIATE")
+            for page in pages:
+                if not page.text.strip():
+                    continue
+                checksum = hashlib.sha256(page.text.encode("utf-8")).hexdigest()
+                row = conn.execute("SELECT id, checksum FROM pages WHERE url = ?", (page.url,)).fetchone()
+                if row is not None and row[1] == checksum:
+                    conn.execute("UPDATE pages SET fetched_at = ?, title = ? WHERE id = ?", (now, page.title, row[0]))
+                    continue
+                if row is not None:
+                    conn.execute("DELETE FROM passages WHERE page_id = ?", (row[0],))
+                    conn.execute("DELETE FROM pages WHERE id = ?", (row[0],))
+                page_id = conn.execute(
+                    "INSERT INTO pages (url, title, checksum, size, fetched_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (page.url, page.title, checksum, len(page.text.encode("utf-8")), now, now),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO passages (text, page_id, position) VALUES (?, ?, ?)",
+                    [(passage, page_id, i) for i, passage in enumerate(split_passages(page.text, self.passage_chars))],
+                )
+                changed += 1
+        if changed:
+            self.prune()
+        return changed
+
+    def search(self, query: str, limit: int = 5, passages: int = 50) -> List[IndexHit]:
+        """Best pages for ``query``, each scored by the IDF-weighted share of the query's
+        terms it contains (0-1, matched after stemming).
+
+        ``missing`` lists the query's numbers (matched exactly, so "3.14" is not "3.12")
+        and rare terms that a page lacks; such a page does not answer the question.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT page_id FROM passages WHERE passages MATCH ? ORDER BY bm25(passages) LIMIT ?",
+            (" OR ".join(f'"{term}"' for term in terms), passages),
+        ).fetchall()
+        ranked = list(dict.fromkeys(page_id for page_id, in rows))[:limit]
+        if not ranked:
+            return []
+
+        total = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        marks = ", ".join("?" * len(ranked))
+        weights = {}
+        rare = set()
+        found: Dict[int, set] = {page_id: set() for page_id in ranked}
+        for term in terms:
+            frequency = conn.execute(
+                "SELECT COUNT(DISTINCT page_id) FROM passages WHERE passages MATCH ?", (f'"{term}"',)
+            ).fetchone()[0]
+            # BM25's inverse document frequency
+            weights[term] = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            if frequency <= total * RARE_TERM_SHARE:
+                rare.add(term)
+            for page_id, in conn.execute(
+                f"SELECT DISTINCT page_id FROM passages WHERE passages MATCH ? AND page_id IN ({marks})",
+                (f'"{term}"', *ranked),
+            ):
+                found[page_id].add(term)
+        numbers = set(_NUMBER.findall(query))
+
+        hits = []
+        now = time.time()
+        with conn:
+            for page_id in ranked:
+                url, title, fetched_at = conn.execute(
+                    "SELECT url, title, fetched_at FROM pages WHERE id = ?", (page_id,)
+                ).fetchone()
+                text = "\n\n".join(
+                    passage for passage, in conn.execute(
+                        "SELECT text FROM passages WHERE page_id = ? ORDER BY position", (page_id,)
+                    )
+                )
+                conn.execute("UPDATE pages SET used_at = ? WHERE id = ?", (now, page_id))
+                missing = sorted(rare - found[page_id]) + sorted(
+                    number for number in numbers
+                    if not re.search(rf"(?<![\d.,]){re.escape(number)}(?!\d|[.,]\d)", text)
+                )
+                hits.append(IndexHit(
+                    page=PageContent(url=url, title=title, text=text),
+                    score=sum(weights[term] for term in found[page_id]) / (sum(weights.values()) or 1.0),
+                    fetched_at=fetched_at,
+                    missing=missing,
+                ))
+        return hits
+
+    def prune(self) -> int:
+        """Drop pages past ``max_age_seconds``, then least recently used ones over ``max_bytes``."""
+        conn = self._connect()
+        cutoff = time.time() - self.max_age_seconds
+        with conn:
+            removed = [page_id for page_id, in conn.execute("SELECT id FROM pages WHERE fetched_at < ?", (cutoff,))]
+            kept = conn.execute(
+                "SELECT id, size FROM pages WHERE fetched_at >= ? ORDER BY used_at", (cutoff,)
+            ).fetchall()
+            total = sum(size for _, size in kept)
+            for page_id, size in kept:
+                if total <= self.max_bytes:
+                    break
+                removed.append(page_id)
+                total -= size
+            for page_id in removed:
+                conn.execute("DELETE FROM passages WHERE page_id = ?", (page_id,))
+                conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+        return len(removed)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        pages, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"entries": pages, "size_bytes": size}
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM passages")
+            conn.execute("DELETE FROM pages")
+        conn.execute("VACUUM")
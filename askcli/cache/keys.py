@@ -0,0 +1,51 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, whitespace and trailing ``?``/``!``/``.`` so trivially different queries
+    share a key. Punctuation inside the query is kept: "C#" is not "C", nor "node.js" "node js"."""
+    folded = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+    return folded.rstrip("?!. ")
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, punctuation and whitespace, for comparing page text rather than queries."""
+    folded = unicodedata.normalize("NFKC", text).casefold()
+    stripped = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch for ch in folded
+    )
+    return _WHITESPACE.sub(" ", stripped).strip()
+
+
+def hash_key(*parts: str) -> str:
+    """Stable hex digest over several string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref_src", "spm"}
+
+
+def canonical_url(url: str) -> str:
+    """Fold the differences search engines introduce between links to the same page:
+    scheme, ``www.``, default ports, trailing slashes, fragments and tracking parameters."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from pydantic import BaseModel
+from .store import DiskCache
+
+
+class CachedPage(BaseModel):
+    url: str
+    html: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    age: float = 0.0
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """URL-keyed cache of raw HTML plus the text extracted from it."""
+
+    def __init__(self, path: Path, ttl_seconds: int = 86400, max_bytes: int = 200 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.store = DiskCache(path, max_bytes=max_bytes)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for ``url``, fresh or stale."""
+        entry = self.store.get(url)
+        if entry is None:
+            return None
+        data = json.loads(entry.value)
+        return CachedPage(url=url, age=entry.age, **data, **entry.meta)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age < self.ttl_seconds
+
+    def put(self, url: str, html: str, text: str, headers: Optional[Dict[str, str]] = None) -> None:
+        headers = headers or {}
+        meta = {
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+        }
+        value = json.dumps({"html": html, "text": text}).encode("utf-8")
+        self.store.set(url, value, meta)
+
+    def revalidated(self, page: CachedPage, headers: Optional[Dict[str, str]] = None) -> None:
+        """Mark a stale page as fresh again after a 304 Not Modified."""
+        headers = headers or {}
+        meta = {
+            "etag": headers.get("etag") or page.etag,
+            "last_modified": headers.get("last-modified") or page.last_modified,
+        }
+        self.store.touch(page.url, meta)
+        self.store.incr("revalidated")
+
+    def record(self, hit: bool) -> None:
+        self.store.incr("hits" if hit else "misses")
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+    def clear(self) -> None:
+        self.store.clear()
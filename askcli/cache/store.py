@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from pydantic import BaseModel
+
+
+class CacheEntry(BaseModel):
+    key: str
+    value: bytes
+    meta: Dict = {}
+    created_at: float
+    accessed_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+class DiskCache:
+    """Compressed key/value store on SQLite with LRU eviction under a size cap.
+    
+    SQLite in WAL mode handles locking, so several ``ask`` processes can read and
+    write the same cache file concurrently.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 200 * 1024 * 1024, compress_level: int = 6):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, meta TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` and mark it as recently used."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, meta, created_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with conn:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return CacheEntry(
+            key=key,
+            value=zlib.decompress(row[0]),
+            meta=json.loads(row[1]),
+            created_at=row[2],
+            accessed_at=now,
+        )
+
+    def set(self, key: str, value: bytes, meta: Optional[Dict] = None) -> None:
+        """Store ``value`` under ``key`` and evict least recently used entries if over the cap."""
+        blob = zlib.compress(value, self.compress_level)
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, json.dumps(meta or {}), len(blob), now, now),
+            )
+        self.evict()
+
+    def touch(self, key: str, meta: Optional[Dict] = None) -> None:
+        """Reset the age of ``key`` (e.g. after a successful revalidation)."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            if meta is None:
+                conn.execute(
+                    "UPDATE entries SET created_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+                )
+            else:
+                conn.execute(
+                    "UPDATE entries SET created_at = ?, accessed_at = ?, meta = ? WHERE key = ?",
+                    (now, now, json.dumps(meta), key),
+                )
+
+    def scan(self, newer_than: float = 0.0) -> Iterator[Tuple[str, Dict, float]]:
+        """Yield (key, meta, created_at) for entries created after ``newer_than``, newest first."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT key, meta, created_at FROM entries WHERE created_at > ? ORDER BY created_at DESC",
+            (newer_than,),
+        ).fetchall()
+        for key, meta, created_at in rows:
+            yield key, json.loads(meta), created_at
+
+    def delete(self, key: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the store fits ``max_bytes``."""
+        conn = self._connect()
+        removed = 0
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (removed,),
+            )
+        return removed
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increment a persistent counter (hits, misses, ...)."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount),
+            )
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM counters")
+        conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        stats = {"entries": entries, "size_bytes": size}
+        stats.update(dict(conn.execute("SELECT name, value FROM counters").fetchall()))
+        return stats
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from .answer import context_limits, fetch_plan, print_debug_info, render_markdown_to_terminal, select_context
+from .cache.answers import AnswerCache
+from .dedup import fold_sources
+from .models import AskEvent, ChatTurn, PageContent, QueryOutcome, SearchResult, Settings
+from .prompts import SYSTEM_PROMPT, build_user_prompt, format_history
+from .retrieval import context_coverage, tokenize
+from .session import AskSession, report_waits
+from .tokens import estimate_tokens
+from .tracing import span
+
+EXIT_COMMANDS = ("/exit", "/quit")
+
+
+class Conversation:
+    """State of one ``ask chat``: earlier turns plus every page fetched so far.
+
+    A follow-up is answered from the pages already held when they cover it
+    (``chat.reuse_coverage``); otherwise the web is searched again and only sources
+    that are not held yet are fetched.
+    """
+
+    def __init__(
+        self,
+        session: AskSession,
+        num_results: Optional[int] = None,
+        use_web: bool = True,
+        llm_provider: Optional[str] = None,
+        use_cache: bool = True,
+    ):
+        self.session = session
+        self.num_results = num_results
+        self.use_web = use_web
+        self.llm_provider = llm_provider
+        self.use_cache = use_cache and session.config.behavior.cache_enabled
+        self.turns: List[ChatTurn] = []
+        self.pages: Dict[str, PageContent] = {}
+        self.sources: Dict[str, SearchResult] = {}
+
+    def reset(self) -> None:
+        self.turns.clear()
+        self.pages.clear()
+        self.sources.clear()
+
+    def history(self, max_tokens: int, provider: Optional[str] = None) -> List[ChatTurn]:
+        """The most recent turns that fit in ``max_tokens``, oldest first."""
+        kept = []
+        used = 0
+        for turn in reversed(self.turns):
+            used += estimate_tokens(format_history([turn]), provider)
+            if used > max_tokens:
+                break
+            kept.append(turn)
+        return kept[::-1]
+
+    def search_query(self, question: str) -> str:
+        # Short follow-ups ("and its drawbacks?") lean on the previous question for context
+        if self.turns and len(tokenize(question)) < 3:
+            return f"{self.turns[-1].question} {question}"
+        return question
+
+    async def ask(
+        self,
+        question: str,
+        stream: bool = False,
+        on_event: Optional[Callable[[AskEvent], None]] = None,
+    ) -> QueryOutcome:
+        """Answer ``question`` in the context of the conversation and record the turn."""
+        emit = on_event or (lambda event: None)
+        with report_waits(emit):
+            return await self._ask(question, stream, emit)
+
+    async def _ask(self, question: str, stream: bool, emit: Callable[[AskEvent], None]) -> QueryOutcome:
+        session = self.session
+        config = session.config
+        llm = session.llm(self.llm_provider)
+        provider_name = self.llm_provider or session.llm_provider or config.llm.provider
+        model_name = getattr(llm, "model_name", "")
+        outcome = QueryOutcome(query=question)
+        started = time.perf_counter()
+
+        budget = context_limits(config, provider_name, question)[0]
+        history = self.history(int(budget * config.chat.history_share), provider_name)
+        budget = max(0, budget - estimate_tokens(format_history(history), provider_name))
+        query = self.search_query(question)
+
+        with span("chat.coverage", pages=len(self.pages)) as stage:
+            coverage = context_coverage(query, list(self.pages.values()), config.retrieval.passage_chars)
+            stage.set(coverage=round(coverage, 2))
+        outcome.context_reused = bool(self.pages) and coverage >= config.chat.reuse_coverage
+
+        if self.use_web and not outcome.context_reused:
+            try:
+                search_n, _ = fetch_plan(config, self.num_results)
+                t0 = time.perf_counter()
+                results = await session.search_web(query, search_n, self.use_cache)
+                outcome.timings["search"] = time.perf_counter() - t0
+                held = set(self.pages) | {url for source in self.sources.values() for url in source.duplicates}
+                new = [r for r in results if r.url not in held]
+                t0 = time.perf_counter()
+                pages = await session.fetch_pages(
+                    new, question, provider_name, self.use_cache, outcome.fetch_stats, self.num_results
+                ) if new else []
+                outcome.timings["fetch"] = time.perf_counter() - t0
+                for page in pages:
+                    if page.text.strip():
+                        self.pages[page.url] = page
+                self.sources.update({r.url: r for r in new if r.url in self.pages})
+                if pages and config.dedup.enabled:
+                    kept, duplicates, outcome.dedup_stats = await session.dedupe(list(self.pages.values()), provider_name)
+                    self.pages = {page.url: page for page in kept}
+                    self.sources = {
+                        source.url: source for source in fold_sources(list(self.sources.values()), duplicates)
+                    }
+                fresh = [page for page in self.pages.values() if page.url in {r.url for r in new}]
+                for page in await session.compress(fresh, outcome.compression_stats):
+                    self.pages[page.url] = page
+            except Exception as e:
+                emit(AskEvent(type="warning", text=f"Web search failed, answering from the conversation so far: {e}"))
+
+        with span("select_context", budget_tokens=budget):
+            outcome.pages = select_context(config, query, list(self.pages.values()), budget, provider_name)
+        outcome.search_results = [self.sources[page.url] for page in outcome.pages]
+        user_prompt = build_user_prompt(question, outcome.pages, history)
+        key = AnswerCache.exact_key(provider_name, model_name, SYSTEM_PROMPT, user_prompt)
+        emit(AskEvent(type="context", outcome=outcome.model_copy()))
+
+        t0 = time.perf_counter()
+        with span("llm", provider=provider_name, model=model_name, streamed=stream) as stage:
+            def on_token(chunk: str) -> None:
+                if "ttft" not in outcome.timings:
+                    outcome.timings["ttft"] = time.perf_counter() - t0
+                    stage.set(ttft_ms=round(outcome.timings["ttft"] * 1000, 1))
+                emit(AskEvent(type="token", text=chunk))
+
+            outcome.answer = await session.generate(llm, user_prompt, key, stream, on_token)
+            outcome.streamed = stream
+            stage.set(answer_chars=len(outcome.answer))
+        outcome.timings["llm"] = time.perf_counter() - t0
+        outcome.timings["total"] = time.perf_counter() - started
+
+        self.turns.append(ChatTurn(question=question, answer=outcome.answer, sources=outcome.search_results))
+        emit(AskEvent(type="result", outcome=outcome))
+        return outcome
+
+
+async def repl(
+    config: Settings,
+    num_results: Optional[int] = None,
+    use_web: bool = True,
+    llm_provider: Optional[str] = None,
+    use_cache: bool = True,
+    stream: bool = True,
+    debug: bool = False,
+) -> None:
+    """Interactive loop for ``ask chat``; ``/reset`` forgets the conversation, ``/exit`` leaves."""
+    from rich.console import Console
+    from .render import StreamingRenderer
+
+    console = Console()
+    async with AskSession(config, llm_provider=llm_provider) as session:
+        conversation = Conversation(session, num_results, use_web, llm_provider, use_cache)
+        while True:
+            try:
+                question = (await asyncio.to_thread(console.input, "[bold cyan]ask>[/bold cyan] ")).strip()
+            except (EOFError, KeyboardInterrupt):
+                console.print()
+                return
+            if not question:
+                continue
+            if question in EXIT_COMMANDS:
+                return
+            if question == "/reset":
+                conversation.reset()
+                console.print("[dim]Conversation cleared.[/dim]")
+                continue
+
+            renderer = None
+
+            def on_event(event: AskEvent) -> None:
+                nonlocal renderer
+                if event.type == "warning" and debug:
+                    console.print(f"[yellow]{event.text}[/yellow]")
+                elif event.type == "waiting":
+                    console.print(f"[dim]{event.text}[/dim]")
+                elif event.type == "context":
+                    if debug:
+                        print_debug_info(
+                            event.outcome.search_results,
+                            event.outcome.pages,
+                            event.outcome.fetch_stats,
+                            event.outcome.dedup_stats,
+                            event.outcome.compression_stats,
+                        )
+                    if event.outcome.context_reused:
+                        console.print("[dim]Answering from the pages already gathered[/dim]")
+                    if stream:
+                        renderer = StreamingRenderer(console, status=f"Asking {llm_provider or 'LLM'}...").__enter__()
+                elif event.type == "token" and renderer is not None:
+                    renderer.feed(event.text)
+
+            try:
+                outcome = await conversation.ask(question, stream=stream, on_event=on_event)
+            except Exception as e:
+                console.print(f"[bold red]Error:[/bold red] {e}")
+                continue
+            finally:
+                if renderer is not None:
+                    renderer.close()
+            if not outcome.streamed:
+                print(render_markdown_to_terminal(outcome.answer))
+            if debug:
+                timings = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in outcome.timings.items())
+                console.print(f"[dim]{timings}[/dim]")
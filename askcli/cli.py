@@ -1,8 +1,83 @@
 import typer
+from enum import Enum
+from pathlib import Path
 from typing import Optional
-from .answer import handle_query
+from typer.core import TyperGroup
 
-app = typer.Typer(help="ASK CLI - Intelligent Q&A with web search")
+
+class DefaultCommandGroup(TyperGroup):
+    """Command group that routes `ask "question"` to the default `main` command.
+    
+    A question that is exactly a subcommand name goes after `--`: `ask -- chat`.
+    """
+
+    default_command = "main"
+
+    def parse_args(self, ctx, args):
+        group_options = {opt for param in self.get_params(ctx) for opt in param.opts}
+        if args and args[0] not in self.commands and args[0] not in group_options:
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+
+class ExtractionMode(str, Enum):
+    """``extraction.EXTRACTION_MODES``, spelled out so the CLI does not import the fetcher."""
+    inline = "inline"
+    thread = "thread"
+    process = "process"
+
+
+app = typer.Typer(help="ASK CLI - Intelligent Q&A with web search", cls=DefaultCommandGroup)
+cache_app = typer.Typer(help="Manage the local page, search and answer caches")
+app.add_typer(cache_app, name="cache")
+
+
+@app.callback(invoke_without_command=True)
+def startup(
+    ctx: typer.Context,
+    startup_profile: bool = typer.Option(False, "--startup-profile", help="Report per-module import time and exit"),
+):
+    """ASK CLI - Intelligent Q&A with web search"""
+    if startup_profile:
+        _print_startup_profile()
+        raise typer.Exit()
+    if ctx.invoked_subcommand is None:
+        typer.echo(ctx.get_help())
+        raise typer.Exit()
+
+
+def _print_startup_profile():
+    from rich.console import Console
+    from rich.table import Table
+    from .profiling import profile_imports
+    from .registry import LLM_PROVIDERS, SEARCH_PROVIDERS
+    
+    components = {"askcli.cli": "CLI", "askcli.answer": "pipeline", "askcli.fetcher": "fetcher"}
+    for label, registry in (("LLM", LLM_PROVIDERS), ("search", SEARCH_PROVIDERS)):
+        for name in registry.names():
+            target = registry.target(name)
+            if isinstance(target, str):
+                components[target.partition(":")[0]] = f"{label}: {name}"
+    
+    timings = profile_imports(list(components))
+    console = Console()
+    
+    table = Table(title="[bold magenta]Startup Import Cost[/bold magenta]")
+    table.add_column("Component", style="cyan")
+    table.add_column("Module", style="dim")
+    table.add_column("ms", justify="right")
+    for timing in timings:
+        if timing.depth == 0 and timing.module in components:
+            table.add_row(components[timing.module], timing.module, f"{timing.cumulative_us / 1000:.1f}")
+    console.print(table)
+    
+    table = Table(title="[bold magenta]Slowest Modules (self time)[/bold magenta]")
+    table.add_column("Module", style="cyan")
+    table.add_column("self ms", justify="right")
+    table.add_column("cumulative ms", justify="right")
+    for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:15]:
+        table.add_row(timing.module, f"{timing.self_us / 1000:.1f}", f"{timing.cumulative_us / 1000:.1f}")
+    console.print(table)
 
 
 @app.command()
@@ -14,12 +89,19 @@ def main(
     debug: bool = typer.Option(False, "--debug", help="Show debug information"),
     gemini: bool = typer.Option(False, "--gemini", help="Use Gemini LLM (default)"),
     groq: bool = typer.Option(False, "--groq", help="Use Groq LLM"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the page, search and answer caches"),
+    offline: bool = typer.Option(False, "--offline", help="Answer only from the local page index (no web search)"),
+    stream: Optional[bool] = typer.Option(
+        None, "--stream/--no-stream",
+        help="Stream the answer as it is generated (default: on, off with --json)",
+    ),
+    no_daemon: bool = typer.Option(False, "--no-daemon", help="Run in-process even if `ask serve` is running"),
+    trace: Optional[Path] = typer.Option(
+        None, "--trace", help="Write a Chrome trace (plus a .otlp.json OpenTelemetry export) of this query",
+    ),
 ):
     """Ask a question and get an intelligent answer with sources."""
-    from rich.console import Console
-    from rich.text import Text
-    
-    console = Console()
+    from .launcher import ask_via_daemon
     
     # Determine LLM provider
     llm_provider = None
@@ -29,37 +111,280 @@ def main(
         llm_provider = "gemini"
     # Default to gemini if neither specified
     
-    if not json_output:
-        # Show colorful header
-        header = Text("ASK CLI", style="bold magenta")
-        header.append(" | ", style="dim")
-        header.append("Intelligent Q&A", style="bold cyan")
-        if not no_web:
-            header.append(" with web search", style="green")
-        
-        # Show LLM provider
-        provider_name = llm_provider or "gemini"
-        header.append(f" [{provider_name.upper()}]", style="bold yellow")
+    def header() -> None:
+        if not json_output:
+            from .render import print_header
+            
+            print_header(llm_provider, offline, not no_web)
+    
+    stream = not json_output if stream is None else stream
+    tracer = None
+    if debug or trace:
+        from . import tracing
         
-        console.print(header)
-        console.print()
+        tracer = tracing.enable()
     
     try:
-        response = handle_query(
-            query=query,
-            num_results=num_results,
-            use_web=not no_web,
-            debug=debug,
-            as_json=json_output,
-            llm_provider=llm_provider,
-        )
-        print(response)
+        response = None
+        # --debug and --trace need the in-process pipeline to report on it
+        if tracer is None and not no_daemon:
+            response = ask_via_daemon(
+                {
+                    "query": query,
+                    "num_results": num_results,
+                    "use_web": not no_web,
+                    "llm_provider": llm_provider,
+                    "use_cache": not no_cache,
+                    "offline": offline,
+                },
+                as_json=json_output,
+                stream=stream,
+                on_accepted=header,
+            )
+        
+        if response is None:
+            from .answer import handle_query
+            from .tracing import span
+            
+            header()
+            with span("ask", query=query):
+                response = handle_query(
+                    query=query,
+                    num_results=num_results,
+                    use_web=not no_web,
+                    debug=debug,
+                    as_json=json_output,
+                    llm_provider=llm_provider,
+                    use_cache=not no_cache,
+                    stream=stream,
+                    offline=offline,
+                )
+        if response:
+            print(response)
+        if tracer is not None:
+            _report_trace(tracer, debug, trace)
     except Exception as e:
         if debug:
             raise
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        from rich.console import Console
+        
+        Console().print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+
+def _report_trace(tracer, debug: bool, trace: Optional[Path]) -> None:
+    from rich.console import Console
+    from .answer import print_trace_waterfall
+    from .tracing import write_trace
+    
+    if debug:
+        print_trace_waterfall(tracer)
+    if trace:
+        otlp_path = write_trace(tracer, trace)
+        Console(stderr=True).print(f"[dim]Trace written to {trace} (OTLP: {otlp_path})[/dim]")
+
+
+@app.command()
+def serve(
+    host: Optional[str] = typer.Option(None, "--host", help="Interface to listen on (default: serve.host)"),
+    port: Optional[int] = typer.Option(None, "--port", help="Port to listen on (default: serve.port, 0 picks a free one)"),
+    status: bool = typer.Option(False, "--status", help="Show the status of the running daemon and exit"),
+):
+    """Run a warm background daemon that `ask` forwards queries to."""
+    from rich.console import Console
+    from .client import DaemonUnavailable, daemon_address, daemon_status
+    
+    console = Console()
+    if status:
+        address = daemon_address()
+        try:
+            if address is None:
+                raise DaemonUnavailable("no daemon advertised")
+            info = daemon_status(address)
+        except DaemonUnavailable:
+            console.print("[yellow]No daemon running[/yellow]")
+            raise typer.Exit(1)
+        console.print(f"[green]Daemon running[/green] at {address}")
+        for key, value in info.items():
+            console.print(f"  [cyan]{key}[/cyan]: {value}")
+        return
+    
+    from .config import load_config
+    from .server import serve as run_server
+    
+    config = load_config()
+    run_server(
+        config,
+        host or config.serve.host,
+        config.serve.port if port is None else port,
+        on_ready=lambda address: console.print(f"[green]ask daemon listening on {address}[/green] (Ctrl+C to stop)"),
+    )
+
+
+@app.command()
+def chat(
+    num_results: Optional[int] = typer.Option(None, "--num-results", "-n", help="Number of search results"),
+    no_web: bool = typer.Option(False, "--no-web", help="Skip web search, use LLM only"),
+    debug: bool = typer.Option(False, "--debug", help="Show debug information"),
+    gemini: bool = typer.Option(False, "--gemini", help="Use Gemini LLM (default)"),
+    groq: bool = typer.Option(False, "--groq", help="Use Groq LLM"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the page, search and answer caches"),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Stream answers as they are generated"),
+):
+    """Chat interactively; follow-ups reuse the pages already gathered."""
+    import asyncio
+    from rich.console import Console
+    from .chat import repl
+    from .config import load_config
+    
+    Console().print("[bold magenta]ASK CLI[/bold magenta] [dim]chat - /reset to start over, /exit to leave[/dim]")
+    asyncio.run(repl(
+        load_config(),
+        num_results=num_results,
+        use_web=not no_web,
+        llm_provider="groq" if groq else "gemini" if gemini else None,
+        use_cache=not no_cache,
+        stream=stream,
+        debug=debug,
+    ))
+
+
+@app.command()
+def batch(
+    input_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="Queries, one per line (.txt) or JSONL with a \"query\" field"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="JSONL output file (default: <input>.answers.jsonl)"),
+    num_results: Optional[int] = typer.Option(None, "--num-results", "-n", help="Number of search results"),
+    no_web: bool = typer.Option(False, "--no-web", help="Skip web search, use LLM only"),
+    gemini: bool = typer.Option(False, "--gemini", help="Use Gemini LLM (default)"),
+    groq: bool = typer.Option(False, "--groq", help="Use Groq LLM"),
+    search_concurrency: Optional[int] = typer.Option(None, "--search-concurrency", help="Concurrent searches"),
+    fetch_concurrency: Optional[int] = typer.Option(None, "--fetch-concurrency", help="Concurrent page downloads"),
+    llm_concurrency: Optional[int] = typer.Option(None, "--llm-concurrency", help="Concurrent LLM calls"),
+    restart: bool = typer.Option(False, "--restart", help="Overwrite the output file instead of resuming"),
+    extraction: Optional[ExtractionMode] = typer.Option(None, "--extraction", help="Text extraction mode"),
+):
+    """Answer a file of queries concurrently and write JSONL records."""
+    import asyncio
+    from rich.console import Console
+    from rich.progress import Progress
+    from rich.table import Table
+    from .answer import get_llm_client, get_search_provider
+    from .batch import load_queries, percentile, run_batch
+    from .config import load_config
+    
+    console = Console(stderr=True)
+    config = load_config()
+    if search_concurrency:
+        config.batch.search_concurrency = search_concurrency
+    if fetch_concurrency:
+        config.batch.fetch_concurrency = fetch_concurrency
+    if llm_concurrency:
+        config.batch.llm_concurrency = llm_concurrency
+    if extraction:
+        config.extraction.mode = extraction.value
+    
+    llm_provider = "groq" if groq else "gemini" if gemini else None
+    llm = get_llm_client(config, llm_provider)
+    provider = None if no_web else get_search_provider(config)
+    output = output or input_file.with_suffix(".answers.jsonl")
+    queries = load_queries(input_file)
+    
+    with Progress(console=console) as progress:
+        task = progress.add_task("Answering", total=len(queries))
+        report = asyncio.run(run_batch(
+            queries,
+            output,
+            config,
+            llm,
+            provider=provider,
+            provider_name=llm_provider or config.llm.provider,
+            num_results=num_results,
+            resume=not restart,
+            on_result=lambda record: progress.advance(task),
+        ))
+        progress.update(task, completed=len(queries))
+    
+    table = Table(title="[bold magenta]Stage Latency (s)[/bold magenta]")
+    table.add_column("Stage", style="cyan")
+    for column in ("count", "p50", "p95", "max"):
+        table.add_column(column, justify="right")
+    for stage, values in report.stage_latencies.items():
+        if values:
+            table.add_row(stage, str(len(values)), f"{percentile(values, 50):.2f}",
+                          f"{percentile(values, 95):.2f}", f"{max(values):.2f}")
+    console.print(table)
+    console.print(
+        f"[green]{report.completed} answered[/green], [red]{report.failed} failed[/red], "
+        f"[dim]{report.skipped} already done[/dim] in {report.elapsed_seconds:.1f}s "
+        f"([bold]{report.queries_per_minute:.1f} queries/min[/bold]) -> {output}"
+    )
+    saved = [f"{stats.shared} {stage}" for stage, stats in report.coalesced.items() if stats.shared]
+    if saved:
+        console.print(f"[dim]Shared with identical in-flight work: {', '.join(saved)}[/dim]")
+    if report.compression.steps:
+        ratios = ", ".join(f"{name} {step.ratio:.0%}" for name, step in report.compression.steps.items())
+        console.print(f"[dim]Compression (output/input per step): {ratios}[/dim]")
+    if report.failed:
         raise typer.Exit(1)
 
 
+CACHE_NAMES = ("pages", "search", "answers")
+
+
+def _open_caches(config):
+    from .cache.store import DiskCache
+    from .config import get_cache_dir
+    
+    cache_dir = get_cache_dir(config)
+    return {name: DiskCache(cache_dir / f"{name}.sqlite") for name in CACHE_NAMES}
+
+
+@cache_app.command("stats")
+def cache_stats():
+    """Show cache size and hit/miss counters."""
+    from rich.console import Console
+    from rich.table import Table
+    from .answer import get_page_index
+    from .config import load_config, get_cache_dir
+    
+    config = load_config()
+    console = Console()
+    if not config.behavior.cache_enabled:
+        console.print("[yellow]Cache is disabled (behavior.cache_enabled = false)[/yellow]")
+        return
+    
+    stats = {name: cache.stats() for name, cache in _open_caches(config).items()}
+    index = get_page_index(config)
+    if index is not None:
+        stats["index"] = index.stats()
+    table = Table(title=f"[bold magenta]Cache[/bold magenta] [dim]{get_cache_dir(config)}[/dim]")
+    table.add_column("Metric", style="cyan")
+    for name in stats:
+        table.add_column(name.capitalize(), justify="right")
+    
+    table.add_row("Entries", *(str(s["entries"]) for s in stats.values()))
+    table.add_row("Size", *(f"{s['size_bytes'] / 1024:.1f} KiB" for s in stats.values()))
+    for metric in ("hits", "stale_hits", "similar_hits", "misses", "revalidated", "evictions"):
+        table.add_row(metric.replace("_", " ").capitalize(), *(str(s.get(metric, 0)) for s in stats.values()))
+    console.print(table)
+    console.print(f"[dim]Size cap per cache: {config.cache.max_size_mb} MiB, index: {config.index.max_size_mb} MiB[/dim]")
+
+
+@cache_app.command("clear")
+def cache_clear():
+    """Remove every cached entry and the local page index."""
+    from rich.console import Console
+    from .answer import get_page_index
+    from .config import load_config
+    
+    config = load_config()
+    for cache in _open_caches(config).values():
+        cache.clear()
+    index = get_page_index(config)
+    if index is not None:
+        index.clear()
+    Console().print("[green]Cache cleared[/green]")
+
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -0,0 +1,72 @@
+# Standard library only: forwarding a query to a warm daemon must not pay for
+# importing the LLM, search and extraction dependencies.
+import json
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+STATE_FILE = Path(os.getenv("ASKCLI_SERVE_FILE", Path.home() / ".askcli" / "serve.json"))
+
+
+class DaemonUnavailable(Exception):
+    """No daemon answered; the caller should run the query in-process."""
+
+
+def daemon_address() -> Optional[str]:
+    """Address advertised by a running daemon, if any."""
+    if os.getenv("ASKCLI_NO_DAEMON"):
+        return None
+    try:
+        return json.loads(STATE_FILE.read_text())["address"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def daemon_status(address: str, timeout: float = 2) -> Dict:
+    try:
+        with urllib.request.urlopen(f"{address}/health", timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+        raise DaemonUnavailable(str(e)) from e
+
+
+def ask_daemon(
+    address: str,
+    request: Dict,
+    on_token: Optional[Callable[[str], None]] = None,
+    timeout: float = 300,
+    on_accepted: Optional[Callable[[], None]] = None,
+) -> Dict:
+    """Forward a query to the daemon and return its result event.
+    
+    With ``on_token``, the answer is streamed and each token is passed to it as it
+    arrives. ``on_accepted`` is called once the daemon has accepted the request.
+    Raises ``DaemonUnavailable`` only when the daemon cannot be reached.
+    """
+    body = json.dumps({**request, "stream": on_token is not None}).encode("utf-8")
+    http_request = urllib.request.Request(
+        f"{address}/ask", data=body, headers={"Content-Type": "application/json"}
+    )
+    try:
+        response = urllib.request.urlopen(http_request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get("error", str(e))) from e
+    except (urllib.error.URLError, ConnectionError) as e:
+        raise DaemonUnavailable(str(e)) from e
+    
+    with response:
+        if on_accepted:
+            on_accepted()
+        if on_token is None:
+            return json.loads(response.read())
+        for line in response:
+            event = json.loads(line)
+            if event["type"] == "token":
+                on_token(event["text"])
+            elif event["type"] == "error":
+                raise RuntimeError(event["error"])
+            elif event["type"] == "result":
+                return event
+    raise RuntimeError("Daemon closed the connection without a result")
@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+from .models import CompressionStats, PageContent, Settings
+from .registry import ProviderRegistry
+
+# A step takes the texts of every page gathered for one question (so it can look
+# across pages) plus the [compression] settings, and returns the compressed texts.
+CompressionStep = Callable[[List[str], "Settings.CompressionConfig"], List[str]]
+
+# Patterns that start with a literal are scanned much faster by ``re``
+_SPACE_RUNS = re.compile(r"  [ ]*")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"[.!?:;]\s*$")
+_BOILERPLATE_PHRASE = (
+    r"(we use cookies\b.*|(accept|reject) (all|cookies)|cookie (policy|settings|preferences)"
+    r"|privacy (policy|settings)|terms of (use|service)|(©|copyright\b).*|all rights reserved\.?"
+    r"|subscribe to our newsletter\b.*|subscribe|newsletter|sign (in|up)|log ?in|log out|create an account"
+    r"|advertisement|sponsored|share (this|on \w+)|follow us( on \w+)?|related (articles|posts|stories)"
+    r"|you (may|might) also like|read more|recommended for you|skip to (main )?content|back to top)"
+)
+# A whole (lowercased) line made only of such phrases, e.g. "Skip to content | Sign in"
+_BOILERPLATE = re.compile(rf"\W*{_BOILERPLATE_PHRASE}(\s*[|·•/]?\s*{_BOILERPLATE_PHRASE})*\W*$")
+_CODE_START = re.compile(
+    r"\s*(async|def|class|function|import|from|return|const|let|var|public|private|#include)\b|\s*(//|#!|/\*|\*)"
+)
+
+
+def _collapse(text: str) -> str:
+    text = text.replace("\t", "    ")
+    for space in "\f\v\r\u00a0":
+        if space in text:
+            text = text.replace(space, " ")
+    # Runs of spaces become one, except indentation at the start of a line
+    text = _SPACE_RUNS.sub(lambda m: m.group() if m.start() == 0 or text[m.start() - 1] == "\n" else " ", text)
+    return _BLANK_LINES.sub("\n\n", text.replace(" \n", "\n")).strip()
+
+
+def collapse_whitespace(texts: List[str], options) -> List[str]:
+    """Collapse runs of spaces and blank lines and strip trailing whitespace, keeping indentation."""
+    return [_collapse(text) for text in texts]
+
+
+def drop_repeated_lines(texts: List[str], options) -> List[str]:
+    """Keep only the first occurrence of a line of ``repeated_line_min_chars`` or more that
+    recurs within or across pages (navigation, footers); code and table lines are kept."""
+    limit = options.repeated_line_min_chars
+    seen = set()
+    compressed = []
+    for text in texts:
+        lines = []
+        for line in text.split("\n"):
+            key = line.strip().casefold()
+            if len(key) >= limit and not key.startswith("|") and not _is_code(line):
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+        compressed.append("\n".join(lines))
+    return compressed
+
+
+def drop_boilerplate(texts: List[str], options) -> List[str]:
+    """Drop short lines that read like cookie banners, share buttons or sign-up prompts."""
+    limit = options.boilerplate_max_chars
+    return [
+        "\n".join(line for line in text.split("\n") if len(line) > limit or not _BOILERPLATE.match(line.lower()))
+        for text in texts
+    ]
+
+
+def _is_link_like(line: str, limit: int) -> bool:
+    if line.startswith((" ", "\t")):  # indented: code, not a menu
+        return False
+    stripped = line.strip()
+    if stripped.startswith(("http://", "https://", "www.")):
+        return True
+    # Bullets and table rows are content; menus come out of extraction as bare lines
+    if not stripped or stripped[0] in "-*•·>|+" or stripped[:1].isdigit() or "|" in stripped:
+        return False
+    if "=" in stripped or "(" in stripped:
+        return False
+    # Menu entries, tag clouds and link tables: short, no sentence punctuation
+    return len(stripped) <= limit and not _SENTENCE_END.search(stripped) and stripped.count(" ") < 8
+
+
+def drop_link_lists(texts: List[str], options) -> List[str]:
+    """Drop runs of ``link_list_min_lines`` or more short unpunctuated lines."""
+    compressed = []
+    for text in texts:
+        lines = text.split("\n")
+        keep = [True] * len(lines)
+        start = None
+        for i, line in enumerate(lines + [""]):
+            if i < len(lines) and _is_link_like(line, options.link_line_max_chars):
+                if start is None:
+                    start = i
+                continue
+            if start is not None and i - start >= options.link_list_min_lines:
+                keep[start:i] = [False] * (i - start)
+            start = None
+        compressed.append("\n".join(line for line, kept in zip(lines, keep) if kept).strip("\n"))
+    return compressed
+
+
+def _is_code(line: str) -> bool:
+    return (
+        line.startswith(("    ", "\t"))
+        or line.rstrip().endswith((";", "{", "}"))
+        or _CODE_START.match(line) is not None
+    )
+
+
+def truncate_code(texts: List[str], options) -> List[str]:
+    """Cut code blocks longer than ``code_max_lines`` down to their first lines."""
+    limit = options.code_max_lines
+    compressed = []
+    for text in texts:
+        lines = text.split("\n")
+        result = []
+        block = []
+        for line in lines + [None]:
+            if line is not None and (_is_code(line) or (block and not line.strip())):
+                block.append(line)
+                continue
+            if len(block) > limit:
+                result.extend(block[:limit])
+                result.append(f"[... {len(block) - limit} more lines of code]")
+            else:
+                result.extend(block)
+            block = []
+            if line is not None:
+                result.append(line)
+        compressed.append("\n".join(result))
+    return compressed
+
+
+COMPRESSION_STEPS = ProviderRegistry(
+    "compression",
+    "askcli.compression_steps",
+    {
+        "whitespace": "askcli.compress:collapse_whitespace",
+        "boilerplate": "askcli.compress:drop_boilerplate",
+        "repeated_lines": "askcli.compress:drop_repeated_lines",
+        "link_lists": "askcli.compress:drop_link_lists",
+        "code": "askcli.compress:truncate_code",
+    },
+)
+
+
+class Compressor:
+    """Runs the configured compression steps, in order, over the pages of one question.
+
+    Each step's characters in and out and its time are added to ``stats`` (kept
+    across calls, so a batch run reports totals) and to the ``stats`` passed in.
+    """
+
+    def __init__(self, options: "Settings.CompressionConfig"):
+        self.options = options
+        self.steps = [(name, COMPRESSION_STEPS.load(name)) for name in options.steps]
+        self.stats = CompressionStats()
+        self._lock = threading.Lock()
+
+    def compress(self, pages: List[PageContent], stats: Optional[CompressionStats] = None) -> List[PageContent]:
+        texts = [page.text for page in pages]
+        for name, step in self.steps:
+            before = sum(len(text) for text in texts)
+            started = time.perf_counter()
+            texts = step(texts, self.options)
+            seconds = time.perf_counter() - started
+            after = sum(len(text) for text in texts)
+            with self._lock:
+                for target in (self.stats, stats):
+                    if target is not None:
+                        target.add(name, before, after, seconds)
+        return [
+            page if text == page.text else page.model_copy(update={"text": text})
+            for page, text in zip(pages, texts)
+        ]
+
+
+def get_compressor(config: Settings) -> Optional[Compressor]:
+    """Build the ``[compression]`` pipeline, or return None when it is disabled."""
+    if not config.compression.enabled or not config.compression.steps:
+        return None
+    return Compressor(config.compression)
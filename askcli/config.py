@@ -29,4 +29,12 @@ def load_config() -> Settings:
     if os.getenv("GEMINI_API_KEY"):
         config_data.setdefault("llm", {})["gemini_api_key"] = os.getenv("GEMINI_API_KEY")
     
-    return Settings(**config_data)
\ No newline at end of file
+    return Settings(**config_data)
+
+
+def get_cache_dir(settings: Settings) -> Path:
+    """Resolve the cache directory (``~/.askcli/cache`` unless configured)."""
+    directory = os.getenv("ASKCLI_CACHE_DIR") or settings.cache.directory
+    if directory:
+        return Path(directory).expanduser()
+    return Path.home() / ".askcli" / "cache"
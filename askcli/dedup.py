@@ -0,0 +1,89 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from .cache.keys import normalize_text
+from .models import DedupStats, PageContent, SearchResult
+from .similarity import similarity, simhash
+from .tokens import estimate_tokens
+
+SHINGLE_WORDS = 4
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> List[str]:
+    """Distinct overlapping word ``size``-grams of the normalized text."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return list({" ".join(words[i:i + size]) for i in range(len(words) - size + 1)})
+
+
+def page_fingerprint(text: str) -> int:
+    return simhash(shingles(text))
+
+
+def _paragraph_key(paragraph: str) -> str:
+    return hashlib.blake2b(normalize_text(paragraph).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def dedupe_pages(
+    pages: List[PageContent],
+    page_similarity: float = 0.9,
+    min_paragraph_chars: int = 80,
+    provider: Optional[str] = None,
+) -> Tuple[List[PageContent], Dict[str, List[str]], DedupStats]:
+    """Drop near-duplicate pages and paragraphs repeated across pages.
+
+    ``pages`` are in rank order, so the best-ranked copy of anything is the one kept.
+    Pages whose SimHash over word shingles matches a kept page at ``page_similarity``
+    or more are dropped; paragraphs of at least ``min_paragraph_chars`` that already
+    appeared (after case, punctuation and whitespace folding) are removed. Returns the
+    kept pages, the URLs each kept page absorbed, and what was saved.
+    """
+    stats = DedupStats()
+    duplicates: Dict[str, List[str]] = {}
+    kept: List[Tuple[PageContent, Optional[int]]] = []
+    for page in pages:
+        if not page.text.strip():
+            kept.append((page, None))
+            continue
+        fingerprint = page_fingerprint(page.text)
+        original = next(
+            (
+                other for other, other_fingerprint in kept
+                if other_fingerprint is not None and similarity(fingerprint, other_fingerprint) >= page_similarity
+            ),
+            None,
+        )
+        if original is not None:
+            duplicates.setdefault(original.url, []).append(page.url)
+            stats.pages_dropped += 1
+            stats.tokens_saved += estimate_tokens(page.text, provider)
+            continue
+        kept.append((page, fingerprint))
+
+    seen = set()
+    distinct = []
+    for page, _ in kept:
+        paragraphs = []
+        for paragraph in page.text.split("\n"):
+            if len(paragraph.strip()) >= min_paragraph_chars:
+                key = _paragraph_key(paragraph)
+                if key in seen:
+                    stats.paragraphs_dropped += 1
+                    stats.tokens_saved += estimate_tokens(paragraph, provider)
+                    continue
+                seen.add(key)
+            paragraphs.append(paragraph)
+        text = "\n".join(paragraphs)
+        distinct.append(page if text == page.text else page.model_copy(update={"text": text}))
+    return distinct, duplicates, stats
+
+
+def fold_sources(results: List[SearchResult], duplicates: Dict[str, List[str]]) -> List[SearchResult]:
+    """Drop the results of duplicate pages, listing their URLs on the copy that was kept."""
+    dropped = {url for urls in duplicates.values() for url in urls}
+    return [
+        result.model_copy(update={"duplicates": result.duplicates + duplicates[result.url]})
+        if result.url in duplicates else result
+        for result in results
+        if result.url not in dropped
+    ]
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from .fetcher import extract_main_text
+from .models import FetchStats
+
+EXTRACTION_MODES = ("inline", "thread", "process")
+
+
+def _stop(pool: Executor) -> None:
+    """Shut ``pool`` down without waiting, killing its worker processes if it has any."""
+    kill = getattr(pool, "kill_workers", None)
+    if kill is not None:
+        # Python 3.14+
+        kill()
+    else:
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExtractionExecutor:
+    """Runs ``extract_main_text`` off the event loop so it overlaps with downloads.
+    
+    ``inline`` extracts on the event loop thread, ``thread`` uses a thread pool and
+    ``process`` a process pool that scales across cores for batch workloads. Pages
+    over ``max_html_chars`` are skipped, and extraction taking longer than
+    ``timeout`` seconds is abandoned (the page then yields no text).
+    
+    In ``process`` mode the timeout is hard: the pool holding the stuck worker gets
+    no more work and its workers are killed once its other extractions settle.
+    In ``thread`` mode it is soft: a thread cannot be stopped, so the abandoned
+    extraction keeps its worker busy until it finishes.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = 5.0,
+        max_html_chars: int = 3_000_000,
+        function: Callable[[str], str] = extract_main_text,
+    ):
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode: {mode} (expected one of {', '.join(EXTRACTION_MODES)})")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_html_chars = max_html_chars
+        self.function = function
+        self.skipped = 0
+        self.timed_out = 0
+        self._pool: Optional[Executor] = None
+        self._running: Dict[Executor, int] = {}
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # Forking a process that runs threads (the session's, httpx's) can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="askcli-extract")
+        return self._pool
+
+    def _retire(self, pool: Executor) -> None:
+        if pool is self._pool:
+            self._pool = None
+
+    async def extract(self, html: str, stats: Optional[FetchStats] = None) -> str:
+        stats = stats if stats is not None else FetchStats()
+        if len(html) > self.max_html_chars:
+            self.skipped += 1
+            stats.extractions_skipped += 1
+            return ""
+        if self.mode == "inline":
+            return self.function(html)
+        
+        pool = self._executor()
+        self._running[pool] = self._running.get(pool, 0) + 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, self.function, html)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            stats.extractions_timed_out += 1
+            if self.mode == "process":
+                # The worker is still busy with this page
+                self._retire(pool)
+            return ""
+        except BrokenExecutor:
+            # A worker died (e.g. killed by the OS); start a new pool for the next page
+            self._retire(pool)
+            raise
+        finally:
+            self._running[pool] -= 1
+            if pool is not self._pool and not self._running[pool]:
+                del self._running[pool]
+                _stop(pool)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            if not self._running.get(pool):
+                _stop(pool)
+
+
+_executors: Dict[Tuple, ExtractionExecutor] = {}
+
+
+def get_extractor(config) -> ExtractionExecutor:
+    """Process-wide executor for the configured mode, so pools are reused across queries."""
+    settings = config.extraction
+    key = (settings.mode, settings.max_workers, settings.timeout_seconds, settings.max_html_chars)
+    if key not in _executors:
+        _executors[key] = ExtractionExecutor(
+            mode=settings.mode,
+            max_workers=settings.max_workers,
+            timeout=settings.timeout_seconds,
+            max_html_chars=settings.max_html_chars,
+        )
+    return _executors[key]
@@ -1,16 +1,115 @@
+import asyncio
+import codecs
+import re
 import httpx
 import trafilatura
-from typing import List
-from .models import SearchResult, PageContent
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from .cache.pages import PageCache
+from .models import SearchResult, PageContent, FetchStats, Settings
+from .transport import create_async_client, get_client
+from .tokens import cut_at_boundary
+from .tracing import span
 
+if TYPE_CHECKING:
+    from .extraction import ExtractionExecutor
+    from .singleflight import SingleFlight
 
-def fetch_page(url: str, timeout: int = 10) -> str:
+DEFAULT_MAX_BYTES = 2_000_000
+
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "application/xml", "text/xml")
+
+# Leading bytes of common binary formats served under misleading content types
+BINARY_SIGNATURES = (
+    b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"RIFF", b"OggS",
+    b"ID3", b"\x1a\x45\xdf\xa3", b"\x1f\x8b", b"7z\xbc\xaf", b"Rar!",
+)
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class _BodyReader:
+    """Incrementally decodes a streamed response body, giving up early on binary
+    or unsupported content and stopping at ``max_bytes``."""
+
+    def __init__(self, response: httpx.Response, max_bytes: int, stats: FetchStats):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.stats = stats
+        self.received = 0
+        self.parts: List[str] = []
+        self.decoder = None
+        try:
+            self.declared = int(response.headers.get("content-length", ""))
+        except ValueError:
+            self.declared = None
+
+    def accept_headers(self) -> bool:
+        content_type = self.response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in TEXT_CONTENT_TYPES:
+            self._skip()
+            return False
+        return True
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a chunk; returns False once the rest of the body is not wanted."""
+        if self.decoder is None:
+            if chunk.startswith(BINARY_SIGNATURES) or b"\x00" in chunk[:1024]:
+                self.received += len(chunk)
+                self._skip()
+                return False
+            encoding = self.response.charset_encoding or self._sniff_charset(chunk) or "utf-8"
+            try:
+                self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            except LookupError:
+                self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        
+        chunk = chunk[:self.max_bytes - self.received]
+        self.received += len(chunk)
+        self.parts.append(self.decoder.decode(chunk))
+        if self.received >= self.max_bytes:
+            self.stats.pages_truncated += 1
+            if self.declared:
+                self.stats.bytes_skipped += max(0, self.declared - self.received)
+            return False
+        return True
+
+    def finish(self) -> str:
+        self.stats.bytes_fetched += self.received
+        if self.decoder is None:
+            return ""
+        self.stats.pages_fetched += 1
+        self.parts.append(self.decoder.decode(b"", final=True))
+        return "".join(self.parts)
+
+    def _skip(self) -> None:
+        self.stats.pages_skipped += 1
+        if self.declared:
+            self.stats.bytes_skipped += max(0, self.declared - self.received)
+
+    @staticmethod
+    def _sniff_charset(chunk: bytes) -> Optional[str]:
+        match = _META_CHARSET.search(chunk[:4096])
+        return match.group(1).decode("ascii") if match else None
+
+
+def fetch_page(
+    url: str,
+    timeout: int = 10,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+) -> str:
     """Fetch HTML content from URL."""
+    stats = stats if stats is not None else FetchStats()
     try:
-        with httpx.Client() as client:
-            response = client.get(url, timeout=timeout, follow_redirects=True)
+        with get_client().stream("GET", url, timeout=timeout) as response:
             response.raise_for_status()
-            return response.text
+            reader = _BodyReader(response, max_bytes, stats)
+            if not reader.accept_headers():
+                return ""
+            for chunk in response.iter_bytes():
+                if not reader.feed(chunk):
+                    break
+            return reader.finish()
     except Exception:
         return ""
 
@@ -27,24 +126,296 @@ def get_page_content(result: SearchResult, max_chars: int = 4000) -> PageContent
     if not html:
         return PageContent(url=result.url, title=result.title, text="")
     
-    text = extract_main_text(html)[:max_chars]
+    text = cut_at_boundary(extract_main_text(html), max_chars)
     return PageContent(url=result.url, title=result.title, text=text)
 
 
-def gather_context(results: List[SearchResult], max_total_chars: int = 12000) -> List[PageContent]:
-    """Gather and combine content from search results."""
+async def _request_page(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: float = 10,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+) -> Tuple[int, str, Dict[str, str]]:
+    """Stream ``url`` and return (status, html, headers); status 0 means the fetch
+    failed or the body was skipped as binary / unsupported.
+    
+    ``timeout`` bounds the whole request; the client's own timeouts bound the
+    connect and each read.
+    """
+    stats = stats if stats is not None else FetchStats()
+    try:
+        async with asyncio.timeout(timeout):
+            async with client.stream("GET", url, follow_redirects=True, headers=headers) as response:
+                if response.status_code == 304:
+                    return 304, "", dict(response.headers)
+                response.raise_for_status()
+                reader = _BodyReader(response, max_bytes, stats)
+                if not reader.accept_headers():
+                    return 0, "", {}
+                async for chunk in response.aiter_bytes():
+                    if not reader.feed(chunk):
+                        break
+                html = reader.finish()
+                return (response.status_code if html else 0), html, dict(response.headers)
+    except Exception:
+        return 0, "", {}
+
+
+async def fetch_page_async(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: float = 10,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+) -> str:
+    """Fetch HTML content from URL using a shared async client."""
+    _, html, _ = await _request_page(client, url, timeout=timeout, max_bytes=max_bytes, stats=stats)
+    return html
+
+
+async def get_page_content_async(
+    client: httpx.AsyncClient,
+    result: SearchResult,
+    max_chars: int = 4000,
+    timeout: float = 10,
+    cache: Optional[PageCache] = None,
+    extractor: Optional["ExtractionExecutor"] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+) -> PageContent:
+    """Get clean text content from a search result using a shared async client.
+    
+    With a ``cache``, fresh entries skip both the download and the extraction, and
+    stale entries are revalidated with ETag / Last-Modified. An ``extractor`` moves
+    extraction off the event loop; without one it runs inline. Cache reads and
+    writes (SQLite, zlib) run on worker threads so they never stall other fetches.
+    """
+    with span("fetch", url=result.url) as stage:
+        cached = await asyncio.to_thread(cache.get, result.url) if cache else None
+        if cached and cache.is_fresh(cached):
+            await asyncio.to_thread(cache.record, True)
+            stage.set(cache="fresh")
+            return PageContent(url=result.url, title=result.title, text=cut_at_boundary(cached.text, max_chars))
+        
+        validators = cached.validators() if cached else None
+        with span("download") as download:
+            status, html, headers = await _request_page(
+                client, result.url, timeout=timeout, headers=validators, max_bytes=max_bytes, stats=stats
+            )
+            download.set(status=status, chars=len(html))
+        
+        if status == 304 and cached:
+            await asyncio.to_thread(cache.revalidated, cached, headers)
+            await asyncio.to_thread(cache.record, True)
+            stage.set(cache="revalidated")
+            return PageContent(url=result.url, title=result.title, text=cut_at_boundary(cached.text, max_chars))
+        
+        if not html and cached:
+            # Revalidation failed (network error, 5xx): the stale copy beats no page
+            await asyncio.to_thread(cache.record, True)
+            stage.set(cache="stale")
+            return PageContent(url=result.url, title=result.title, text=cut_at_boundary(cached.text, max_chars))
+        
+        if cache:
+            await asyncio.to_thread(cache.record, False)
+        if not html:
+            return PageContent(url=result.url, title=result.title, text="")
+        
+        with span("extract", html_chars=len(html)) as extract:
+            try:
+                text = await extractor.extract(html, stats) if extractor else extract_main_text(html)
+            except Exception:
+                text = ""
+            extract.set(text_chars=len(text))
+        if cache and text:
+            await asyncio.to_thread(cache.put, result.url, html, text, headers)
+        return PageContent(url=result.url, title=result.title, text=cut_at_boundary(text, max_chars))
+
+
+async def gather_context_async(
+    results: List[SearchResult],
+    max_total_chars: int = 12000,
+    concurrency: int = 4,
+    deadline: Optional[float] = None,
+    page_timeout: float = 10,
+    client: Optional[httpx.AsyncClient] = None,
+    cache: Optional[PageCache] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_page_chars: int = 4000,
+    extractor: Optional["ExtractionExecutor"] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+    accept: Optional[int] = None,
+    config: Optional[Settings] = None,
+    flight: Optional["SingleFlight"] = None,
+) -> List[PageContent]:
+    """Fetch all results concurrently and combine them in their original rank order.
+    
+    Pages are accepted in rank order until the character budget is filled, at which
+    point outstanding downloads are cancelled. When ``deadline`` (seconds) passes,
+    pages that have not finished yet are dropped and the ones already fetched are kept.
+    A shared ``semaphore`` caps downloads across several concurrent calls, and a shared
+    ``flight`` makes concurrent calls wanting the same URL download it once.
+    
+    Without a ``client`` one is opened from ``config``'s transport settings.
+    
+    With ``accept`` the gather is hedged: ``results`` holds more candidates than
+    needed, the first ``accept`` pages with text win regardless of rank, and the
+    slower downloads are cancelled.
+    """
+    if not results:
+        return []
+    
+    if client is None:
+        async with create_async_client(config or Settings(), max_connections=concurrency) as owned_client:
+            return await gather_context_async(
+                results,
+                max_total_chars=max_total_chars,
+                concurrency=concurrency,
+                deadline=deadline,
+                page_timeout=page_timeout,
+                client=owned_client,
+                cache=cache,
+                semaphore=semaphore,
+                max_page_chars=max_page_chars,
+                extractor=extractor,
+                max_bytes=max_bytes,
+                stats=stats,
+                accept=accept,
+                flight=flight,
+            )
+    
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def download(result: SearchResult) -> PageContent:
+        async with semaphore:
+            return await get_page_content_async(
+                client,
+                result,
+                max_chars=max_page_chars,
+                timeout=page_timeout,
+                cache=cache,
+                extractor=extractor,
+                max_bytes=max_bytes,
+                stats=stats,
+            )
+    
+    async def worker(result: SearchResult) -> PageContent:
+        if flight is None:
+            return await download(result)
+        # Waiters don't hold a download slot; the page keeps the first caller's title
+        page = await flight.do((result.url, max_page_chars), lambda: download(result))
+        return page.model_copy(update={"title": result.title}) if page.title != result.title else page
+    
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline if deadline else None
+    tasks = [asyncio.create_task(worker(result)) for result in results]
+    
+    if accept:
+        try:
+            pages = await _first_pages(tasks, accept, lambda: _remaining(loop, expires_at))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return _fill_budget(pages, max_total_chars)
+    
     contents = []
     used_chars = 0
+    try:
+        for task in tasks:
+            if not task.done():
+                await asyncio.wait({task}, timeout=_remaining(loop, expires_at))
+                if not task.done():
+                    # Deadline passed; keep scanning for pages that already finished
+                    continue
+            
+            page = task.result()
+            if not page.text:
+                continue
+            
+            if used_chars + len(page.text) > max_total_chars:
+                # Keep what fits of this page, then the budget is filled
+                text = cut_at_boundary(page.text, max_total_chars - used_chars)
+                if text:
+                    contents.append(page.model_copy(update={"text": text}))
+                break
+            
+            contents.append(page)
+            used_chars += len(page.text)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
-    for result in results:
-        page = get_page_content(result)
-        if not page.text:
-            continue
-        
+    return contents
+
+
+def _remaining(loop: asyncio.AbstractEventLoop, expires_at: Optional[float]) -> Optional[float]:
+    return None if expires_at is None else max(0.0, expires_at - loop.time())
+
+
+async def _first_pages(tasks: List["asyncio.Task[PageContent]"], accept: int, remaining) -> List[PageContent]:
+    """Wait for the first ``accept`` tasks to yield text; returns them in rank order."""
+    accepted: Dict["asyncio.Task[PageContent]", PageContent] = {}
+    pending = set(tasks)
+    while pending and len(accepted) < accept:
+        done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            break
+        for task in done:
+            page = task.result()
+            if page.text:
+                accepted[task] = page
+    # Several downloads can finish together; keep the best-ranked of them
+    return [accepted[task] for task in tasks if task in accepted][:accept]
+
+
+def _fill_budget(pages: List[PageContent], max_total_chars: int) -> List[PageContent]:
+    contents = []
+    used_chars = 0
+    for page in pages:
         if used_chars + len(page.text) > max_total_chars:
+            text = cut_at_boundary(page.text, max_total_chars - used_chars)
+            if text:
+                contents.append(page.model_copy(update={"text": text}))
             break
-            
         contents.append(page)
         used_chars += len(page.text)
-    
-    return contents
\ No newline at end of file
+    return contents
+
+
+def gather_context(
+    results: List[SearchResult],
+    max_total_chars: int = 12000,
+    concurrency: int = 4,
+    deadline: Optional[float] = None,
+    page_timeout: float = 10,
+    cache: Optional[PageCache] = None,
+    max_page_chars: int = 4000,
+    extractor: Optional["ExtractionExecutor"] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stats: Optional[FetchStats] = None,
+    accept: Optional[int] = None,
+    config: Optional[Settings] = None,
+) -> List[PageContent]:
+    """Gather and combine content from search results."""
+    return asyncio.run(
+        gather_context_async(
+            results,
+            max_total_chars=max_total_chars,
+            concurrency=concurrency,
+            deadline=deadline,
+            page_timeout=page_timeout,
+            cache=cache,
+            max_page_chars=max_page_chars,
+            extractor=extractor,
+            max_bytes=max_bytes,
+            stats=stats,
+            accept=accept,
+            config=config,
+        )
+    )
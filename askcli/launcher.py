@@ -0,0 +1,138 @@
+# Entry point of the `ask` script. Standard library only until a query turns out not
+# to be for a running daemon: forwarding one must not pay for importing typer, Rich
+# or the pipeline.
+import json
+import sys
+from typing import Callable, List, Optional, Tuple
+
+# Subcommands of the full CLI; a question that is exactly one of these needs `--`
+SUBCOMMANDS = ("main", "serve", "chat", "batch", "cache")
+
+_FLAGS = {
+    "--no-web": ("use_web", False),
+    "--no-cache": ("use_cache", False),
+    "--offline": ("offline", True),
+    "--groq": ("llm_provider", "groq"),
+    "--gemini": ("llm_provider", "gemini"),
+    "--json": ("json", True),
+    "--stream": ("stream", True),
+    "--no-stream": ("stream", False),
+}
+
+
+def parse_question(args: List[str]) -> Optional[Tuple[dict, bool, bool]]:
+    """``(request, as_json, stream)`` for a plain ``ask "question"`` command line, or None
+    when it needs the full CLI (a subcommand, --help, --debug, --trace, --no-daemon...)."""
+    options = {"use_web": True, "use_cache": True, "offline": False, "llm_provider": None, "num_results": None}
+    query = None
+    positional_only = False
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if positional_only or not arg.startswith("-") or arg == "-":
+            if query is not None or (not positional_only and arg in SUBCOMMANDS):
+                return None
+            query = arg
+        elif arg == "--":
+            positional_only = True
+        elif arg in _FLAGS:
+            name, value = _FLAGS[arg]
+            # --groq wins over --gemini, as in the full CLI
+            if name != "llm_provider" or options.get(name) != "groq":
+                options[name] = value
+        elif arg in ("-n", "--num-results") or arg.startswith(("-n", "--num-results=")):
+            if arg in ("-n", "--num-results"):
+                value = args.pop(0) if args else ""
+            else:
+                value = arg.partition("=")[2] if arg.startswith("--") else arg[2:]
+            if not value.isdigit():
+                return None
+            options["num_results"] = int(value)
+        else:
+            return None
+    if query is None:
+        return None
+    as_json = options.pop("json", False)
+    stream = options.pop("stream", not as_json)
+    return {"query": query, **options}, as_json, stream
+
+
+def ask_via_daemon(
+    request: dict, as_json: bool, stream: bool, on_accepted: Optional[Callable[[], None]] = None
+) -> Optional[str]:
+    """Forward a query to a running daemon; None means run it in-process instead.
+    
+    ``on_accepted`` runs once the daemon has taken the query, so output set-up (and
+    Rich's import) overlaps with the daemon's work.
+    """
+    from .client import DaemonUnavailable, ask_daemon, daemon_address
+    
+    address = daemon_address()
+    if address is None:
+        return None
+    
+    renderer = None
+    
+    def accepted() -> None:
+        nonlocal renderer
+        if on_accepted:
+            on_accepted()
+        if stream and not as_json:
+            from .render import StreamingRenderer
+            
+            renderer = StreamingRenderer(status=f"Asking {request['llm_provider'] or 'LLM'}...").__enter__()
+    
+    def on_token(chunk: str) -> None:
+        if as_json:
+            print(json.dumps({"type": "token", "text": chunk}), flush=True)
+        else:
+            renderer.feed(chunk)
+    
+    try:
+        result = ask_daemon(address, request, on_token=on_token if stream else None, on_accepted=accepted)
+    except DaemonUnavailable:
+        return None
+    finally:
+        if renderer is not None:
+            renderer.close()
+    
+    answer = {"answer": result["answer"], "sources": result["sources"]}
+    if stream and as_json:
+        return json.dumps({"type": "answer", **answer})
+    if as_json:
+        return json.dumps(answer, indent=2)
+    if result["streamed"] and stream:
+        return ""
+    
+    from .render import render_markdown_to_terminal
+    
+    return render_markdown_to_terminal(result["answer"])
+
+
+def run() -> None:
+    """``ask``: forward a plain question to a running daemon, else start the full CLI."""
+    parsed = parse_question(sys.argv[1:])
+    if parsed is not None:
+        request, as_json, stream = parsed
+        
+        def header() -> None:
+            if not as_json:
+                from .render import print_header
+                
+                print_header(request["llm_provider"], request["offline"], request["use_web"])
+        
+        try:
+            response = ask_via_daemon(request, as_json, stream, on_accepted=header)
+        except Exception as e:
+            from rich.console import Console
+            
+            Console().print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+        if response is not None:
+            if response:
+                print(response)
+            return
+    
+    from .cli import app
+    
+    app()
@@ -1,6 +1,17 @@
-from typing import Protocol
+from typing import Iterator, Protocol
+
+
+class LLMError(Exception):
+    """A provider failed to produce an answer."""
+
+    def __init__(self, message: str, provider: str = ""):
+        super().__init__(message)
+        self.provider = provider
 
 
 class LLMClient(Protocol):
     def answer(self, system: str, user: str) -> str:
-        ...
\ No newline at end of file
+        ...
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        ...
@@ -0,0 +1,250 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..ratelimit import rate_limit_delay
+from ..tracing import span
+from .base import LLMClient, LLMError
+
+ROUTING_MODES = ("fallback", "race")
+
+_DONE = object()
+
+
+class CircuitBreaker:
+    """Tracks one provider's health.
+
+    After ``failures`` consecutive errors (or answers slower than ``slow_seconds``)
+    the breaker opens and the provider is skipped for ``cooldown`` seconds. Then a
+    single trial call is let through (other calls skip the provider meanwhile) that
+    either closes it again or reopens it.
+    """
+
+    def __init__(
+        self,
+        failures: int = 3,
+        cooldown: float = 60.0,
+        slow_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failures = max(1, failures)
+        self.cooldown = cooldown
+        self.slow_seconds = slow_seconds
+        self.clock = clock
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def _trial_running(self) -> bool:
+        # A trial whose outcome never came back (e.g. an abandoned stream) expires
+        return self.trial_started is not None and self.clock() - self.trial_started < self.cooldown
+
+    def available(self) -> bool:
+        """Whether ``allow`` would let a call through now."""
+        state = self.state
+        return state == "closed" or (state == "half-open" and not self._trial_running())
+
+    def allow(self) -> bool:
+        """Let a call through: always when closed, and as the one trial when half-open."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "open" or self._trial_running():
+                return False
+            self.trial_started = self.clock()
+            return True
+
+    def release(self) -> None:
+        """End a trial call without a verdict on the provider's health."""
+        with self._lock:
+            self.trial_started = None
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        if self.slow_seconds is not None and seconds > self.slow_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+            self.trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            self.trial_started = None
+            if self.consecutive >= self.failures:
+                self.opened_at = self.clock()
+
+
+class CompositeLLMClient:
+    """Spreads each request over several providers.
+
+    ``fallback`` tries providers in order until one answers; ``race`` sends the
+    request to all of them, keeps the first to produce output and abandons the rest.
+    Providers whose circuit breaker is open are skipped unless every one is open.
+    Rate-limited providers are failed over without counting against their breaker.
+    
+    A race loser that is streaming stops at its next chunk, but a losing
+    ``answer`` call cannot be interrupted: it runs to completion on its thread and
+    still uses that provider's quota. Prefer ``stream`` with ``race``.
+    """
+
+    def __init__(
+        self,
+        clients: List[Tuple[str, LLMClient]],
+        mode: str = "fallback",
+        failures: int = 3,
+        cooldown: float = 60.0,
+        slow_seconds: Optional[float] = None,
+    ):
+        if not clients:
+            raise ValueError("CompositeLLMClient needs at least one provider")
+        if mode not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode: {mode} (expected one of {', '.join(ROUTING_MODES)})")
+        self.clients = clients
+        self.mode = mode
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(failures, cooldown, slow_seconds) for name, _ in clients
+        }
+        self.model_name = "+".join(getattr(client, "model_name", name) for name, client in clients)
+        self.last_provider: Optional[str] = None
+
+    def answer(self, system: str, user: str) -> str:
+        return "".join(self._route(lambda client: iter([client.answer(system, user)])))
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        return self._route(lambda client: client.stream(system, user))
+
+    def _candidates(self) -> Tuple[List[Tuple[str, LLMClient]], bool]:
+        """Providers to try, and whether they are forced through because none is available."""
+        healthy = [(name, client) for name, client in self.clients if self.breakers[name].available()]
+        return (healthy, False) if healthy else (list(self.clients), True)
+
+    def _route(self, call: Callable[[LLMClient], Iterator[str]]) -> Iterator[str]:
+        candidates, forced = self._candidates()
+        if self.mode == "race" and len(candidates) > 1:
+            if not forced:
+                # Each half-open provider takes its trial now; lost trials leave the race
+                trials = [(name, client) for name, client in candidates if self.breakers[name].allow()]
+                candidates = trials or candidates
+            return self._race(candidates, call)
+        return self._fallback(candidates, call, forced)
+
+    def _fallback(self, candidates, call, forced: bool = False) -> Iterator[str]:
+        errors = []
+        last_error = None
+        attempts = [(name, client, forced) for name, client in candidates]
+        for name, client, force in attempts:
+            breaker = self.breakers[name]
+            if not force and not breaker.allow():
+                # Another call is trying this half-open provider; only a last resort here
+                attempts.append((name, client, True))
+                continue
+            started = time.monotonic()
+            produced = False
+            try:
+                # The span covers the wait for the first chunk, where fallbacks spend their time
+                with span("llm.attempt", provider=name, breaker=breaker.state):
+                    chunks = call(client)
+                    first = next(chunks, None)
+                if first is None:
+                    raise LLMError(f"No response generated from {name}", name)
+                produced = True
+                self.last_provider = name
+                yield first
+                for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                if rate_limit_delay(e) is None:
+                    breaker.record_failure()
+                else:
+                    # A rate limit (or local pacing) says nothing about the provider's health
+                    breaker.release()
+                if produced:
+                    # Part of the answer is already out; another provider cannot continue it
+                    raise LLMError(f"{name} failed mid-answer - {e}", name) from e
+                errors.append(f"{name}: {e}")
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - started)
+            return
+        # Chained so callers can tell e.g. a rate limit from an outage
+        raise LLMError("All LLM providers failed - " + "; ".join(errors)) from last_error
+
+    def _race(self, candidates, call) -> Iterator[str]:
+        events: "queue.Queue" = queue.Queue()
+        race = {"winner": None}
+        stop = threading.Event()
+        for name, client in candidates:
+            threading.Thread(
+                target=self._run, args=(name, client, call, events, race, stop), daemon=True
+            ).start()
+
+        errors = []
+        last_error = None
+        remaining = len(candidates)
+        try:
+            while remaining:
+                name, chunk, error = events.get()
+                winner = race["winner"]
+                if winner is not None and name != winner:
+                    continue
+                if error is not None:
+                    if winner == name:
+                        raise LLMError(f"{name} failed mid-answer - {error}", name) from error
+                    errors.append(f"{name}: {error}")
+                    last_error = error
+                    remaining -= 1
+                    continue
+                if chunk is _DONE:
+                    return
+                if winner is None:
+                    race["winner"] = name
+                    self.last_provider = name
+                yield chunk
+            raise LLMError("All LLM providers failed - " + "; ".join(errors)) from last_error
+        finally:
+            stop.set()
+
+    def _run(self, name, client, call, events, race, stop) -> None:
+        breaker = self.breakers[name]
+        started = time.monotonic()
+        produced = False
+        chunks = None
+        try:
+            chunks = call(client)
+            for chunk in chunks:
+                if stop.is_set() or race["winner"] not in (None, name):
+                    # Lost the race; the provider's outcome says nothing about its health
+                    breaker.release()
+                    return
+                produced = True
+                events.put((name, chunk, None))
+            if not produced:
+                raise LLMError(f"No response generated from {name}", name)
+        except Exception as e:
+            if rate_limit_delay(e) is None:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            events.put((name, None, e))
+            return
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        breaker.record_success(time.monotonic() - started)
+        events.put((name, _DONE, None))
@@ -1,23 +1,41 @@
 import os
+from typing import Iterator
 import google.generativeai as genai
-from .base import LLMClient
+from ..tracing import span
+from .base import LLMClient, LLMError
 
 
 class GeminiClient:
-    def __init__(self, model: str = "gemini-2.5-flash-lite"):
+    def __init__(self, model: str = "gemini-2.5-flash-lite", max_tokens: int = 2000):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model)
+        self.model_name = model
+        self.model = genai.GenerativeModel(model, generation_config={"max_output_tokens": max_tokens})
 
     def answer(self, system: str, user: str) -> str:
         try:
             prompt = f"{system}\n\n{user}"
-            response = self.model.generate_content(prompt)
-            if hasattr(response, 'text') and response.text:
-                return response.text
-            else:
-                return "Error: No response generated from Gemini API"
+            with span("gemini.answer", model=self.model_name):
+                response = self.model.generate_content(prompt)
+            text = response.text if hasattr(response, 'text') else ""
         except Exception as e:
-            return f"Error: Gemini API failed - {str(e)}"
\ No newline at end of file
+            raise LLMError(f"Gemini API failed - {str(e)}", "gemini") from e
+        if not text:
+            raise LLMError("No response generated from Gemini API", "gemini")
+        return text
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        try:
+            prompt = f"{system}\n\n{user}"
+            produced = False
+            for chunk in self.model.generate_content(prompt, stream=True):
+                text = getattr(chunk, 'text', '')
+                if text:
+                    produced = True
+                    yield text
+        except Exception as e:
+            raise LLMError(f"Gemini API failed - {str(e)}", "gemini") from e
+        if not produced:
+            raise LLMError("No response generated from Gemini API", "gemini")
@@ -1,24 +1,57 @@
 import os
+from typing import Iterator
 from groq import Groq
-from .base import LLMClient
+from ..tracing import span
+from ..transport import get_api_client
+from .base import LLMClient, LLMError
 
 
 class GroqClient:
-    def __init__(self, model: str = "qwen/qwen3-32b"):
+    def __init__(self, model: str = "qwen/qwen3-32b", max_tokens: int = 2000):
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable is required")
-        self.client = Groq(api_key=api_key)
+        http_client = get_api_client()
+        self.client = Groq(api_key=api_key, http_client=http_client, timeout=http_client.timeout)
         self.model = model
+        self.model_name = model
+        self.max_tokens = max_tokens
 
     def answer(self, system: str, user: str) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user}
-            ],
-            temperature=0.1,
-            max_tokens=2000
-        )
-        return response.choices[0].message.content
\ No newline at end of file
+        try:
+            with span("groq.answer", model=self.model):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": user}
+                    ],
+                    temperature=0.1,
+                    max_tokens=self.max_tokens
+                )
+        except Exception as e:
+            raise LLMError(f"Groq API failed - {str(e)}", "groq") from e
+        text = response.choices[0].message.content if response.choices else ""
+        if not text:
+            raise LLMError("No response generated from Groq API", "groq")
+        return text
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        try:
+            # Covers the request up to the response headers; token timing is traced by the caller
+            with span("groq.stream_open", model=self.model):
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": user}
+                    ],
+                    temperature=0.1,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise LLMError(f"Groq API failed - {str(e)}", "groq") from e
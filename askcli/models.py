@@ -1,11 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class SearchResult(BaseModel):
     title: str
     url: str
     snippet: Optional[str] = None
+    duplicates: List[str] = []
 
 
 class PageContent(BaseModel):
@@ -14,21 +15,211 @@ class PageContent(BaseModel):
     text: str
 
 
+class FetchStats(BaseModel):
+    pages_fetched: int = 0
+    pages_skipped: int = 0
+    pages_truncated: int = 0
+    bytes_fetched: int = 0
+    bytes_skipped: int = 0
+    extractions_skipped: int = 0
+    extractions_timed_out: int = 0
+
+
+class TransportStats(BaseModel):
+    requests: int = 0
+    connections_opened: int = 0
+    dns_lookups: int = 0
+    dns_cache_hits: int = 0
+
+
+class DedupStats(BaseModel):
+    pages_dropped: int = 0
+    paragraphs_dropped: int = 0
+    tokens_saved: int = 0
+
+
+class StepStats(BaseModel):
+    chars_in: int = 0
+    chars_out: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Output size as a share of the input (lower is more compression)."""
+        return self.chars_out / self.chars_in if self.chars_in else 1.0
+
+
+class CompressionStats(BaseModel):
+    steps: Dict[str, StepStats] = {}
+
+    def add(self, step: str, chars_in: int, chars_out: int, seconds: float) -> None:
+        stats = self.steps.setdefault(step, StepStats())
+        stats.chars_in += chars_in
+        stats.chars_out += chars_out
+        stats.seconds += seconds
+
+
+class FlightStats(BaseModel):
+    """Single-flight counters: calls that did the work and calls that shared it."""
+    executed: int = 0
+    shared: int = 0
+
+
+class QueryOutcome(BaseModel):
+    query: str = ""
+    answer: str = ""
+    search_results: List[SearchResult] = []
+    pages: List[PageContent] = []
+    cache_status: Optional[str] = None
+    streamed: bool = False
+    fetch_stats: FetchStats = FetchStats()
+    dedup_stats: DedupStats = DedupStats()
+    compression_stats: CompressionStats = CompressionStats()
+    timings: Dict[str, float] = {}
+    context_reused: bool = False
+    local_index: bool = False
+
+    @property
+    def sources(self) -> List[SearchResult]:
+        return self.search_results
+
+
+class ChatTurn(BaseModel):
+    question: str
+    answer: str
+    sources: List[SearchResult] = []
+
+
+class AskEvent(BaseModel):
+    """Progress of one ask: ``search``, ``context``, ``token``, ``warning``, ``waiting`` or ``result``."""
+    type: str
+    text: str = ""
+    outcome: Optional[QueryOutcome] = None
+
+
 class Settings(BaseModel):
     class SearchConfig(BaseModel):
         provider: str = "duckduckgo"
         num_results: int = 4
+        backends: List[str] = []
+        deadline_seconds: float = 5.0
+        deadlines: Dict[str, float] = {}
+        min_backends: int = 2
+        rrf_k: int = 60
+        searxng_url: str = "http://localhost:8888"
 
     class LLMConfig(BaseModel):
         provider: str = "gemini"
         model: str = "gemini-2.5-flash-lite"
         max_context_tokens: int = 8000
+        answer_tokens: int = 2000
+        timeout_seconds: float = 60.0
+        providers: List[str] = []
+        routing: str = "fallback"
+        breaker_failures: int = 3
+        breaker_cooldown_seconds: float = 60.0
+        slow_seconds: Optional[float] = None
+
+    class RateLimitConfig(BaseModel):
+        enabled: bool = True
+        requests_per_minute: Dict[str, float] = {}
+        burst: int = 3
+        max_retries: int = 4
+        backoff_base_seconds: float = 1.0
+        backoff_max_seconds: float = 60.0
+        max_wait_seconds: float = 300.0
 
     class BehaviorConfig(BaseModel):
         use_web_by_default: bool = True
         timeout_seconds: int = 20
         cache_enabled: bool = True
 
+    class FetchConfig(BaseModel):
+        max_concurrency: int = 4
+        page_timeout_seconds: int = 10
+        max_bytes: int = 2_000_000
+        hedged: bool = False
+        accept_pages: Optional[int] = None
+        overfetch_factor: float = 2.0
+        hedge_deadline_seconds: float = 6.0
+
+    class TransportConfig(BaseModel):
+        http2: bool = True
+        max_connections: int = 32
+        max_connections_per_host: int = 6
+        keepalive_expiry_seconds: float = 30.0
+        dns_ttl_seconds: float = 300.0
+        connect_timeout_seconds: float = 5.0
+        read_timeout_seconds: float = 10.0
+
+    class ExtractionConfig(BaseModel):
+        mode: str = "thread"
+        max_workers: Optional[int] = None
+        timeout_seconds: float = 5.0
+        max_html_chars: int = 3_000_000
+
+    class RetrievalConfig(BaseModel):
+        enabled: bool = True
+        top_k: int = 12
+        passage_chars: int = 600
+
+    class IndexConfig(BaseModel):
+        enabled: bool = True
+        min_score: float = 0.8
+        min_pages: int = 2
+        max_age_days: float = 30
+        max_size_mb: int = 100
+
+    class CompressionConfig(BaseModel):
+        enabled: bool = True
+        steps: List[str] = ["whitespace"]
+        boilerplate_max_chars: int = 200
+        repeated_line_min_chars: int = 20
+        link_line_max_chars: int = 60
+        link_list_min_lines: int = 3
+        code_max_lines: int = 30
+
+    class DedupConfig(BaseModel):
+        enabled: bool = True
+        page_similarity: float = 0.9
+        min_paragraph_chars: int = 80
+
+    class CacheConfig(BaseModel):
+        directory: Optional[str] = None
+        page_ttl_seconds: int = 86400
+        search_ttl_seconds: int = 3600
+        search_stale_seconds: int = 86400
+        answer_ttl_seconds: int = 86400
+        similar_answers: bool = False
+        similarity_threshold: float = 0.9
+        similar_max_age_seconds: int = 3600
+        max_size_mb: int = 200
+
+    class BatchConfig(BaseModel):
+        search_concurrency: int = 4
+        fetch_concurrency: int = 16
+        llm_concurrency: int = 4
+
+    class ChatConfig(BaseModel):
+        reuse_coverage: float = 0.6
+        history_share: float = 0.3
+
+    class ServeConfig(BaseModel):
+        host: str = "127.0.0.1"
+        port: int = 8765
+
     search: SearchConfig = SearchConfig()
     llm: LLMConfig = LLMConfig()
-    behavior: BehaviorConfig = BehaviorConfig()
\ No newline at end of file
+    ratelimit: RateLimitConfig = RateLimitConfig()
+    behavior: BehaviorConfig = BehaviorConfig()
+    fetch: FetchConfig = FetchConfig()
+    transport: TransportConfig = TransportConfig()
+    extraction: ExtractionConfig = ExtractionConfig()
+    retrieval: RetrievalConfig = RetrievalConfig()
+    compression: CompressionConfig = CompressionConfig()
+    dedup: DedupConfig = DedupConfig()
+    cache: CacheConfig = CacheConfig()
+    index: IndexConfig = IndexConfig()
+    batch: BatchConfig = BatchConfig()
+    chat: ChatConfig = ChatConfig()
+    serve: ServeConfig = ServeConfig()
\ No newline at end of file
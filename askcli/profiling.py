@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from typing import List
+from pydantic import BaseModel
+
+
+class ImportTiming(BaseModel):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse the stderr of ``python -X importtime``."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        stripped = name.lstrip(" ")
+        timings.append(ImportTiming(
+            module=stripped,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(stripped) - 1) // 2,
+        ))
+    return timings
+
+
+def profile_imports(modules: List[str]) -> List[ImportTiming]:
+    """Import ``modules`` in order in a fresh interpreter and return every import's timing.
+    
+    Each top-level entry's cumulative time is the incremental cost of importing that
+    module after the ones before it.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
@@ -1,5 +1,5 @@
-from typing import List
-from .models import PageContent
+from typing import List, Optional
+from .models import ChatTurn, PageContent
 
 SYSTEM_PROMPT = """You are a concise technical research assistant.
 You must answer using the provided web content when it exists.
@@ -15,9 +15,17 @@ Always respond in markdown with the following sections:
 ## Sources (numbered list of URLs with short labels)"""
 
 
-def build_user_prompt(query: str, pages: List[PageContent]) -> str:
-    """Build user prompt with query and web content."""
-    parts = [f"User question:\n{query}\n"]
+def format_history(turns: List[ChatTurn]) -> str:
+    """Earlier turns of a chat, oldest first."""
+    return "".join(f"User: {turn.question}\nAssistant: {turn.answer}\n\n" for turn in turns)
+
+
+def build_user_prompt(query: str, pages: List[PageContent], history: Optional[List[ChatTurn]] = None) -> str:
+    """Build user prompt with query, web content and any earlier chat turns."""
+    parts = []
+    if history:
+        parts.append(f"Conversation so far:\n{format_history(history)}")
+    parts.append(f"User question:\n{query}\n")
     
     if pages:
         parts.append("Web results:\n")
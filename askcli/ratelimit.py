@@ -0,0 +1,312 @@
+import email.utils
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, TypeVar
+from .models import SearchResult
+from .tracing import span
+
+T = TypeVar("T")
+
+# Free-tier limits; override per provider with [ratelimit] requests_per_minute
+DEFAULT_REQUESTS_PER_MINUTE = {"groq": 30.0, "gemini": 15.0, "duckduckgo": 20.0}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_RETRY_DELAY = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+_RATE_LIMIT_NAMES = ("ratelimit", "resourceexhausted", "toomanyrequests")
+
+# Called with (provider, seconds) before a wait of NOTIFY_AFTER_SECONDS or more, so
+# an interactive caller can tell the user why nothing is happening
+on_wait: ContextVar[Optional[Callable[[str, float], None]]] = ContextVar("askcli_ratelimit_on_wait", default=None)
+NOTIFY_AFTER_SECONDS = 1.0
+
+
+@contextmanager
+def reporting_waits(callback: Callable[[str, float], None]):
+    """Report long rate-limit waits in this context (and work copied from it) to ``callback``."""
+    token = on_wait.set(callback)
+    try:
+        yield
+    finally:
+        on_wait.reset(token)
+
+
+class RateLimited(Exception):
+    """Waiting for a provider's rate limit would take longer than ``max_wait_seconds``."""
+
+    def __init__(self, provider: str, wait: float):
+        super().__init__(f"{provider} is rate limited for another {wait:.0f}s")
+        self.provider = provider
+        self.wait = wait
+
+
+def _duration(value: str) -> Optional[float]:
+    """Seconds in a reset header: ``"7.66s"``, ``"2m59.56s"``, ``"120ms"`` or a bare number."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """How long the provider asked us to wait, from ``Retry-After`` or rate-limit reset headers."""
+    headers = {name.lower(): value for name, value in headers.items()}
+    if "retry-after-ms" in headers:
+        seconds = _duration(headers["retry-after-ms"])
+        return seconds / 1000 if seconds is not None else None
+    if "retry-after" in headers:
+        value = headers["retry-after"]
+        seconds = _duration(value)
+        if seconds is not None:
+            return seconds
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    # x-ratelimit-remaining-requests: 0 with x-ratelimit-reset-requests: 2m59.56s (and -tokens)
+    resets = [
+        _duration(headers[f"x-ratelimit-reset-{kind}"])
+        for kind in ("requests", "tokens")
+        if headers.get(f"x-ratelimit-remaining-{kind}", "").strip() == "0" and f"x-ratelimit-reset-{kind}" in headers
+    ]
+    resets = [seconds for seconds in resets if seconds is not None]
+    return max(resets) if resets else None
+
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """None when ``error`` is not a rate limit, else the requested wait (0 if unknown).
+
+    Provider clients wrap SDK errors (``LLMError(...) from e``), so the whole cause
+    chain is checked for a 429 status or a rate-limit exception type.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, RateLimited):
+            return error.wait
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        code = getattr(error, "code", None)
+        name = type(error).__name__.lower()
+        if status == 429 or (isinstance(code, int) and code == 429) or any(hint in name for hint in _RATE_LIMIT_NAMES):
+            headers = getattr(response, "headers", None)
+            seconds = retry_after(headers) if headers else None
+            if seconds is None:
+                # Gemini puts the delay in the error details rather than a header
+                match = _RETRY_DELAY.search(str(error))
+                seconds = float(match.group(1)) if match else 0.0
+            return seconds
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class RateGovernor:
+    """Per-provider token buckets shared by every ``ask`` process through a SQLite file.
+
+    ``acquire`` reserves the next request slot and sleeps until it is due, so callers
+    queue at the provider's rate instead of failing. ``block`` holds a provider back
+    for every process after a 429. ``call`` combines both: it retries rate-limited
+    calls after the provider's ``Retry-After`` or a jittered exponential backoff.
+    Providers without a configured rate are only held back after 429s.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        requests_per_minute: Optional[Dict[str, float]] = None,
+        burst: int = 3,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_wait: float = 300.0,
+    ):
+        self.path = Path(path)
+        self.requests_per_minute = dict(requests_per_minute or {})
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "provider TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit, so each update below is one explicit BEGIN IMMEDIATE transaction
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, provider: str, change: Callable[[float, float, float], tuple]) -> tuple:
+        """Apply ``change(tokens, now, blocked_until)`` to the provider's bucket atomically
+        across processes; it returns ``(tokens, blocked_until, result)``."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM buckets WHERE provider = ?", (provider,)
+            ).fetchone()
+            tokens, updated_at, blocked_until = row if row else (float(self.burst), now, 0.0)
+            rate = self.requests_per_minute.get(provider)
+            if rate:
+                tokens = min(float(self.burst), tokens + (now - updated_at) * rate / 60)
+            tokens, blocked_until, result = change(tokens, now, blocked_until)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (provider, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                (provider, tokens, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def acquire(self, provider: str, max_wait: Optional[float] = None) -> float:
+        """Wait for the provider's next request slot; returns the seconds waited.
+
+        Raises ``RateLimited`` instead when the wait would exceed ``max_wait``
+        (``max_wait_seconds`` by default; 0 to never wait).
+        """
+        rate = self.requests_per_minute.get(provider)
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        def reserve(tokens: float, now: float, blocked_until: float) -> tuple:
+            wait = max(0.0, blocked_until - now)
+            if rate:
+                # Tokens go negative while requests are queued: each waits its turn
+                wait = max(wait, (1 - tokens) * 60 / rate if tokens < 1 else 0.0)
+            if wait > max_wait:
+                return tokens, blocked_until, -wait
+            return (tokens - 1 if rate else tokens), blocked_until, wait
+
+        wait = self._update(provider, reserve)
+        if wait < 0:
+            raise RateLimited(provider, -wait)
+        waited = 0.0
+        while wait > 0:
+            listener = on_wait.get()
+            if listener is not None and wait >= NOTIFY_AFTER_SECONDS:
+                listener(provider, wait)
+            with span("ratelimit.wait", provider=provider, seconds=round(wait, 2)):
+                time.sleep(wait)
+            waited += wait
+            # A 429 elsewhere may have blocked the provider while this caller slept
+            blocked_until = self._connect().execute(
+                "SELECT blocked_until FROM buckets WHERE provider = ?", (provider,)
+            ).fetchone()[0]
+            wait = blocked_until - time.time()
+            if wait > 0:
+                # Spread the callers released when the block ends
+                wait += random.uniform(0, self.backoff_base)
+        return waited
+
+    def block(self, provider: str, seconds: float) -> None:
+        """Hold ``provider`` back for ``seconds`` in every process sharing the state file."""
+        self._update(provider, lambda tokens, now, blocked_until: (
+            min(tokens, 0.0), max(blocked_until, now + seconds), None
+        ))
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the ``attempt``-th retry (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, provider: str, fn: Callable[[], T], patient: bool = True) -> T:
+        """Run ``fn`` in the provider's next slot, retrying it while it is rate limited.
+
+        An impatient call neither waits for a slot nor retries: it raises at once
+        (``RateLimited`` or the provider's 429), so the caller can try elsewhere.
+        A 429 still holds the provider back for everyone else.
+        """
+        retries = self.max_retries if patient else 0
+        attempt = 0
+        while True:
+            self.acquire(provider, None if patient else 0.0)
+            try:
+                return fn()
+            except Exception as e:
+                delay = rate_limit_delay(e)
+                if delay is None:
+                    raise
+                wait = delay + random.uniform(0, self.backoff_base) if delay else self.backoff(attempt)
+                with span("ratelimit.retry", provider=provider, attempt=attempt + 1, seconds=round(wait, 2)):
+                    self.block(provider, wait)
+                if attempt >= retries:
+                    raise
+                attempt += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        return {
+            provider: {"tokens": round(tokens, 2), "blocked_seconds": round(max(0.0, blocked_until - now), 1)}
+            for provider, tokens, blocked_until in self._connect().execute(
+                "SELECT provider, tokens, blocked_until FROM buckets ORDER BY provider"
+            )
+        }
+
+
+class GovernedLLMClient:
+    """An LLM client whose requests go through a ``RateGovernor``.
+
+    Inside a ``CompositeLLMClient`` the members are impatient, so a rate limit fails
+    over to the next provider at once; the composite itself is wrapped patiently
+    and queues only when every provider is limited.
+    """
+
+    def __init__(self, client, provider: str, governor: RateGovernor, patient: bool = True):
+        self.client = client
+        self.provider = provider
+        self.governor = governor
+        self.patient = patient
+        self.model_name = getattr(client, "model_name", provider)
+
+    def __getattr__(self, name: str):
+        # e.g. CompositeLLMClient.last_provider and breakers
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def answer(self, system: str, user: str) -> str:
+        return self.governor.call(self.provider, lambda: self.client.answer(system, user), self.patient)
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        def open_stream():
+            # Rate limits surface when the request is sent, i.e. before the first chunk
+            chunks = self.client.stream(system, user)
+            return next(chunks, None), chunks
+
+        first, chunks = self.governor.call(self.provider, open_stream, self.patient)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+
+class GovernedSearchProvider:
+    """A search provider whose requests go through a ``RateGovernor``."""
+
+    def __init__(self, provider, name: str, governor: RateGovernor):
+        self.provider = provider
+        self.name = name
+        self.governor = governor
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        return self.governor.call(self.name, lambda: self.provider.search(query, n))
@@ -0,0 +1,66 @@
+import importlib
+from importlib.metadata import entry_points
+from typing import Callable, Dict, List, Union
+
+
+class ProviderRegistry:
+    """Name → factory mapping whose providers are imported only when first used.
+    
+    Built-in providers are registered as ``"module:attribute"`` strings; third-party
+    packages can add more through the ``entry_point_group`` entry point group.
+    """
+
+    def __init__(self, kind: str, entry_point_group: str, builtins: Dict[str, str]):
+        self.kind = kind
+        self.entry_point_group = entry_point_group
+        self._targets: Dict[str, Union[str, Callable]] = dict(builtins)
+        self._entry_points_loaded = False
+
+    def register(self, name: str, target: Union[str, Callable]) -> None:
+        """Register a factory, or a ``"module:attribute"`` path to import lazily."""
+        self._targets[name] = target
+
+    def target(self, name: str) -> Union[str, Callable]:
+        if name not in self._targets:
+            self._load_entry_points()
+        if name not in self._targets:
+            raise ValueError(f"Unknown {self.kind} provider: {name}")
+        return self._targets[name]
+
+    def load(self, name: str) -> Callable:
+        target = self.target(name)
+        if isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            target = getattr(importlib.import_module(module_name), attribute)
+            self._targets[name] = target
+        return target
+
+    def names(self) -> List[str]:
+        self._load_entry_points()
+        return sorted(self._targets)
+
+    def _load_entry_points(self) -> None:
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        for entry_point in entry_points(group=self.entry_point_group):
+            self._targets.setdefault(entry_point.name, entry_point.value)
+
+
+LLM_PROVIDERS = ProviderRegistry(
+    "LLM",
+    "askcli.llm_providers",
+    {
+        "groq": "askcli.llm.groq_client:GroqClient",
+        "gemini": "askcli.llm.gemini_client:GeminiClient",
+    },
+)
+
+SEARCH_PROVIDERS = ProviderRegistry(
+    "search",
+    "askcli.search_providers",
+    {
+        "duckduckgo": "askcli.search.duckduckgo:DuckDuckGoProvider",
+        "searxng": "askcli.search.searxng:SearxNGProvider",  # called with search.searxng_url
+    },
+)
@@ -0,0 +1,132 @@
+from typing import Optional, Tuple
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.spinner import Spinner
+from rich.text import Text
+
+SECTION_STYLES = {
+    "TL;DR": "cyan",
+    "Explanation": "green",
+    "Key Points": "yellow",
+    "Sources": "magenta",
+}
+
+
+def print_header(llm_provider: Optional[str], offline: bool = False, use_web: bool = True) -> None:
+    """The ``ask`` banner naming the mode and the LLM provider."""
+    header = Text("ASK CLI", style="bold magenta")
+    header.append(" | ", style="dim")
+    header.append("Intelligent Q&A", style="bold cyan")
+    if offline:
+        header.append(" from the local index", style="green")
+    elif use_web:
+        header.append(" with web search", style="green")
+    # Gemini is the default provider
+    header.append(f" [{(llm_provider or 'gemini').upper()}]", style="bold yellow")
+    console = Console()
+    console.print(header)
+    console.print()
+
+
+def parse_section(section: str) -> Tuple[str, str]:
+    """Split a ``## `` section into its title line and body."""
+    lines = section.strip().split('\n')
+    title = lines[0] if lines else ""
+    content = '\n'.join(lines[1:]) if len(lines) > 1 else ""
+    return title, content
+
+
+def section_panel(title: str, content: str) -> Optional[Panel]:
+    """Panel for one of the known answer sections, or None for anything else."""
+    style = SECTION_STYLES.get(title)
+    if style is None:
+        return None
+    return Panel(content, title=f"[bold {style}]>> {title} <<[/bold {style}]", border_style=style, padding=(1, 2))
+
+
+class StreamingRenderer:
+    """Draw answer panels incrementally as an LLM streams markdown.
+    
+    Each ``## `` section is printed as a final panel as soon as the next one starts;
+    the section still being generated is shown in a Rich Live area below them.
+    """
+
+    def __init__(self, console: Optional[Console] = None, status: str = "Thinking..."):
+        self.console = console or Console()
+        self.status = status
+        self.text = ""
+        self._printed = 0
+        self._live = None
+
+    def __enter__(self) -> "StreamingRenderer":
+        self._live = Live(
+            Spinner("dots", text=Text(self.status, style="dim")),
+            console=self.console,
+            refresh_per_second=12,
+            transient=True,
+        )
+        self._live.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        sections = self.text.split('## ')
+        # Everything except the last section is complete
+        while self._printed < len(sections) - 1:
+            self._print_section(sections, self._printed)
+            self._printed += 1
+        self._update_live(sections[-1])
+
+    def close(self) -> None:
+        if self._live is None:
+            return
+        self._live.stop()
+        self._live = None
+        sections = self.text.split('## ')
+        while self._printed < len(sections):
+            self._print_section(sections, self._printed)
+            self._printed += 1
+
+    def _print_section(self, sections, index: int) -> None:
+        section = sections[index]
+        if not section.strip():
+            return
+        panel = section_panel(*parse_section(section))
+        if panel is not None:
+            self.console.print(panel)
+        if index < len(sections) - 1:
+            self.console.print()
+
+    def _update_live(self, partial: str) -> None:
+        title, content = parse_section(partial)
+        panel = section_panel(title, content) if '\n' in partial.strip() else None
+        if panel is None:
+            self._live.update(Spinner("dots", text=Text(self.status, style="dim")))
+        else:
+            self._live.update(Group(panel, Spinner("dots", text=Text("Generating...", style="dim"))))
+
+
+def render_markdown_to_terminal(markdown_text: str) -> str:
+    """Render colorful formatted output to terminal."""
+    console = Console()
+    
+    # Parse sections from markdown
+    sections = markdown_text.split('## ')
+    
+    with console.capture() as capture:
+        for i, section in enumerate(sections):
+            if not section.strip():
+                continue
+            
+            panel = section_panel(*parse_section(section))
+            if panel is not None:
+                console.print(panel)
+            
+            if i < len(sections) - 1:
+                console.print()
+    
+    return capture.get()
@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+from .models import PageContent
+from .tokens import cut_at_boundary
+
+try:
+    import numpy as np
+except ImportError:
+    # Vectorized scoring is optional; the pure-Python path gives identical scores
+    np = None
+
+_WORDS = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n(?=\S)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or "
+    "so than that the their then there these this to was were what when where which who "
+    "why will with you your do does did can could should would about".split()
+)
+
+# Below this many passages the pure-Python scorer is faster than setting up arrays
+VECTORIZE_MIN_PASSAGES = 256
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORDS.findall(text.lower()) if word not in STOPWORDS]
+
+
+def split_passages(text: str, target_chars: int = 600) -> List[str]:
+    """Split text into passages of roughly ``target_chars``, merging short paragraphs
+    and splitting long ones at sentence boundaries."""
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= target_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            # A single run-on "sentence" still gets cut to size
+            while len(sentence) > target_chars * 2:
+                head = cut_at_boundary(sentence, target_chars)
+                pieces.append(head)
+                sentence = sentence[len(head):].strip()
+            if sentence:
+                pieces.append(sentence)
+    
+    passages = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > target_chars:
+            passages.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        passages.append(current)
+    return passages
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over a list of passages."""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(passage)) for passage in passages]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.doc_freqs = Counter()
+        for tf in self.term_freqs:
+            self.doc_freqs.update(tf.keys())
+
+    def idf(self, term: str) -> float:
+        n = len(self.term_freqs)
+        df = self.doc_freqs.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        terms = [term for term in set(tokenize(query)) if term in self.doc_freqs]
+        if not terms or not self.term_freqs:
+            return [0.0] * len(self.term_freqs)
+        if np is not None and len(self.term_freqs) >= VECTORIZE_MIN_PASSAGES:
+            return self._scores_vectorized(terms)
+        
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self.idf(term) * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def _scores_vectorized(self, terms: List[str]) -> List[float]:
+        freqs = np.array([[tf.get(term, 0) for term in terms] for tf in self.term_freqs], dtype=float)
+        idfs = np.array([self.idf(term) for term in terms])
+        lengths = np.array(self.lengths, dtype=float)
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self.avg_length or 1))
+        weights = freqs * (self.k1 + 1) / (freqs + norm[:, None])
+        return (weights @ idfs).tolist()
+
+
+def context_coverage(query: str, pages: List[PageContent], passage_chars: int = 600, top_n: int = 3) -> float:
+    """Share of the query's terms found in the ``top_n`` passages BM25 ranks best for it.
+    
+    A question with no content words (``"why?"``) counts as covered.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return 1.0
+    passages = [passage for page in pages for passage in split_passages(page.text, passage_chars)]
+    if not passages:
+        return 0.0
+    scores = BM25Index(passages).scores(query)
+    best = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)[:top_n]
+    found = set()
+    for i in best:
+        if scores[i] > 0:
+            found.update(tokenize(passages[i]))
+    return len(terms & found) / len(terms)
+
+
+def rank_passages(
+    query: str,
+    pages: List[PageContent],
+    top_k: int = 12,
+    passage_chars: int = 600,
+) -> List[PageContent]:
+    """Keep only the ``top_k`` passages most relevant to ``query``.
+    
+    Passages stay with the page they came from (so ``[i]`` attribution is preserved)
+    and in their original order within it; pages with no selected passage are dropped.
+    """
+    located: List[Tuple[int, int, str]] = []
+    for page_index, page in enumerate(pages):
+        for passage_index, passage in enumerate(split_passages(page.text, passage_chars)):
+            located.append((page_index, passage_index, passage))
+    if len(located) <= top_k:
+        return pages
+    
+    scores = BM25Index([passage for _, _, passage in located]).scores(query)
+    ranked = sorted(range(len(located)), key=lambda i: scores[i], reverse=True)
+    selected = sorted(ranked[:top_k], key=lambda i: (located[i][0], located[i][1]))
+    
+    selected_by_page = {}
+    for i in selected:
+        page_index, _, passage = located[i]
+        selected_by_page.setdefault(page_index, []).append(passage)
+    
+    return [
+        page.model_copy(update={"text": "\n\n".join(selected_by_page[page_index])})
+        for page_index, page in enumerate(pages)
+        if page_index in selected_by_page
+    ]
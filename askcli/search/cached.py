@@ -0,0 +1,87 @@
+import json
+import threading
+from pathlib import Path
+from typing import List, Optional
+from ..cache.keys import normalize_query
+from ..cache.store import DiskCache
+from ..models import SearchResult
+from ..tracing import span
+from .base import SearchProvider
+
+
+class CachedSearchProvider:
+    """TTL cache around any ``SearchProvider`` with stale-while-revalidate.
+    
+    Results younger than ``ttl_seconds`` are served directly. Older results are still
+    served for another ``stale_seconds`` while a background refresh runs; past that
+    the provider is queried synchronously.
+    """
+
+    def __init__(
+        self,
+        provider: SearchProvider,
+        path: Path,
+        ttl_seconds: int = 3600,
+        stale_seconds: int = 86400,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.store = DiskCache(path, max_bytes=max_bytes)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        key = normalize_query(query)
+        with span("search.cache_lookup") as stage:
+            cached = self._lookup(key, n)
+            stage.set(hit=cached is not None)
+        if cached is not None:
+            results, age, cached_n = cached
+            if age < self.ttl_seconds:
+                self.store.incr("hits")
+                return results
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.store.incr("stale_hits")
+                # Refresh the full cached set, not just the slice asked for
+                self._refresh_in_background(key, query, cached_n)
+                return results
+        
+        self.store.incr("misses")
+        return self._refresh(key, query, n)
+
+    def _lookup(self, key: str, n: int) -> Optional[tuple]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        data = json.loads(entry.value)
+        # A larger cached result set can serve any smaller request
+        if data["n"] < n:
+            return None
+        results = [SearchResult(**item) for item in data["results"][:n]]
+        return results, entry.age, data["n"]
+
+    def _refresh(self, key: str, query: str, n: int) -> List[SearchResult]:
+        results = self.provider.search(query, n=n)
+        if results:
+            value = {"n": n, "results": [result.model_dump() for result in results]}
+            self.store.set(key, json.dumps(value).encode("utf-8"))
+        return results
+
+    def _refresh_in_background(self, key: str, query: str, n: int) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def run():
+            try:
+                self._refresh(key, query, n)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=run, name=f"search-refresh-{key[:32]}").start()
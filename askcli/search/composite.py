@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from ..cache.keys import canonical_url
+from ..models import SearchResult
+from ..tracing import span
+from .base import SearchProvider
+
+
+class CompositeSearchProvider:
+    """Queries several search backends at once and fuses their rankings.
+
+    Each backend gets its own deadline and is abandoned when it passes. The search
+    returns as soon as ``min_backends`` backends have answered with ``n`` distinct
+    results between them, without waiting for slower ones. Results are merged with
+    reciprocal rank fusion (a result scores ``1 / (rrf_k + rank)`` in every backend
+    that returned it) and deduplicated by canonical URL.
+    """
+
+    def __init__(
+        self,
+        backends: List[Tuple[str, SearchProvider]],
+        deadlines: Optional[Dict[str, float]] = None,
+        default_deadline: float = 5.0,
+        min_backends: int = 2,
+        rrf_k: int = 60,
+    ):
+        if not backends:
+            raise ValueError("CompositeSearchProvider needs at least one backend")
+        self.backends = backends
+        self.deadlines = {name: (deadlines or {}).get(name, default_deadline) for name, _ in backends}
+        self.min_backends = max(1, min(min_backends, len(backends)))
+        self.rrf_k = rrf_k
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        events: "queue.Queue" = queue.Queue()
+        started = time.monotonic()
+        for name, backend in self.backends:
+            threading.Thread(target=self._run, args=(name, backend, query, n, events), daemon=True).start()
+
+        pending = {name: started + self.deadlines[name] for name, _ in self.backends}
+        answered: Dict[str, List[SearchResult]] = {}
+        errors = []
+        timed_out = []
+        with span("search.composite", backends=len(self.backends), n=n) as stage:
+            while pending and not self._enough(answered, n):
+                now = time.monotonic()
+                for name in [name for name, deadline in pending.items() if deadline <= now]:
+                    del pending[name]
+                    timed_out.append(name)
+                if not pending:
+                    break
+                try:
+                    name, results, error = events.get(timeout=min(pending.values()) - now)
+                except queue.Empty:
+                    continue
+                if name not in pending:
+                    continue
+                del pending[name]
+                if error is not None:
+                    errors.append(f"{name}: {error}")
+                else:
+                    answered[name] = results
+            stage.set(answered=",".join(answered), timed_out=",".join(timed_out), abandoned=",".join(pending))
+        if not answered and errors:
+            raise RuntimeError("All search backends failed - " + "; ".join(errors))
+        return self.fuse(answered)[:n]
+
+    def _enough(self, answered: Dict[str, List[SearchResult]], n: int) -> bool:
+        if len(answered) < self.min_backends:
+            return False
+        return len({canonical_url(r.url) for results in answered.values() for r in results}) >= n
+
+    def fuse(self, answered: Dict[str, List[SearchResult]]) -> List[SearchResult]:
+        """Reciprocal rank fusion of each backend's results, in configured backend order."""
+        scores: Dict[str, float] = {}
+        merged: Dict[str, SearchResult] = {}
+        for name, _ in self.backends:
+            for rank, result in enumerate(answered.get(name, []), 1):
+                key = canonical_url(result.url)
+                scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank)
+                if key not in merged:
+                    merged[key] = result
+                elif not merged[key].snippet and result.snippet:
+                    merged[key] = merged[key].model_copy(update={"snippet": result.snippet})
+        # sorted() is stable, so ties keep the order of the first backend that found them
+        return [merged[key] for key in sorted(merged, key=lambda key: -scores[key])]
+
+    @staticmethod
+    def _run(name: str, backend: SearchProvider, query: str, n: int, events: "queue.Queue") -> None:
+        try:
+            events.put((name, backend.search(query, n), None))
+        except Exception as e:
+            events.put((name, None, e))
@@ -1,6 +1,8 @@
 from typing import List
 from ddgs import DDGS
 from ..models import SearchResult
+from ..ratelimit import rate_limit_delay
+from ..tracing import span
 from .base import SearchProvider
 
 
@@ -8,7 +10,7 @@ class DuckDuckGoProvider:
     def search(self, query: str, n: int = 5) -> List[SearchResult]:
         """Search using DuckDuckGo and return structured results."""
         try:
-            with DDGS() as ddgs:
+            with span("duckduckgo.search", n=n), DDGS() as ddgs:
                 results = list(ddgs.text(query, max_results=n))
                 return [
                     SearchResult(
@@ -19,5 +21,8 @@ class DuckDuckGoProvider:
                     for result in results
                 ]
         except Exception as e:
+            if rate_limit_delay(e) is not None:
+                # Left to the rate governor to wait and retry
+                raise
             print(f"Search failed: {e}")
             return []
\ No newline at end of file
@@ -0,0 +1,20 @@
+from typing import List
+from ..cache.index import PageIndex
+from ..models import SearchResult
+
+SNIPPET_CHARS = 200
+
+
+class LocalIndexProvider:
+    """Search backend over the local page index: pages seen by earlier runs."""
+
+    def __init__(self, index: PageIndex, min_score: float = 0.8):
+        self.index = index
+        self.min_score = min_score
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        return [
+            SearchResult(title=hit.page.title, url=hit.page.url, snippet=hit.page.text[:SNIPPET_CHARS])
+            for hit in self.index.search(query, n)
+            if hit.score >= self.min_score and not hit.missing
+        ]
@@ -0,0 +1,25 @@
+from typing import List, Optional
+from ..models import SearchResult
+from ..tracing import span
+from ..transport import get_client
+
+
+class SearxNGProvider:
+    """Any SearxNG-compatible ``/search?format=json`` endpoint, e.g. a local SearxNG."""
+
+    def __init__(self, url: str = "http://localhost:8888", timeout: Optional[float] = None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        options = {"timeout": self.timeout} if self.timeout else {}
+        with span("searxng.search", n=n):
+            response = get_client().get(
+                f"{self.url}/search", params={"q": query, "format": "json"}, **options
+            )
+            response.raise_for_status()
+        return [
+            SearchResult(title=item.get("title", ""), url=item["url"], snippet=item.get("content", ""))
+            for item in response.json().get("results", [])[:n]
+            if item.get("url")
+        ]
@@ -0,0 +1,159 @@
+import json
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from . import __version__
+from .answer import answer_to_dict
+from .client import STATE_FILE
+from .models import AskEvent, QueryOutcome, Settings
+from .session import SyncAskSession
+from .transport import STATS
+
+
+class AskDaemon:
+    """Long-lived process that keeps imports, HTTP pools and LLM clients warm.
+    
+    Requests are served on a thread each and all share one ``SyncAskSession``, so
+    page downloads from every request go through the same HTTP pool.
+    """
+
+    def __init__(self, config: Settings):
+        self.config = config
+        self.session = SyncAskSession(config)
+        self.started_at = time.time()
+        self.requests = 0
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def ask(self, request: Dict, on_token: Optional[Callable[[str], None]] = None) -> QueryOutcome:
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+        try:
+            def on_event(event: AskEvent) -> None:
+                if event.type == "token" and on_token:
+                    on_token(event.text)
+
+            return self.session.ask(
+                request["query"],
+                num_results=request.get("num_results"),
+                use_web=request.get("use_web", True),
+                llm_provider=request.get("llm_provider"),
+                use_cache=request.get("use_cache", True),
+                offline=request.get("offline", False),
+                stream=on_token is not None,
+                on_event=on_event,
+            )
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def status(self) -> Dict:
+        return {
+            "status": "ok",
+            "version": __version__,
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "active": self.active,
+            "llm_providers": self.session.llm_providers,
+            "transport": STATS.model_dump(),
+            "coalesced": {stage: stats.model_dump() for stage, stats in self.session.coalescing.items()},
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _result_event(outcome: QueryOutcome) -> Dict:
+    return {
+        "type": "result",
+        **answer_to_dict(outcome.answer, outcome.search_results),
+        "cache_status": outcome.cache_status,
+        "streamed": outcome.streamed,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    daemon: AskDaemon = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.daemon.status())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/ask":
+            self._send_json(404, {"error": "not found"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+        except Exception:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+        
+        if not request.get("stream"):
+            try:
+                self._send_json(200, _result_event(self.daemon.ask(request)))
+            except Exception as e:
+                self._send_json(500, {"type": "error", "error": str(e)})
+            return
+        
+        # NDJSON event stream, terminated by closing the connection
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            outcome = self.daemon.ask(request, on_token=lambda chunk: self._write_event({"type": "token", "text": chunk}))
+            self._write_event(_result_event(outcome))
+        except Exception as e:
+            self._write_event({"type": "error", "error": str(e)})
+
+    def _write_event(self, event: Dict) -> None:
+        self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(config: Settings, host: str, port: int, on_ready: Optional[Callable[[str], None]] = None) -> None:
+    """Run the daemon until interrupted, advertising its address in the state file."""
+    daemon = AskDaemon(config)
+    handler = type("AskHandler", (_Handler,), {"daemon": daemon})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    address = f"http://{host}:{server.server_address[1]}"
+    
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps({"address": address, "pid": os.getpid()}))
+    if on_ready:
+        on_ready(address)
+    # Shut down cleanly (and withdraw the state file) on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            if json.loads(STATE_FILE.read_text()).get("pid") == os.getpid():
+                STATE_FILE.unlink()
+        except (OSError, ValueError):
+            pass
+        server.server_close()
+        daemon.close()
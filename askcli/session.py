@@ -0,0 +1,541 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import queue
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from .answer import (
+    context_limits,
+    fetch_plan,
+    get_answer_cache,
+    get_llm_client,
+    get_page_cache,
+    get_page_index,
+    get_search_provider,
+    select_context,
+    stream_answer,
+)
+from .cache.answers import AnswerCache
+from .cache.keys import normalize_query
+from .compress import get_compressor
+from .config import load_config
+from .dedup import dedupe_pages, fold_sources
+from .models import AskEvent, CompressionStats, DedupStats, FetchStats, FlightStats, PageContent, QueryOutcome, SearchResult, Settings
+from .prompts import SYSTEM_PROMPT, build_user_prompt
+from .ratelimit import reporting_waits
+from .search.cached import CachedSearchProvider
+from .singleflight import SingleFlight
+from .tracing import span
+
+_END = object()
+
+logger = logging.getLogger(__name__)
+
+
+def report_waits(emit: Callable[[AskEvent], None]):
+    """Emit a ``waiting`` event for each long rate-limit wait of work run from this context.
+
+    The waits happen on the session's threads, which inherit the context via ``_run``.
+    """
+    loop = asyncio.get_running_loop()
+
+    def waiting(provider: str, seconds: float) -> None:
+        text = f"{provider} is rate limited, waiting {seconds:.0f}s"
+        loop.call_soon_threadsafe(emit, AskEvent(type="waiting", text=text))
+
+    return reporting_waits(waiting)
+
+
+def _log_indexing_error(task: "asyncio.Future") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Indexing fetched pages failed: %r", task.exception())
+
+
+class AskSession:
+    """Reusable pipeline state for embedding ASK CLI in async code.
+
+    Config, the HTTP pool, caches, the search provider and LLM clients are built once
+    and shared by every ``ask``; concurrent asks are bounded per stage by the
+    ``[batch]`` concurrency settings, and identical searches, page downloads and LLM
+    prompts in flight at the same time run once and are shared.
+    Use as ``async with AskSession() as session``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[Settings] = None,
+        llm=None,
+        llm_provider: Optional[str] = None,
+        search_provider=None,
+    ):
+        self.config = config or load_config()
+        self.llm_provider = llm_provider
+        self.search_provider = search_provider
+        self._search_provider_built = search_provider is not None
+        self._llms: Dict[Optional[str], object] = {}
+        if llm is not None:
+            self._llms[llm_provider] = llm
+        self._lock = threading.Lock()
+        batch = self.config.batch
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=batch.search_concurrency + batch.llm_concurrency + 4,
+            thread_name_prefix="askcli-session",
+        )
+        self._search_slots = asyncio.Semaphore(batch.search_concurrency)
+        self._fetch_slots = asyncio.Semaphore(batch.fetch_concurrency)
+        self._llm_slots = asyncio.Semaphore(batch.llm_concurrency)
+        self.flights = {stage: SingleFlight() for stage in ("search", "fetch", "llm")}
+        self.page_cache = get_page_cache(self.config)
+        self.answers = get_answer_cache(self.config)
+        self.index = get_page_index(self.config)
+        self.compressor = get_compressor(self.config)
+        self._indexing: set = set()
+        self.http = None
+
+    async def __aenter__(self) -> "AskSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._indexing:
+            await asyncio.gather(*self._indexing, return_exceptions=True)
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+        self._executor.shutdown(wait=False)
+
+    def llm(self, provider: Optional[str] = None):
+        """The LLM client for ``provider`` (the session default when None), built once."""
+        provider = provider or self.llm_provider
+        with self._lock:
+            if provider not in self._llms:
+                self._llms[provider] = get_llm_client(self.config, provider)
+            return self._llms[provider]
+
+    @property
+    def llm_providers(self):
+        """Names of the providers whose LLM clients have been built."""
+        with self._lock:
+            return sorted({name or self.config.llm.provider for name in self._llms})
+
+    @property
+    def coalescing(self) -> Dict[str, FlightStats]:
+        """Per stage, how many calls did the work and how many shared an in-flight one."""
+        return {stage: flight.stats for stage, flight in self.flights.items()}
+
+    def search(self, use_cache: bool = True):
+        with self._lock:
+            if not self._search_provider_built:
+                self.search_provider = get_search_provider(self.config)
+                self._search_provider_built = True
+        if not use_cache and isinstance(self.search_provider, CachedSearchProvider):
+            return self.search_provider.provider
+        return self.search_provider
+
+    async def _run(self, fn, *args):
+        """Run blocking work on the session's threads, keeping the tracing context."""
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def _stream(self, llm, system: str, user: str) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for chunk in stream_answer(llm, system, user):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                loop.call_soon_threadsafe(chunks.put_nowait, _END)
+            except BaseException as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        async with self._llm_slots:
+            producer = asyncio.ensure_future(self._run(produce))
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is _END:
+                        break
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    yield chunk
+            finally:
+                stop.set()
+                await producer
+
+    async def _complete(self, llm, system: str, user: str) -> str:
+        async with self._llm_slots:
+            return await self._run(llm.answer, system, user)
+
+    async def _search(self, provider, query: str, n: int):
+        async with self._search_slots:
+            return await self._run(provider.search, query, n)
+
+    async def search_web(self, query: str, n: int, use_cache: bool = True) -> List[SearchResult]:
+        """Search results for ``query``; identical searches in flight are shared."""
+        provider = self.search(use_cache)
+        with span("search", n=n) as stage:
+            # The search cache's notion of the same query
+            key = (normalize_query(query), n)
+            results = await self.flights["search"].do(key, lambda: self._search(provider, query, n))
+            stage.set(results=len(results))
+        return results
+
+    async def fetch_pages(
+        self,
+        results: List[SearchResult],
+        query: str,
+        provider_name: str,
+        use_cache: bool = True,
+        stats: Optional[FetchStats] = None,
+        num_results: Optional[int] = None,
+    ) -> List[PageContent]:
+        """Download and extract ``results`` on the shared pool, sized for ``query``'s budget.
+
+        ``num_results`` is the number of sources wanted, as passed to ``fetch_plan``.
+        """
+        # httpx, trafilatura and their dependencies load only once the web is used
+        from .extraction import get_extractor
+        from .fetcher import gather_context_async
+        from .transport import create_async_client
+
+        if self.http is None:
+            self.http = create_async_client(self.config, max_connections=self.config.batch.fetch_concurrency)
+        _, gather_options = fetch_plan(self.config, num_results)
+        _, max_total_chars, max_page_chars = context_limits(self.config, provider_name, query)
+        with span("gather", candidates=len(results)) as stage:
+            pages = await gather_context_async(
+                results,
+                max_total_chars=max_total_chars,
+                max_page_chars=max_page_chars,
+                page_timeout=self.config.fetch.page_timeout_seconds,
+                client=self.http,
+                cache=self.page_cache if use_cache else None,
+                semaphore=self._fetch_slots,
+                extractor=get_extractor(self.config),
+                max_bytes=self.config.fetch.max_bytes,
+                stats=stats,
+                flight=self.flights["fetch"],
+                **gather_options,
+            )
+            stage.set(pages=len(pages))
+        if use_cache and self.index is not None and pages:
+            # Indexing is off the answer's critical path
+            task = asyncio.ensure_future(self._run(self.index.put, pages))
+            self._indexing.add(task)
+            task.add_done_callback(self._indexing.discard)
+            task.add_done_callback(_log_indexing_error)
+        return pages
+
+    async def dedupe(
+        self, pages: List[PageContent], provider_name: str
+    ) -> Tuple[List[PageContent], Dict[str, List[str]], DedupStats]:
+        """``dedupe_pages`` with the session's ``[dedup]`` settings, off the event loop."""
+        with span("dedup", pages=len(pages)) as stage:
+            result = await self._run(
+                dedupe_pages, pages, self.config.dedup.page_similarity, self.config.dedup.min_paragraph_chars, provider_name
+            )
+            stage.set(**result[2].model_dump())
+        return result
+
+    async def compress(self, pages: List[PageContent], stats: Optional[CompressionStats] = None) -> List[PageContent]:
+        """Run the ``[compression]`` steps over ``pages`` off the event loop."""
+        if self.compressor is None or not pages:
+            return pages
+        with span("compress", pages=len(pages)) as stage:
+            before = sum(len(page.text) for page in pages)
+            pages = await self._run(self.compressor.compress, pages, stats)
+            stage.set(chars_in=before, chars_out=sum(len(page.text) for page in pages))
+        return pages
+
+    async def search_index(self, query: str, n: int, offline: bool = False) -> List[PageContent]:
+        """Pages from the local index good enough to answer ``query`` without the web.
+
+        Normally that takes ``index.min_pages`` pages scoring at least ``index.min_score``
+        that contain the question's numbers and rare terms and are no older than the
+        page cache's ``page_ttl_seconds``; ``offline`` takes whatever matches.
+        """
+        if self.index is None:
+            return []
+        with span("index.search") as stage:
+            hits = await self._run(self.index.search, query, n)
+            stage.set(hits=len(hits), best=round(max((hit.score for hit in hits), default=0.0), 2))
+        if offline:
+            return [hit.page for hit in hits]
+        fresh_after = time.time() - self.config.cache.page_ttl_seconds
+        strong = [
+            hit.page for hit in hits
+            if hit.score >= self.config.index.min_score and not hit.missing and hit.fetched_at >= fresh_after
+        ]
+        return strong if len(strong) >= min(self.config.index.min_pages, n) else []
+
+    async def generate(
+        self,
+        llm,
+        user_prompt: str,
+        key: str,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """The LLM's answer to ``user_prompt``; calls in flight with the same ``key`` are shared."""
+        flight = self.flights["llm"]
+        if not stream:
+            return await flight.do(("answer", key), lambda: self._complete(llm, SYSTEM_PROMPT, user_prompt))
+        chunks = []
+        async for chunk in flight.stream(("stream", key), lambda: self._stream(llm, SYSTEM_PROMPT, user_prompt)):
+            chunks.append(chunk)
+            if on_token:
+                on_token(chunk)
+        return "".join(chunks)
+
+    async def ask(
+        self,
+        query: str,
+        num_results: Optional[int] = None,
+        use_web: bool = True,
+        llm_provider: Optional[str] = None,
+        use_cache: bool = True,
+        stream: bool = False,
+        on_event: Optional[Callable[[AskEvent], None]] = None,
+        offline: bool = False,
+    ) -> QueryOutcome:
+        """Run search → fetch → LLM for ``query`` and return the structured outcome.
+
+        ``on_event`` receives progress events; with ``stream`` the LLM is streamed and
+        each chunk is reported as a ``token`` event, and a long wait for a provider's
+        rate limit as a ``waiting`` event. Pages from the local index replace search and
+        fetch when they match well; ``offline`` uses only the index.
+        """
+        emit = on_event or (lambda event: None)
+        with report_waits(emit):
+            return await self._ask(query, num_results, use_web, llm_provider, use_cache, stream, emit, offline)
+
+    async def _ask(
+        self,
+        query: str,
+        num_results: Optional[int],
+        use_web: bool,
+        llm_provider: Optional[str],
+        use_cache: bool,
+        stream: bool,
+        emit: Callable[[AskEvent], None],
+        offline: bool,
+    ) -> QueryOutcome:
+        config = self.config
+        use_cache = use_cache and config.behavior.cache_enabled
+        llm = self.llm(llm_provider)
+        provider_name = llm_provider or self.llm_provider or config.llm.provider
+        model_name = getattr(llm, "model_name", "")
+        scope = f"{provider_name}:{model_name}"
+        answers = self.answers if use_cache else None
+
+        outcome = QueryOutcome(query=query)
+        started = time.perf_counter()
+        search_n, _ = fetch_plan(config, num_results)
+        local_pages = []
+
+        if use_web and (use_cache or offline):
+            t0 = time.perf_counter()
+            local_pages = await self.search_index(query, num_results or config.search.num_results, offline)
+            outcome.timings["index"] = time.perf_counter() - t0
+            if local_pages:
+                outcome.local_index = True
+                outcome.search_results = [SearchResult(title=page.title, url=page.url) for page in local_pages]
+                emit(AskEvent(type="search", outcome=outcome.model_copy()))
+        if offline and not local_pages:
+            emit(AskEvent(type="warning", text="No pages in the local index match, answering from the LLM alone"))
+            use_web = False
+
+        if use_web and not outcome.local_index:
+            try:
+                t0 = time.perf_counter()
+                outcome.search_results = await self.search_web(query, search_n, use_cache)
+                outcome.timings["search"] = time.perf_counter() - t0
+            except Exception as e:
+                emit(AskEvent(type="warning", text=f"Web search failed, falling back to LLM-only: {e}"))
+                use_web = False
+                outcome.search_results = []
+            emit(AskEvent(type="search", outcome=outcome.model_copy()))
+
+        # A recent answer to a re-worded question over the same sources skips fetching too
+        source_urls = [r.url for r in outcome.search_results]
+        if answers:
+            with span("cache.similar"):
+                similar = await self._run(answers.find_similar, scope, query, source_urls)
+            if similar:
+                outcome.answer, score = similar
+                outcome.cache_status = f"similar answer ({score:.0%} match)"
+
+        if use_web and outcome.cache_status is None:
+            try:
+                t0 = time.perf_counter()
+                budget = context_limits(config, provider_name, query)[0]
+                if outcome.local_index:
+                    pages = local_pages
+                else:
+                    pages = await self.fetch_pages(
+                        outcome.search_results, query, provider_name, use_cache, outcome.fetch_stats, num_results
+                    )
+                if config.fetch.hedged and not outcome.local_index:
+                    # Candidates that lost the race are not sources of this answer
+                    used = {page.url for page in pages}
+                    outcome.search_results = [r for r in outcome.search_results if r.url in used]
+                if config.dedup.enabled:
+                    pages, duplicates, outcome.dedup_stats = await self.dedupe(pages, provider_name)
+                    outcome.search_results = fold_sources(outcome.search_results, duplicates)
+                # After dedup, which needs the full text to recognise mirrored pages
+                pages = await self.compress(pages, outcome.compression_stats)
+                with span("select_context", budget_tokens=budget):
+                    outcome.pages = await self._run(select_context, config, query, pages, budget, provider_name)
+                outcome.timings["fetch"] = time.perf_counter() - t0
+
+                # If no content was extracted, fall back to LLM-only
+                if not outcome.pages or all(not page.text.strip() for page in outcome.pages):
+                    emit(AskEvent(type="warning", text="No content extracted from web sources, falling back to LLM-only"))
+                    outcome.search_results = []
+                    outcome.pages = []
+            except Exception as e:
+                emit(AskEvent(type="warning", text=f"Web search failed, falling back to LLM-only: {e}"))
+                outcome.search_results = []
+                outcome.pages = []
+
+        if outcome.cache_status is None:
+            with span("prompt.build"):
+                user_prompt = build_user_prompt(query, outcome.pages)
+                cache_key = AnswerCache.exact_key(provider_name, model_name, SYSTEM_PROMPT, user_prompt)
+            if answers:
+                with span("cache.exact"):
+                    cached = await self._run(answers.get_exact, cache_key)
+                if cached is not None:
+                    outcome.answer = cached
+                    outcome.cache_status = "exact answer"
+
+        emit(AskEvent(type="context", outcome=outcome.model_copy()))
+
+        if outcome.cache_status is None:
+            t0 = time.perf_counter()
+            with span("llm", provider=provider_name, model=model_name, streamed=stream) as stage:
+                def on_token(chunk: str) -> None:
+                    if "ttft" not in outcome.timings:
+                        outcome.timings["ttft"] = time.perf_counter() - t0
+                        stage.set(ttft_ms=round(outcome.timings["ttft"] * 1000, 1))
+                    emit(AskEvent(type="token", text=chunk))
+
+                # Keyed on the answer-cache key: same provider, model and prompt
+                outcome.answer = await self.generate(llm, user_prompt, cache_key, stream, on_token)
+                outcome.streamed = stream
+                stage.set(answer_chars=len(outcome.answer))
+            outcome.timings["llm"] = time.perf_counter() - t0
+
+            if answers:
+                await self._run(answers.miss)
+                await self._run(answers.put, cache_key, outcome.answer, scope, query, source_urls)
+
+        outcome.timings["total"] = time.perf_counter() - started
+        emit(AskEvent(type="result", outcome=outcome))
+        return outcome
+
+    async def events(self, query: str, **options) -> AsyncIterator[AskEvent]:
+        """Ask with streaming and yield progress and token events, ending with ``result``."""
+        events: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self.ask(query, stream=True, on_event=events.put_nowait, **options))
+        task.add_done_callback(lambda _: events.put_nowait(_END))
+        try:
+            while True:
+                event = await events.get()
+                if event is _END:
+                    break
+                yield event
+            # Surface a failed ask to the consumer
+            task.result()
+        finally:
+            task.cancel()
+
+
+class SyncAskSession:
+    """Blocking front-end to an ``AskSession`` running on its own event loop thread.
+
+    Safe to call from many threads at once; ``on_event`` callbacks run on the calling
+    thread, so slow consumers never stall the shared loop.
+    """
+
+    def __init__(self, config: Optional[Settings] = None, **options):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="askcli-session-loop", daemon=True)
+        self._thread.start()
+        self.session = AskSession(config, **options)
+
+    @property
+    def config(self) -> Settings:
+        return self.session.config
+
+    def __enter__(self) -> "SyncAskSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _submit(self, coro) -> concurrent.futures.Future:
+        """Schedule ``coro`` on the loop in a copy of the caller's context (keeps trace parents)."""
+        context = contextvars.copy_context()
+        result: concurrent.futures.Future = concurrent.futures.Future()
+
+        def start():
+            task = self.loop.create_task(coro, context=context)
+
+            def done(task):
+                if task.cancelled():
+                    result.cancel()
+                elif task.exception() is not None:
+                    result.set_exception(task.exception())
+                else:
+                    result.set_result(task.result())
+
+            task.add_done_callback(done)
+
+        self.loop.call_soon_threadsafe(start)
+        return result
+
+    def llm(self, provider: Optional[str] = None):
+        return self.session.llm(provider)
+
+    @property
+    def llm_providers(self):
+        return self.session.llm_providers
+
+    @property
+    def coalescing(self) -> Dict[str, FlightStats]:
+        return self.session.coalescing
+
+    def ask(self, query: str, on_event: Optional[Callable[[AskEvent], None]] = None, **options) -> QueryOutcome:
+        """Blocking ``AskSession.ask``; see there for the options."""
+        if on_event is None:
+            return self._submit(self.session.ask(query, **options)).result()
+
+        events: "queue.Queue" = queue.Queue()
+        future = self._submit(self.session.ask(query, on_event=events.put, **options))
+        future.add_done_callback(lambda _: events.put(_END))
+        for event in iter(events.get, _END):
+            on_event(event)
+        return future.result()
+
+    def events(self, query: str, **options) -> Iterator[AskEvent]:
+        """Blocking ``AskSession.events``."""
+        events: "queue.Queue" = queue.Queue()
+        future = self._submit(self.session.ask(query, stream=True, on_event=events.put, **options))
+        future.add_done_callback(lambda _: events.put(_END))
+        yield from iter(events.get, _END)
+        future.result()
+
+    def close(self) -> None:
+        self._submit(self.session.aclose()).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
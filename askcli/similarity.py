@@ -0,0 +1,86 @@
+import hashlib
+import re
+from typing import Iterable, List
+from .cache.keys import normalize_query
+
+SIMHASH_BITS = 64
+
+# Words plus the punctuation that names things: "3.12", "node.js", "c#", "c++", "utf-8"
+_TERM = re.compile(r"\w+(?:[.\-]\w+)*[#+]*")
+
+# Above this many features the bit counting is done with numpy when it is installed
+VECTORIZE_MIN_FEATURES = 256
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(features: Iterable[str]) -> int:
+    """64-bit SimHash fingerprint of a bag of features."""
+    features = list(features)
+    if len(features) >= VECTORIZE_MIN_FEATURES:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            values = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+            ones = ((values[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)).sum(axis=0)
+            # A bit is set when more features have it set than not
+            return sum(1 << bit for bit, count in enumerate(ones.tolist()) if 2 * count > len(features))
+    
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of matching bits between two fingerprints (1.0 means identical)."""
+    return 1.0 - hamming_distance(a, b) / SIMHASH_BITS
+
+
+def text_features(text: str, ngram: int = 3) -> List[str]:
+    """Word tokens plus character n-grams, robust to small rewordings of short text."""
+    normalized = normalize_query(text)
+    features = normalized.split()
+    padded = f" {normalized} "
+    features.extend(padded[i:i + ngram] for i in range(len(padded) - ngram + 1))
+    return features
+
+
+def key_terms(query: str) -> List[str]:
+    """The distinct words of a query that change its meaning: everything but stopwords,
+    with versions and names like "3.12" or "c#" kept whole."""
+    from .retrieval import STOPWORDS
+    
+    return sorted({term for term in _TERM.findall(normalize_query(query)) if term not in STOPWORDS})
+
+
+def query_fingerprint(query: str, urls: Iterable[str] = ()) -> int:
+    """SimHash over a query's key terms and the set of source URLs it was answered from."""
+    features = text_features(" ".join(key_terms(query)))
+    features.extend(f"url:{url}" for url in sorted(set(urls)))
+    return simhash(features)
+
+
+def bands(fingerprint: int, count: int) -> List[int]:
+    """Split a fingerprint into ``count`` bit bands. Two fingerprints differing in fewer
+    than ``count`` bits share at least one band, so bands index near neighbours."""
+    width = SIMHASH_BITS // count
+    return [
+        fingerprint >> (i * width) & ((1 << (width if i < count - 1 else SIMHASH_BITS - i * width)) - 1)
+        for i in range(count)
+    ]
@@ -0,0 +1,126 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+from .models import FlightStats
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, key: Hashable, task: "asyncio.Future"):
+        self.key = key
+        self.task = task
+        self.waiters = 0
+        self.stream: Optional["_SharedStream"] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical work: one call per key runs, the others share it.
+
+    The work runs as its own task, so a caller that is cancelled (e.g. a hedged
+    download that lost) does not cancel it for the others; it is only cancelled
+    once every caller waiting on it has gone.
+    """
+
+    def __init__(self):
+        self.stats = FlightStats()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(key, asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats.executed += 1
+        else:
+            self.stats.shared += 1
+        return await self._wait(flight)
+
+    def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Like ``do`` for a chunk stream: late joiners first replay what was already produced."""
+        flight = self._flights.get(key)
+        if flight is None:
+            shared = _SharedStream(fn())
+            flight = _Flight(key, shared.task)
+            flight.stream = shared
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats.executed += 1
+        else:
+            self.stats.shared += 1
+        return self._follow(flight)
+
+    async def _wait(self, flight: _Flight):
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(flight)
+
+    async def _follow(self, flight: _Flight) -> AsyncIterator[str]:
+        flight.waiters += 1
+        try:
+            async for chunk in flight.stream.replay():
+                yield chunk
+        finally:
+            self._leave(flight)
+
+    def _leave(self, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if not flight.waiters and not flight.task.done():
+            # Forget it now: the done callback runs a loop iteration later, and a
+            # caller arriving in between must start fresh work, not join the cancelled one
+            self._forget(flight.key, flight)
+            flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+class _SharedStream:
+    """Pumps one async iterator into a buffer that any number of readers can replay."""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.chunks: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+        # Readers get the error from ``replay``; don't also log it as unretrieved
+        self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            self.finished = True
+            self._notify()
+            close = getattr(source, "aclose", None)
+            if close:
+                await close()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def replay(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
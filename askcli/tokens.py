@@ -0,0 +1,120 @@
+import math
+import re
+from typing import List, Optional
+from .models import PageContent
+
+# Average characters per token of each provider's tokenizer on English web text
+CHARS_PER_TOKEN = {
+    "gemini": 4.0,
+    "groq": 3.6,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+def chars_per_token(provider: Optional[str] = None) -> float:
+    return CHARS_PER_TOKEN.get(provider or "", DEFAULT_CHARS_PER_TOKEN)
+
+
+def estimate_tokens(text: str, provider: Optional[str] = None) -> int:
+    """Offline token estimate: one token per punctuation mark, words split by the
+    provider's average characters per token."""
+    ratio = chars_per_token(provider)
+    count = 0
+    for piece in _PIECES.findall(text):
+        count += 1 if len(piece) <= ratio else math.ceil(len(piece) / ratio)
+    return count
+
+
+def cut_at_boundary(text: str, max_chars: int) -> str:
+    """Truncate to at most ``max_chars``, preferring a paragraph, then a sentence,
+    then a word boundary over cutting mid-word."""
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 0:
+        return ""
+    
+    window = text[:max_chars + 1]
+    floor = max_chars // 2
+    for pattern in (_PARAGRAPH_BREAK, _SENTENCE_END):
+        ends = [match.start() for match in pattern.finditer(window) if match.start() >= floor]
+        if ends:
+            return text[:ends[-1]].rstrip()
+    
+    space = window.rfind(" ", floor)
+    if space > 0:
+        return text[:space].rstrip()
+    return text[:max_chars]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, provider: Optional[str] = None) -> str:
+    """Cut ``text`` at a natural boundary so it fits ``max_tokens``."""
+    if estimate_tokens(text, provider) <= max_tokens:
+        return text
+    # Start from the character estimate and shrink until the token estimate fits
+    limit = int(max_tokens * chars_per_token(provider))
+    cut = cut_at_boundary(text, limit)
+    while cut and estimate_tokens(cut, provider) > max_tokens:
+        limit = int(limit * 0.9)
+        cut = cut_at_boundary(text, limit)
+    return cut
+
+
+def fair_shares(demands: List[int], budget: int) -> List[int]:
+    """Split ``budget`` across ``demands`` max-min fairly: nobody gets more than they
+    need, and the share a small item leaves unused goes back to the others."""
+    shares = [0] * len(demands)
+    remaining = budget
+    pending = sorted(range(len(demands)), key=lambda i: demands[i])
+    while pending and remaining > 0:
+        share = remaining // len(pending)
+        index = pending[0]
+        if demands[index] <= share:
+            shares[index] = demands[index]
+            remaining -= demands[index]
+            pending.pop(0)
+        else:
+            for index in pending:
+                shares[index] = share
+            break
+    return shares
+
+
+def pack_pages(
+    pages: List[PageContent],
+    budget_tokens: int,
+    provider: Optional[str] = None,
+    overhead_tokens: int = 0,
+) -> List[PageContent]:
+    """Fit pages into ``budget_tokens`` with a fair share each, cut at natural
+    boundaries. ``overhead_tokens`` is charged per page for its prompt header."""
+    pages = [page for page in pages if page.text]
+    if not pages:
+        return []
+    
+    available = budget_tokens - overhead_tokens * len(pages)
+    demands = [estimate_tokens(page.text, provider) for page in pages]
+    shares = fair_shares(demands, max(0, available))
+    
+    packed = []
+    for page, demand, share in zip(pages, demands, shares):
+        text = page.text if share >= demand else truncate_to_tokens(page.text, share, provider)
+        if text:
+            packed.append(page.model_copy(update={"text": text}))
+    return packed
+
+
+def context_budget(
+    max_context_tokens: int,
+    system_prompt: str,
+    prompt_scaffold: str,
+    answer_tokens: int,
+    provider: Optional[str] = None,
+) -> int:
+    """Tokens left for page content after the system prompt, the user prompt
+    scaffolding and room for the expected answer."""
+    used = estimate_tokens(system_prompt, provider) + estimate_tokens(prompt_scaffold, provider)
+    return max(0, max_context_tokens - used - answer_tokens)
@@ -0,0 +1,205 @@
+# Span tracing with Chrome trace and OTLP JSON export; a no-op unless enabled
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+
+class SpanRecord(BaseModel):
+    name: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int
+    end_ns: int
+    track: int = 0
+    attrs: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("askcli_span", default=None)
+_tracer: Optional["Tracer"] = None
+
+
+class _ActiveSpan:
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "start_ns", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = _current.get()
+        self.token = _current.set(self.span_id)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.time_ns()
+        try:
+            _current.reset(self.token)
+        except ValueError:
+            # Exited from another context (e.g. a generator finished elsewhere)
+            pass
+        self.tracer.record(SpanRecord(
+            name=self.name,
+            span_id=self.span_id,
+            parent_id=self.parent_id,
+            start_ns=self.start_ns,
+            end_ns=end_ns,
+            track=self.tracer.track(),
+            attrs=self.attrs,
+            error=repr(exc) if exc is not None else None,
+        ))
+        return False
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Collects finished spans for one process run."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[SpanRecord] = []
+        self._tracks: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, attrs: Dict[str, Any]) -> _ActiveSpan:
+        return _ActiveSpan(self, name, attrs)
+
+    def record(self, span: SpanRecord) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def track(self) -> int:
+        """A small id per thread / asyncio task so concurrent spans get their own lane."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (threading.get_ident(), id(task) if task else 0)
+        with self._lock:
+            return self._tracks.setdefault(key, len(self._tracks) + 1)
+
+
+def enable() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> None:
+    global _tracer
+    _tracer = None
+
+
+def active() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """Context manager timing a stage; returns a shared no-op when tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    return tracer.span(name, attrs)
+
+
+def to_chrome(tracer: Tracer) -> Dict:
+    """Chrome trace event format (chrome://tracing, Perfetto)."""
+    origin = min((s.start_ns for s in tracer.spans), default=0)
+    pid = os.getpid()
+    events = [
+        {
+            "name": s.name,
+            "cat": "askcli",
+            "ph": "X",
+            "ts": (s.start_ns - origin) / 1000,
+            "dur": (s.end_ns - s.start_ns) / 1000,
+            "pid": pid,
+            "tid": s.track,
+            "args": {**s.attrs, **({"error": s.error} if s.error else {})},
+        }
+        for s in sorted(tracer.spans, key=lambda s: s.start_ns)
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(tracer: Tracer) -> Dict:
+    """OTLP/JSON ``ExportTraceServiceRequest`` body, as accepted by OpenTelemetry collectors."""
+    spans = []
+    for s in tracer.spans:
+        spans.append({
+            "traceId": tracer.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "askcli"}}]},
+            "scopeSpans": [{"scope": {"name": "askcli"}, "spans": spans}],
+        }]
+    }
+
+
+def write_trace(tracer: Tracer, path: Path) -> Path:
+    """Write ``path`` as a Chrome trace and a sibling ``*.otlp.json``; returns the OTLP path."""
+    path = Path(path)
+    path.write_text(json.dumps(to_chrome(tracer)), encoding="utf-8")
+    otlp_path = path.with_name(f"{path.stem}.otlp.json")
+    otlp_path.write_text(json.dumps(to_otlp(tracer)), encoding="utf-8")
+    return otlp_path
+
+
+def waterfall(tracer: Tracer) -> List[Tuple[int, SpanRecord]]:
+    """Spans in start order with their nesting depth."""
+    by_id = {s.span_id: s for s in tracer.spans}
+
+    def depth(s: SpanRecord) -> int:
+        level = 0
+        while s.parent_id in by_id:
+            s = by_id[s.parent_id]
+            level += 1
+        return level
+
+    return [(depth(s), s) for s in sorted(tracer.spans, key=lambda s: s.start_ns)]
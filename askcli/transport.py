@@ -0,0 +1,290 @@
+# Shared HTTP transport: connection pooling, per-host limits, HTTP/2 and a DNS cache
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import httpcore
+import httpx
+from .config import load_config
+from .models import Settings, TransportStats
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Process-wide counters for --debug and the daemon status
+STATS = TransportStats()
+_stats_lock = threading.Lock()
+
+
+def _count(field: str, amount: int = 1) -> None:
+    with _stats_lock:
+        setattr(STATS, field, getattr(STATS, field) + amount)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DNSCache:
+    """Caches resolved addresses per (host, port) for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, host: str, port: int) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry and entry[0] > time.monotonic():
+            _count("dns_cache_hits")
+            return entry[1]
+        return None
+
+    def store(self, host: str, port: int, infos) -> List[str]:
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic() + self.ttl, addresses)
+        _count("dns_lookups")
+        return addresses
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        if _is_ip(host):
+            return [host]
+        cached = self.cached(host, port)
+        if cached is not None:
+            return cached
+        return self.store(host, port, socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+
+    async def resolve_async(self, host: str, port: int) -> List[str]:
+        if _is_ip(host):
+            return [host]
+        cached = self.cached(host, port)
+        if cached is not None:
+            return cached
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return self.store(host, port, infos)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+DNS_CACHE = DNSCache()
+
+
+class _CachingBackend(httpcore.NetworkBackend):
+    """Sync network backend that resolves through the DNS cache."""
+
+    def __init__(self, dns: DNSCache):
+        self.dns = dns
+        self.inner = httpcore.SyncBackend()
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = self.dns.resolve(host, port)
+        error = None
+        for address in addresses:
+            try:
+                stream = self.inner.connect_tcp(address, port, timeout, local_address, socket_options)
+                _count("connections_opened")
+                return stream
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self.inner.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds):
+        self.inner.sleep(seconds)
+
+
+class _AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """Async network backend that resolves through the DNS cache."""
+
+    def __init__(self, dns: DNSCache):
+        self.dns = dns
+        self.inner = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self.dns.resolve_async(host, port)
+        error = None
+        for address in addresses:
+            try:
+                stream = await self.inner.connect_tcp(address, port, timeout, local_address, socket_options)
+                _count("connections_opened")
+                return stream
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.inner.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds):
+        await self.inner.sleep(seconds)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            if self.release:
+                self.release()
+                self.release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if self.release:
+                self.release()
+                self.release = None
+
+
+class SharedTransport(httpx.HTTPTransport):
+    """HTTP transport with a per-host connection limit and cached DNS."""
+
+    def __init__(self, per_host: int, dns: DNSCache = DNS_CACHE, **kwargs):
+        super().__init__(**kwargs)
+        if hasattr(self._pool, "_network_backend"):
+            self._pool._network_backend = _CachingBackend(dns)
+        self.per_host = per_host
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            slot = self._hosts.setdefault(request.url.host, threading.BoundedSemaphore(self.per_host))
+        slot.acquire()
+        _count("requests")
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            slot.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, slot.release)
+        return response
+
+
+class AsyncSharedTransport(httpx.AsyncHTTPTransport):
+    """Async HTTP transport with a per-host connection limit and cached DNS."""
+
+    def __init__(self, per_host: int, dns: DNSCache = DNS_CACHE, **kwargs):
+        super().__init__(**kwargs)
+        if hasattr(self._pool, "_network_backend"):
+            self._pool._network_backend = _AsyncCachingBackend(dns)
+        self.per_host = per_host
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._hosts.setdefault(request.url.host, asyncio.Semaphore(self.per_host))
+        await slot.acquire()
+        _count("requests")
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            slot.release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, slot.release)
+        return response
+
+
+def _client_options(config: Settings, max_connections: Optional[int]) -> Dict:
+    transport = config.transport
+    DNS_CACHE.ttl = transport.dns_ttl_seconds
+    connections = max_connections or transport.max_connections
+    return {
+        "per_host": max(1, min(transport.max_connections_per_host, connections)),
+        "http2": transport.http2 and HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections,
+            keepalive_expiry=transport.keepalive_expiry_seconds,
+        ),
+    }
+
+
+def _timeout(config: Settings) -> httpx.Timeout:
+    return httpx.Timeout(
+        config.transport.read_timeout_seconds,
+        connect=config.transport.connect_timeout_seconds,
+    )
+
+
+def create_async_client(config: Settings, max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """A pooled async client for one event loop (batch runs, the daemon, a gather)."""
+    return httpx.AsyncClient(
+        transport=AsyncSharedTransport(**_client_options(config, max_connections)),
+        timeout=_timeout(config),
+        follow_redirects=True,
+    )
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_client(config: Optional[Settings] = None) -> httpx.Client:
+    """The process-wide sync client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            config = config or load_config()
+            _client = httpx.Client(
+                transport=SharedTransport(**_client_options(config, None)),
+                timeout=_timeout(config),
+                follow_redirects=True,
+            )
+        return _client
+
+
+_api_client: Optional[httpx.Client] = None
+
+
+def get_api_client(config: Optional[Settings] = None) -> httpx.Client:
+    """The process-wide sync client for LLM APIs, created on first use.
+    
+    Separate from the page-fetch pool: completions get ``llm.timeout_seconds`` rather
+    than the fetch timeouts, no per-host cap below the pool size and no redirects.
+    """
+    global _api_client
+    with _client_lock:
+        if _api_client is None:
+            config = config or load_config()
+            options = _client_options(config, None)
+            options["per_host"] = config.transport.max_connections
+            _api_client = httpx.Client(
+                transport=SharedTransport(**options),
+                timeout=httpx.Timeout(
+                    config.llm.timeout_seconds, connect=config.transport.connect_timeout_seconds
+                ),
+            )
+        return _api_client
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark the page compression pipeline: throughput and size saved per step."""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the askcli package to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from askcli.compress import Compressor
+from askcli.models import Settings
+from askcli.tokens import estimate_tokens
+
+from bench_retrieval import BOILERPLATE, filler_paragraph
+
+NAVIGATION = ["Home", "Docs", "API reference", "Tutorials", "Blog", "Community", "Download"]
+
+
+
+def code_listing(rng: random.Random) -> list:
+    lines = ["import asyncio", "", "async def main():"]
+    for i in range(rng.randint(5, 60)):
+        lines.append(f"    result_{i} = await fetch(urls[{i}], timeout={rng.randint(1, 30)})")
+    return lines
+
+
+def make_page(rng: random.Random, paragraphs: int = 30) -> str:
+    """A synthetic extracted page: menus, banners, prose, a code listing and a footer."""
+    body = ["  ".join(["Skip to content", "Sign in"]), *NAVIGATION, ""]
+    body += rng.sample(BOILERPLATE, 2)
+    for i in range(paragraphs):
+        body.append(f"{filler_paragraph(rng)} See note {rng.randrange(10 ** 6)}.   ")
+        body.append("\n\n")
+        if i == paragraphs // 2:
+            body += code_listing(rng)
+    body += ["Related articles", *rng.sample(NAVIGATION, 5), "© 2024 Example Inc. All rights reserved."]
+    return "\n".join(body)
+
+
+def main():
+    """Run the benchmark."""
+    from askcli.models import PageContent
+
+    rng = random.Random(42)
+    questions = 200
+    pages_per_question = 8
+    batches = [
+        [PageContent(url=f"https://example.com/{q}/{i}", title=f"Result {i + 1}", text=make_page(rng))
+         for i in range(pages_per_question)]
+        for q in range(questions)
+    ]
+    options = Settings.CompressionConfig(steps=["whitespace", "boilerplate", "repeated_lines", "link_lists", "code"])
+    compressor = Compressor(options)
+
+    start = time.perf_counter()
+    compressed = [compressor.compress(pages) for pages in batches]
+    elapsed = time.perf_counter() - start
+
+    tokens_before = sum(estimate_tokens(page.text) for pages in batches for page in pages)
+    tokens_after = sum(estimate_tokens(page.text) for pages in compressed for page in pages)
+
+    print("Page compression benchmark")
+    print("=" * 60)
+    print(f"{'step':<16} {'chars in':>12} {'chars out':>12} {'ratio':>7} {'ms':>8}")
+    for name, step in compressor.stats.steps.items():
+        print(f"{name:<16} {step.chars_in:>12,} {step.chars_out:>12,} {step.ratio:>7.0%} {step.seconds * 1000:>8.1f}")
+    print("-" * 60)
+    total = questions * pages_per_question
+    print(f"{total} pages in {elapsed:.2f}s ({total / elapsed:,.0f} pages/sec)")
+    print(f"Tokens: {tokens_before:,} -> {tokens_after:,} ({1 - tokens_after / tokens_before:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
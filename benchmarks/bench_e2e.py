@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""End-to-end latency, throughput and memory benchmark against local stand-ins.
+
+No network or API keys are needed: search, web pages and the LLM are simulated by
+``standins.py``. Each workload runs in its own subprocess so peak RSS is per workload.
+Results are written as JSON; compare two runs with ``compare.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the askcli package and the stand-ins to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from askcli import tracing
+from askcli.batch import BatchQuery, percentile, run_batch
+from askcli.models import Settings
+from askcli.session import AskSession
+from standins import CorpusServer, FakeLLM, FakeSearchProvider, knobs, queries
+
+WORKLOADS = ("single", "concurrent", "batch")
+STAGES = ("search", "gather", "fetch", "extract", "select_context", "llm")
+
+# Options forwarded to each workload subprocess
+KNOB_OPTIONS = (
+    "queries", "concurrency", "pages", "size_kb", "latency_ms", "jitter_ms", "slow_rate", "slow_ms",
+    "failure_rate", "search_latency_ms", "ttft_ms", "tokens_per_second", "answer_tokens", "seed", "corpus",
+)
+FLAG_OPTIONS = ("stream", "hedged", "cache")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(seconds):
+    return {
+        "count": len(seconds),
+        "p50": round(percentile(seconds, 50) * 1000, 1),
+        "p95": round(percentile(seconds, 95) * 1000, 1),
+        "p99": round(percentile(seconds, 99) * 1000, 1),
+        "mean": round(sum(seconds) / len(seconds) * 1000, 1) if seconds else 0.0,
+    }
+
+
+def build_config(args) -> Settings:
+    config = Settings()
+    config.behavior.cache_enabled = args.cache
+    config.fetch.hedged = args.hedged
+    return config
+
+
+def stage_latencies(tracer):
+    stages = {stage: [] for stage in STAGES}
+    ttft = []
+    for span in tracer.spans:
+        if span.name in stages:
+            stages[span.name].append((span.end_ns - span.start_ns) / 1e9)
+        if span.name == "llm" and "ttft_ms" in span.attrs:
+            ttft.append(span.attrs["ttft_ms"] / 1000)
+    if ttft:
+        stages["ttft"] = ttft
+    return {stage: values for stage, values in stages.items() if values}
+
+
+def run_pipeline(args, config, search, llm, query_list, workers):
+    """Ask every query on one ``AskSession``, at most ``workers`` at a time."""
+    tracer = tracing.enable()
+
+    async def main():
+        slots = asyncio.Semaphore(workers)
+        async with AskSession(config, llm=llm, llm_provider=config.llm.provider, search_provider=search) as session:
+            async def one(query):
+                async with slots:
+                    start = time.perf_counter()
+                    await session.ask(query, stream=args.stream)
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one(query) for query in query_list), return_exceptions=True)
+            return results, time.perf_counter() - start
+
+    results, wall = asyncio.run(main())
+    tracing.disable()
+    latencies = [r for r in results if not isinstance(r, BaseException)]
+    return latencies, stage_latencies(tracer), len(results) - len(latencies), wall
+
+
+def run_batch_workload(args, config, search, llm, query_list):
+    items = [BatchQuery(id=str(i), query=query) for i, query in enumerate(query_list)]
+    with tempfile.TemporaryDirectory() as tmp:
+        report = asyncio.run(run_batch(
+            items, Path(tmp) / "out.jsonl", config, llm, provider=search, provider_name=config.llm.provider, resume=False
+        ))
+    stages = {stage: values for stage, values in report.stage_latencies.items() if stage != "total"}
+    return report.stage_latencies.get("total", []), stages, report.failed, report.elapsed_seconds
+
+
+def run_workload(args) -> dict:
+    config = build_config(args)
+    with CorpusServer(
+        corpus_dir=args.corpus,
+        pages=args.pages,
+        size_kb=args.size_kb,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    ) as server:
+        search = FakeSearchProvider(server.base_url, len(server.documents), args.search_latency_ms)
+        llm = FakeLLM(args.ttft_ms, args.tokens_per_second, args.answer_tokens)
+        query_list = queries(args.queries, args.seed)
+
+        if args.workload == "batch":
+            latencies, stages, errors, wall = run_batch_workload(args, config, search, llm, query_list)
+        else:
+            workers = 1 if args.workload == "single" else args.concurrency
+            latencies, stages, errors, wall = run_pipeline(args, config, search, llm, query_list, workers)
+
+        return {
+            "queries": len(query_list),
+            "errors": errors,
+            "wall_seconds": round(wall, 3),
+            "throughput_qps": round(len(latencies) / wall, 3) if wall else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+            "latency_ms": {"end_to_end": summarize(latencies), **{k: summarize(v) for k, v in stages.items()}},
+            "knobs": knobs(server, search, llm),
+        }
+
+
+def child_argv(args, workload):
+    argv = [sys.executable, __file__, "--child", "--workload", workload]
+    for name in KNOB_OPTIONS:
+        value = getattr(args, name)
+        if value is not None:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    for name in FLAG_OPTIONS:
+        if getattr(args, name):
+            argv.append(f"--{name}")
+    return argv
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'workload':<11} {'stage':<15} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'n':>5}")
+    print("-" * 62)
+    for name, workload in results["workloads"].items():
+        for stage, stats in workload["latency_ms"].items():
+            print(f"{name:<11} {stage:<15} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} {stats['count']:>5}")
+        print(f"{name:<11} {'throughput':<15} {workload['throughput_qps']:>9.2f} q/s, "
+              f"errors {workload['errors']}, peak RSS {workload['peak_rss_mb']} MB")
+        print("-" * 62)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="Comma-separated: single,concurrent,batch")
+    parser.add_argument("--output", "-o", type=Path, default=Path("bench-results.json"), help="Results JSON file")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--corpus", type=Path, default=None, help="Directory of recorded .html pages to serve")
+    parser.add_argument("--pages", type=int, default=200, help="Generated corpus size (without --corpus)")
+    parser.add_argument("--size-kb", type=int, default=40, help="Generated page size")
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of page requests in the slow tail")
+    parser.add_argument("--slow-ms", type=float, default=1500.0)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--search-latency-ms", type=float, default=150.0)
+    parser.add_argument("--ttft-ms", type=float, default=400.0)
+    parser.add_argument("--tokens-per-second", type=float, default=120.0)
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="Stream LLM output (reports time to first token)")
+    parser.add_argument("--hedged", action="store_true", help="Enable hedged gathering")
+    parser.add_argument("--cache", action="store_true", help="Enable the on-disk caches (in a temp directory)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workload", choices=WORKLOADS, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark."""
+    args = parse_args()
+    if args.child:
+        print(json.dumps(run_workload(args)))
+        return
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stream": args.stream,
+            "hedged": args.hedged,
+            "cache": args.cache,
+        },
+        "workloads": {},
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "ASKCLI_CACHE_DIR": cache_dir, "ASKCLI_NO_DAEMON": "1"}
+        for workload in [w.strip() for w in args.workloads.split(",") if w.strip()]:
+            if workload not in WORKLOADS:
+                sys.exit(f"Unknown workload: {workload}")
+            print(f"Running {workload}...", file=sys.stderr)
+            completed = subprocess.run(child_argv(args, workload), capture_output=True, text=True, env=env)
+            if completed.returncode != 0:
+                sys.exit(f"{workload} failed:\n{completed.stderr}")
+            results["workloads"][workload] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
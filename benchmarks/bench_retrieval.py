@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark prompt tokens sent with and without BM25 passage ranking."""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the askcli package to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from askcli.answer import fit_pages
+from askcli.models import PageContent
+from askcli.prompts import SYSTEM_PROMPT, build_user_prompt
+from askcli.retrieval import rank_passages
+from askcli.tokens import context_budget, estimate_tokens
+
+BOILERPLATE = [
+    "Home | Products | Pricing | Blog | Careers | Contact us | Sign in",
+    "We use cookies to improve your experience. By continuing you accept our cookie policy.",
+    "Subscribe to our newsletter for the latest updates, tips and exclusive offers.",
+    "Related articles: Getting started, Advanced configuration, Troubleshooting, FAQ",
+]
+
+FILLER_TOPICS = [
+    "installation on different operating systems and package managers",
+    "the history of the project and its early contributors",
+    "licensing terms and commercial support options",
+    "community events, conferences and meetups around the world",
+    "a comparison of editors and IDE plugins",
+    "release notes for older versions and deprecated features",
+]
+
+QUESTIONS = [
+    ("How does asyncio.gather handle exceptions?",
+     "By default asyncio.gather propagates the first exception raised by any awaitable, while the "
+     "remaining awaitables keep running; pass return_exceptions=True to collect exceptions as results."),
+    ("What is SQLite WAL mode?",
+     "In WAL mode SQLite appends changes to a write-ahead log file, so readers do not block writers "
+     "and a writer does not block readers; checkpoints move log pages back into the database."),
+    ("What does LOPA stand for in process safety?",
+     "LOPA stands for Layer of Protection Analysis, a semi-quantitative method that multiplies the "
+     "initiating event frequency by the failure probability of each independent protection layer."),
+]
+
+
+def filler_paragraph(rng: random.Random) -> str:
+    topic = rng.choice(FILLER_TOPICS)
+    sentences = [
+        f"This section covers {topic}.",
+        "Readers often skim it, but it is included for completeness.",
+        f"More details about {topic} can be found in the documentation.",
+        "Examples and screenshots are provided where they help.",
+    ]
+    rng.shuffle(sentences)
+    return " ".join(sentences)
+
+
+def make_pages(answer: str, rng: random.Random, num_pages: int = 4, paragraphs: int = 40):
+    """Synthetic search results: boilerplate, filler, and one answer-bearing paragraph."""
+    pages = []
+    for i in range(num_pages):
+        body = list(BOILERPLATE) + [filler_paragraph(rng) for _ in range(paragraphs)]
+        if i % 2 == 0:
+            # The answer sits deep in the page, past where a plain prefix cut would reach
+            body.insert(rng.randint(len(body) * 2 // 3, len(body)), answer)
+        pages.append(PageContent(url=f"https://example.com/{i}", title=f"Result {i + 1}", text="\n\n".join(body)))
+    return pages
+
+
+def prompt_tokens(query: str, pages) -> int:
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(build_user_prompt(query, pages))
+
+
+def main():
+    """Run the benchmark."""
+    rng = random.Random(42)
+    max_context_tokens = 8000
+    answer_tokens = 2000
+    
+    print("BM25 passage ranking benchmark")
+    print("=" * 78)
+    print(f"{'query':<46} {'before':>7} {'after':>7} {'saved':>6}  answer kept")
+    
+    total_before = total_after = 0
+    elapsed = 0.0
+    for query, answer in QUESTIONS:
+        pages = make_pages(answer, rng)
+        budget = context_budget(max_context_tokens, SYSTEM_PROMPT, build_user_prompt(query, []), answer_tokens)
+        
+        baseline = fit_pages(pages, budget, None)
+        start = time.perf_counter()
+        ranked = fit_pages(rank_passages(query, pages), budget, None)
+        elapsed += time.perf_counter() - start
+        
+        before = prompt_tokens(query, baseline)
+        after = prompt_tokens(query, ranked)
+        total_before += before
+        total_after += after
+        kept_before = any(answer in page.text for page in baseline)
+        kept_after = any(answer in page.text for page in ranked)
+        print(f"{query[:46]:<46} {before:>7} {after:>7} {1 - after / before:>6.0%}  "
+              f"{'yes' if kept_before else 'no '} -> {'yes' if kept_after else 'no'}")
+    
+    print("-" * 78)
+    print(f"{'total':<46} {total_before:>7} {total_after:>7} {1 - total_after / total_before:>6.0%}")
+    print(f"\nRanking time: {elapsed / len(QUESTIONS) * 1000:.1f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Compare two bench_e2e.py result files and flag regressions."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# (metric, True when larger is better)
+SUMMARY_METRICS = (("throughput_qps", True), ("peak_rss_mb", False))
+LATENCY_PERCENTILES = ("p50", "p95", "p99")
+
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    """Yield (workload, metric, before, after, change, regressed) rows."""
+    for name, after in candidate["workloads"].items():
+        before = baseline["workloads"].get(name)
+        if before is None:
+            continue
+        rows = [(metric, before.get(metric), after.get(metric), higher_is_better)
+                for metric, higher_is_better in SUMMARY_METRICS]
+        for stage, stats in after["latency_ms"].items():
+            if stage not in before["latency_ms"]:
+                continue
+            for pct in LATENCY_PERCENTILES:
+                rows.append((f"{stage}.{pct}", before["latency_ms"][stage][pct], stats[pct], False))
+        for metric, old, new, higher_is_better in rows:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            yield name, metric, old, new, change, worse > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument("--fail", action="store_true", help="Exit with status 1 when anything regressed")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    candidate = json.loads(args.candidate.read_text(encoding="utf-8"))
+    print(f"baseline  {baseline['meta'].get('commit')} ({baseline['meta']['timestamp']})")
+    print(f"candidate {candidate['meta'].get('commit')} ({candidate['meta']['timestamp']})\n")
+    print(f"{'workload':<11} {'metric':<22} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    print("-" * 66)
+
+    regressions = 0
+    for name, metric, old, new, change, regressed in compare(baseline, candidate, args.threshold / 100):
+        regressions += regressed
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<11} {metric:<22} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0f}%")
+    if regressions and args.fail:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
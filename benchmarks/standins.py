@@ -0,0 +1,192 @@
+"""Local stand-ins for the search provider, the web and the LLM used by the benchmarks."""
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from askcli.models import SearchResult
+
+TOPICS = [
+    "connection pooling", "write-ahead logging", "process safety layers", "vector search",
+    "garbage collection", "TLS session resumption", "HTTP/2 multiplexing", "query planning",
+    "token budgets", "stream processing", "consensus protocols", "cache invalidation",
+]
+
+NAV = "<nav><a href='/'>Home</a> | <a href='/docs'>Docs</a> | <a href='/blog'>Blog</a> | <a href='/about'>About</a></nav>"
+FOOTER = "<footer><p>Copyright Example Corp. Privacy | Terms | Cookies</p></footer>"
+
+
+def make_page(index: int, size_kb: int = 40, seed: int = 0) -> bytes:
+    """A synthetic article page of roughly ``size_kb`` with navigation and footer chrome."""
+    rng = random.Random(seed * 100_003 + index)
+    topic = TOPICS[index % len(TOPICS)]
+    parts = [
+        f"<html><head><meta charset='utf-8'><title>{topic.title()} guide #{index}</title></head><body>",
+        NAV,
+        f"<article><h1>{topic.title()} in practice</h1>",
+    ]
+    size = sum(len(p) for p in parts)
+    while size < size_kb * 1024:
+        words = [rng.choice(TOPICS).split()[0] for _ in range(rng.randint(40, 90))]
+        paragraph = f"<p>{topic.capitalize()} matters because " + " ".join(words) + ".</p>"
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts += ["</article>", FOOTER, "</body></html>"]
+    return "".join(parts).encode("utf-8")
+
+
+class CorpusServer:
+    """Serves ``/doc/<i>`` from a recorded HTML corpus (or a generated one) on localhost.
+
+    Knobs: ``latency_ms`` base delay plus up to ``jitter_ms``; a ``slow_rate`` share of
+    requests takes an extra ``slow_ms`` (the tail); a ``failure_rate`` share gets a 500.
+    """
+
+    def __init__(
+        self,
+        corpus_dir: Optional[Path] = None,
+        pages: int = 200,
+        size_kb: int = 40,
+        latency_ms: float = 30.0,
+        jitter_ms: float = 20.0,
+        slow_rate: float = 0.05,
+        slow_ms: float = 1500.0,
+        failure_rate: float = 0.05,
+        seed: int = 0,
+    ):
+        if corpus_dir:
+            self.documents = [path.read_bytes() for path in sorted(Path(corpus_dir).glob("*.htm*"))]
+            if not self.documents:
+                raise ValueError(f"No .html files in {corpus_dir}")
+        else:
+            self.documents = [make_page(i, size_kb, seed) for i in range(pages)]
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _plan(self):
+        with self.lock:
+            delay = self.latency_ms + self.rng.random() * self.jitter_ms
+            if self.rng.random() < self.slow_rate:
+                delay += self.slow_ms
+            failed = self.rng.random() < self.failure_rate
+        return delay / 1000, failed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                delay, failed = server._plan()
+                time.sleep(delay)
+                try:
+                    index = int(self.path.rsplit("/", 1)[-1])
+                    body = server.documents[index % len(server.documents)]
+                except ValueError:
+                    failed = True
+                if failed:
+                    self.send_response(500)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class FakeSearchProvider:
+    """Deterministic search results pointing at a ``CorpusServer``."""
+
+    def __init__(self, base_url: str, corpus_size: int, latency_ms: float = 150.0):
+        self.base_url = base_url
+        self.corpus_size = corpus_size
+        self.latency_ms = latency_ms
+
+    def search(self, query: str, n: int = 5) -> List[SearchResult]:
+        time.sleep(self.latency_ms / 1000)
+        seed = int(hashlib.sha256(query.encode("utf-8")).hexdigest()[:8], 16)
+        picks = random.Random(seed).sample(range(self.corpus_size), min(n, self.corpus_size))
+        return [
+            SearchResult(title=f"Document {i}", url=f"{self.base_url}/doc/{i}", snippet=f"Snippet for document {i}")
+            for i in picks
+        ]
+
+
+class FakeLLM:
+    """LLM stand-in with a fixed time to first token and a steady token rate."""
+
+    def __init__(self, ttft_ms: float = 400.0, tokens_per_second: float = 120.0, answer_tokens: int = 300):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.model_name = f"fake-{int(ttft_ms)}ms-{int(tokens_per_second)}tps"
+
+    def _tokens(self) -> List[str]:
+        body = ["## Answer\n", "Benchmark", " answer", " text.\n\n"]
+        body += [" word"] * max(0, self.answer_tokens - len(body) - 2)
+        return body + ["\n\n## Sources\n", "[1]"]
+
+    def answer(self, system: str, user: str) -> str:
+        time.sleep(self.ttft_ms / 1000 + self.answer_tokens / self.tokens_per_second)
+        return "".join(self._tokens())
+
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        time.sleep(self.ttft_ms / 1000)
+        interval = 1 / self.tokens_per_second
+        for token in self._tokens():
+            yield token
+            time.sleep(interval)
+
+
+def queries(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"How does {rng.choice(TOPICS)} affect {rng.choice(TOPICS)}? (#{i})" for i in range(count)]
+
+
+def knobs(server: CorpusServer, search: FakeSearchProvider, llm: FakeLLM) -> Dict:
+    return {
+        "corpus_pages": len(server.documents),
+        "latency_ms": server.latency_ms,
+        "jitter_ms": server.jitter_ms,
+        "slow_rate": server.slow_rate,
+        "slow_ms": server.slow_ms,
+        "failure_rate": server.failure_rate,
+        "search_latency_ms": search.latency_ms,
+        "ttft_ms": llm.ttft_ms,
+        "tokens_per_second": llm.tokens_per_second,
+        "answer_tokens": llm.answer_tokens,
+    }
@@ -3,15 +3,32 @@
 
 import sys
 import os
+import asyncio
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 # Add the askcli package to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from askcli.config import load_config
-from askcli.models import Settings, SearchResult, PageContent
+from askcli.models import FetchStats, Settings, SearchResult, PageContent
 from askcli.search.duckduckgo import DuckDuckGoProvider
 from askcli.prompts import build_user_prompt, SYSTEM_PROMPT
+from askcli.llm.base import LLMError
+from askcli.llm.composite import CircuitBreaker, CompositeLLMClient
+from askcli.cache.answers import AnswerCache
+from askcli.cache.keys import normalize_query
+from askcli.compress import Compressor
+from askcli.ratelimit import GovernedLLMClient, RateGovernor, rate_limit_delay
+from askcli.search.composite import CompositeSearchProvider
+from askcli.search.searxng import SearxNGProvider
+from askcli.session import AskSession
+from askcli.singleflight import SingleFlight
 
 def test_config():
     """Test configuration loading."""
@@ -74,6 +91,1062 @@ def test_prompts():
         print(f"[ERROR] Prompts error: {e}")
         return False
 
+def test_query_keys():
+    """Test which queries share a search-cache key."""
+    print("\nTesting query normalization...")
+    try:
+        assert normalize_query("  What is   Python?? ") == normalize_query("what is python") == "what is python"
+        assert normalize_query("What is WAL mode!") == normalize_query("what is wal mode.")
+        assert normalize_query("what is C#") != normalize_query("what is C")
+        assert normalize_query("install node.js") == "install node.js"
+        assert normalize_query("C++ vs C-sharp?") == "c++ vs c-sharp"
+        print("[OK] Case, whitespace and trailing ?!. fold; #, +, . and - inside tokens are kept")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Query normalization error: {e!r}")
+        return False
+
+def test_dedup():
+    """Test near-duplicate page dropping, repeated-paragraph removal and source folding."""
+    print("\nTesting deduplication...")
+    try:
+        from askcli.dedup import dedupe_pages, fold_sources
+        
+        shared = "SQLite's write-ahead log lets readers and a writer proceed concurrently without blocking each other."
+        body = " ".join(f"Sentence {i} explains how checkpoints move pages from the WAL file back into the database." for i in range(30))
+        pages = [
+            PageContent(url="https://a.example/wal", title="A", text=f"{body}\n{shared}"),
+            PageContent(url="https://mirror.example/wal", title="Mirror", text=f"{body.upper()}!\n{shared}"),
+            PageContent(url="https://b.example/locks", title="B", text=f"Locking is covered separately here.\n{shared.lower()}"),
+        ]
+        kept, duplicates, stats = dedupe_pages(pages, min_paragraph_chars=40)
+        assert [page.url for page in kept] == ["https://a.example/wal", "https://b.example/locks"]
+        assert duplicates == {"https://a.example/wal": ["https://mirror.example/wal"]}
+        assert kept[0].text == pages[0].text, "the best-ranked copy keeps its text"
+        assert kept[1].text == "Locking is covered separately here.", kept[1].text
+        assert stats.pages_dropped == 1 and stats.paragraphs_dropped == 1 and stats.tokens_saved > 0
+        print(f"[OK] Case/punctuation-folded copies dropped ({stats.tokens_saved} tokens saved)")
+        
+        results = [SearchResult(title=page.title, url=page.url) for page in pages]
+        folded = fold_sources(results, duplicates)
+        assert [result.url for result in folded] == ["https://a.example/wal", "https://b.example/locks"]
+        assert folded[0].duplicates == ["https://mirror.example/wal"] and folded[1].duplicates == []
+        print("[OK] Duplicate sources are folded onto the copy that was kept")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Deduplication error: {e!r}")
+        return False
+
+def test_passage_ranking():
+    """Test that BM25 keeps the passages relevant to the question, attributed to their page."""
+    print("\nTesting passage ranking...")
+    try:
+        from askcli.retrieval import BM25Index, rank_passages
+        
+        filler = "\n\n".join(f"Paragraph {i} is about gardening, soil and the weather this spring." for i in range(10))
+        pages = [
+            PageContent(url="https://a.example", title="A", text=filler),
+            PageContent(url="https://b.example", title="B", text=f"{filler}\n\nA checkpoint copies WAL frames back into the database file."),
+            PageContent(url="https://c.example", title="C", text="The WAL checkpoint runs automatically at 1000 pages.\n\n" + filler),
+        ]
+        ranked = rank_passages("When does a WAL checkpoint run?", pages, top_k=2, passage_chars=80)
+        assert [page.url for page in ranked] == ["https://b.example", "https://c.example"], [page.url for page in ranked]
+        assert all("checkpoint" in page.text and "gardening" not in page.text for page in ranked)
+        assert rank_passages("anything", pages[:1], top_k=50, passage_chars=80) == pages[:1], "small contexts are kept whole"
+        print("[OK] Only relevant passages are kept, each with its own page")
+        
+        import askcli.retrieval as retrieval
+        
+        passages = [f"passage {i} mentions {'wal' if i % 7 else 'checkpoint'} {'frames ' * (i % 5)}" for i in range(300)]
+        index = BM25Index(passages)
+        fast = index.scores("wal checkpoint frames")
+        limit, retrieval.VECTORIZE_MIN_PASSAGES = retrieval.VECTORIZE_MIN_PASSAGES, len(passages) + 1
+        try:
+            slow = index.scores("wal checkpoint frames")
+        finally:
+            retrieval.VECTORIZE_MIN_PASSAGES = limit
+        assert len(fast) == 300 and all(abs(a - b) < 1e-9 for a, b in zip(fast, slow))
+        print("[OK] Vectorized and pure-Python BM25 scores agree")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Passage ranking error: {e!r}")
+        return False
+
+async def traced_stages():
+    from askcli.tracing import span
+    
+    async def fetch(url):
+        with span("fetch", url=url):
+            await asyncio.sleep(0.01)
+    
+    with span("ask", query="q") as root:
+        await asyncio.gather(fetch("a"), fetch("b"))
+        try:
+            with span("llm"):
+                raise LLMError("provider down")
+        except LLMError:
+            pass
+        root.set(answer_chars=42)
+
+
+def test_tracing():
+    """Test span nesting across tasks and the Chrome trace and OTLP exports."""
+    print("\nTesting tracing...")
+    from askcli import tracing
+    
+    try:
+        assert tracing.span("ignored") is tracing.span("also ignored"), "disabled tracing is a shared no-op"
+        tracer = tracing.enable()
+        asyncio.run(traced_stages())
+        tracing.disable()
+        
+        rows = [(depth, s.name) for depth, s in tracing.waterfall(tracer)]
+        assert rows == [(0, "ask"), (1, "fetch"), (1, "fetch"), (1, "llm")], rows
+        spans = {s.name: s for s in tracer.spans}
+        assert spans["ask"].attrs == {"query": "q", "answer_chars": 42}
+        assert "provider down" in spans["llm"].error
+        fetch_tracks = {s.track for s in tracer.spans if s.name == "fetch"}
+        assert len(fetch_tracks) == 2 and spans["ask"].track not in fetch_tracks, "concurrent tasks get their own lane"
+        print("[OK] Spans nest across asyncio tasks, with attributes and errors")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            otlp_path = tracing.write_trace(tracer, Path(directory) / "trace.json")
+            chrome = json.loads((Path(directory) / "trace.json").read_text())
+            otlp = json.loads(otlp_path.read_text())
+        assert [event["name"] for event in chrome["traceEvents"]] == [name for _, name in rows]
+        assert chrome["traceEvents"][0]["ts"] == 0 and all(event["ph"] == "X" for event in chrome["traceEvents"])
+        exported = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        by_name = {s["name"]: s for s in exported}
+        assert by_name["fetch"]["parentSpanId"] == by_name["ask"]["spanId"]
+        assert by_name["llm"]["status"]["code"] == 2 and by_name["ask"]["status"] == {"code": 1}
+        assert {"key": "answer_chars", "value": {"intValue": "42"}} in by_name["ask"]["attributes"]
+        print("[OK] Chrome trace and OTLP/JSON exports are written")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Tracing error: {e!r}")
+        return False
+    finally:
+        tracing.disable()
+
+def test_streaming_renderer():
+    """Test that streamed sections are printed as soon as the next one starts."""
+    print("\nTesting streaming renderer...")
+    try:
+        import io
+        from rich.console import Console
+        from askcli.render import StreamingRenderer
+        
+        markdown = (
+            "## TL;DR\nWAL lets readers run alongside a writer.\n\n"
+            "## Explanation\nChanges go to a separate log [1].\n\n"
+            "## Sources\n[1] https://a.example\n"
+        )
+        output = io.StringIO()
+        second = markdown.index("## Explanation") + 3
+        with StreamingRenderer(console=Console(file=output, width=60)) as renderer:
+            for i in range(0, second, 4):
+                renderer.feed(markdown[i:min(i + 4, second)])
+            partial = output.getvalue()
+            assert ">> TL;DR <<" in partial and "Explanation" not in partial, partial
+            for i in range(second, len(markdown), 4):
+                renderer.feed(markdown[i:i + 4])
+        printed = output.getvalue()
+        positions = [printed.find(f">> {title} <<") for title in ("TL;DR", "Explanation", "Sources")]
+        assert -1 not in positions and positions == sorted(positions) and printed.startswith(partial)
+        assert renderer.text == markdown
+        print("[OK] Finished sections are printed while later ones stream")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Streaming renderer error: {e!r}")
+        return False
+
+def test_benchmark():
+    """Test a tiny offline benchmark run and the regression comparison."""
+    print("\nTesting benchmark suite...")
+    benchmarks = Path(__file__).parent / "benchmarks"
+    knobs = [
+        "--queries", "2", "--pages", "6", "--size-kb", "4", "--latency-ms", "1", "--jitter-ms", "0",
+        "--slow-rate", "0", "--failure-rate", "0", "--search-latency-ms", "1", "--ttft-ms", "1",
+        "--tokens-per-second", "5000", "--answer-tokens", "20",
+    ]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory) / "baseline.json"
+            subprocess.run(
+                [sys.executable, str(benchmarks / "bench_e2e.py"), "--workloads", "single", "-o", str(baseline), *knobs],
+                capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+            )
+            results = json.loads(baseline.read_text())
+            single = results["workloads"]["single"]
+            assert single["queries"] == 2 and single["errors"] == 0 and single["throughput_qps"] > 0
+            assert {"end_to_end", "search", "fetch", "llm"} <= set(single["latency_ms"]), single["latency_ms"]
+            print(f"[OK] Offline run measured {', '.join(single['latency_ms'])}")
+            
+            compare = [sys.executable, str(benchmarks / "compare.py"), str(baseline), "--fail"]
+            assert subprocess.run([*compare, str(baseline)], capture_output=True).returncode == 0
+            single["latency_ms"]["end_to_end"] = {pct: ms * 2 for pct, ms in single["latency_ms"]["end_to_end"].items()}
+            slower = Path(directory) / "slower.json"
+            slower.write_text(json.dumps(results))
+            result = subprocess.run([*compare, str(slower)], capture_output=True, text=True)
+            assert result.returncode == 1 and "REGRESSED" in result.stdout, result.stdout
+            print("[OK] compare.py flags a slower end-to-end latency")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Benchmark run failed: {e.stderr}")
+        return False
+    except Exception as e:
+        print(f"[ERROR] Benchmark error: {e!r}")
+        return False
+
+def test_similar_answers():
+    """Test that the similar-answer tier matches rewordings but not near-miss questions."""
+    print("\nTesting similar answers...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AnswerCache(Path(directory) / "answers.sqlite", similar_enabled=True)
+            urls = ["https://example.com/a", "https://example.com/b"]
+            cache.put("k1", "3.12 answer", "groq:m", "python 3.12 release date", urls)
+            cache.put("k2", "windows answer", "groq:m", "install numpy on windows", urls)
+            
+            assert cache.find_similar("groq:m", "Python 3.12 release date?", urls)[0] == "3.12 answer"
+            assert cache.find_similar("groq:m", "How do I install numpy on Windows?", urls)[0] == "windows answer"
+            print("[OK] Re-worded questions over the same sources match")
+            
+            assert cache.find_similar("groq:m", "python 3.13 release date", urls) is None
+            assert cache.find_similar("groq:m", "install numpy on mac", urls) is None
+            assert cache.find_similar("gemini:m", "python 3.12 release date", urls) is None
+            print("[OK] Another version, platform or model does not match")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Similar answers error: {e!r}")
+        return False
+
+COLD_START_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ["groq", "google.generativeai", "trafilatura", "ddgs", "httpx", "rich"]
+
+
+def test_cold_start():
+    """Test that CLI startup stays lazy and within the import-time budget."""
+    print("\nTesting cold start...")
+    try:
+        code = (
+            # Everything a plain `ask "question"` imports before it needs the web
+            "import sys, askcli.cli, askcli.answer, askcli.session, askcli.client; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        )
+        elapsed = time.perf_counter() - start
+        loaded = result.stdout.strip()
+        if loaded:
+            print(f"[ERROR] Heavy modules imported at startup: {loaded}")
+            return False
+        if elapsed > COLD_START_BUDGET_SECONDS:
+            print(f"[ERROR] Cold start took {elapsed:.2f}s (budget {COLD_START_BUDGET_SECONDS:.2f}s)")
+            return False
+        print(f"[OK] Cold start: {elapsed:.2f}s (budget {COLD_START_BUDGET_SECONDS:.2f}s)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Cold start error: {e}")
+        return False
+
+def test_batch_resume():
+    """Test that a resumed batch skips answered queries and retries failed ones."""
+    print("\nTesting batch resume...")
+    try:
+        from askcli.batch import load_queries, run_batch
+        from askcli.cli import ExtractionMode
+        from askcli.extraction import EXTRACTION_MODES
+        
+        assert tuple(mode.value for mode in ExtractionMode) == EXTRACTION_MODES
+        with tempfile.TemporaryDirectory() as directory:
+            source, output = Path(directory) / "queries.jsonl", Path(directory) / "answers.jsonl"
+            source.write_text("".join(json.dumps({"id": i, "query": f"question {i}"}) + "\n" for i in (1, 2, 3)))
+            output.write_text(
+                json.dumps({"id": "1", "query": "question 1", "answer": "done"}) + "\n"
+                + json.dumps({"id": "2", "query": "question 2", "error": "provider down"}) + "\n"
+                + '{"id": "3", "que'
+            )
+            llm = FakeLLM("answer")
+            report = asyncio.run(run_batch(
+                load_queries(source), output, Settings(cache={"directory": directory}), llm, provider_name="fake",
+            ))
+            records = [json.loads(line) for line in output.read_text().splitlines()[3:]]
+        assert report.skipped == 1 and report.completed == 2 and llm.calls == 2
+        assert sorted(record["id"] for record in records) == ["2", "3"]
+        assert all(record["answer"] == "answer" for record in records)
+        print("[OK] Resuming skips answered ids, retries errors and a half-written record")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Batch resume error: {e!r}")
+        return False
+
+class StubDaemonHandler(BaseHTTPRequestHandler):
+    """Answers /ask like `ask serve` would, echoing the query."""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = json.dumps({
+            "type": "result", "answer": f"answer to {request['query']} (n={request['num_results']})",
+            "sources": [], "streamed": False,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_daemon_forwarding():
+    """Test that a plain question goes to a running daemon without loading typer or Rich."""
+    print("\nTesting daemon forwarding...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDaemonHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        import typer
+        from askcli.cli import app
+        from askcli.launcher import SUBCOMMANDS, parse_question
+        
+        assert set(SUBCOMMANDS) == set(typer.main.get_group(app).commands)
+        request, as_json, stream = parse_question(["what is wal", "--json", "-n", "3", "--groq"])
+        assert request["query"] == "what is wal" and request["num_results"] == 3 and request["llm_provider"] == "groq"
+        assert as_json and not stream
+        assert parse_question(["chat"]) is None and parse_question(["--", "chat"])[0]["query"] == "chat"
+        for in_process in (["q", "--debug"], ["q", "--no-daemon"], ["--help"], ["q", "-n", "x"], ["a", "b"]):
+            assert parse_question(in_process) is None, in_process
+        print("[OK] Plain questions are recognised; subcommands and --debug go to the full CLI")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            state = Path(directory) / "serve.json"
+            state.write_text(json.dumps({"address": f"http://127.0.0.1:{server.server_port}"}))
+            code = (
+                "import sys; from askcli.launcher import run; "
+                "sys.argv = ['ask', 'what is wal', '--json', '-n', '2']; run(); "
+                "print(','.join(m for m in ('typer', 'rich', 'pydantic') if m in sys.modules), file=sys.stderr)"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                cwd=Path(__file__).parent, env={**os.environ, "ASKCLI_SERVE_FILE": str(state)},
+            )
+        assert json.loads(result.stdout)["answer"] == "answer to what is wal (n=2)", result.stdout
+        assert result.stderr.strip() == "", f"loaded while forwarding: {result.stderr.strip()}"
+        print("[OK] A forwarded question loads only the standard library")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Daemon forwarding error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+class FakeLLM:
+    """Local stand-in provider with a fixed delay and optional failure."""
+
+    def __init__(self, text, delay=0.0, fail=False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def answer(self, system, user):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise LLMError("provider down")
+        return self.text
+
+    def stream(self, system, user):
+        yield self.answer(system, user)
+
+
+def test_answer_tokens():
+    """Test that llm.answer_tokens reaches the provider as its max tokens."""
+    print("\nTesting answer token limit...")
+    try:
+        from askcli.answer import get_llm_client
+        from askcli.registry import LLM_PROVIDERS
+        
+        built = []
+        LLM_PROVIDERS.register("fake", lambda model, max_tokens: built.append((model, max_tokens)) or FakeLLM("ok"))
+        config = Settings(llm={"provider": "fake", "model": "m", "answer_tokens": 1234}, ratelimit={"enabled": False})
+        get_llm_client(config)
+        assert built == [("m", 1234)], built
+        print("[OK] The answer budget is passed as the provider's max tokens")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Answer token limit error: {e!r}")
+        return False
+
+def test_llm_routing():
+    """Test composite LLM fallback, racing and circuit breaking with fake providers."""
+    print("\nTesting LLM routing...")
+    try:
+        down, backup = FakeLLM("", fail=True), FakeLLM("backup")
+        composite = CompositeLLMClient([("down", down), ("backup", backup)], failures=2, cooldown=60)
+        assert composite.answer("s", "u") == "backup"
+        assert composite.answer("s", "u") == "backup"
+        assert composite.breakers["down"].state == "open"
+        composite.answer("s", "u")
+        assert down.calls == 2, "open breaker should route around the failing provider"
+        print("[OK] Fallback skips a provider once its breaker opens")
+        
+        now = [0.0]
+        breaker = CircuitBreaker(failures=1, cooldown=10, clock=lambda: now[0])
+        breaker.record_failure()
+        assert not breaker.allow()
+        now[0] = 11
+        assert breaker.allow() and not breaker.allow(), "a half-open breaker lets one trial call through"
+        breaker.record_success(0.1)
+        assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+        print("[OK] A half-open breaker sends a single trial call")
+        
+        slow, fast = FakeLLM("slow", delay=1.0), FakeLLM("fast", delay=0.05)
+        racer = CompositeLLMClient([("slow", slow), ("fast", fast)], mode="race")
+        start = time.perf_counter()
+        assert "".join(racer.stream("s", "u")) == "fast"
+        assert time.perf_counter() - start < 0.5
+        print(f"[OK] Race returns the fastest provider ({racer.last_provider})")
+        
+        try:
+            CompositeLLMClient([("a", FakeLLM("", fail=True))]).answer("s", "u")
+            print("[ERROR] All-failed routing did not raise")
+            return False
+        except LLMError:
+            print("[OK] All providers failing raises LLMError")
+        return True
+    except Exception as e:
+        print(f"[ERROR] LLM routing error: {e!r}")
+        return False
+
+COMPRESSION_SAMPLE = """Skip to content | Sign in
+Home
+Docs
+Blog
+We use cookies to improve your experience. Accept all
+- Readers do not block writers
+- Writers do not block readers
+- Fewer fsync calls
+| Mode | Readers | Writers |
+| WAL | yes | yes |
+Set the session cookie with the Secure flag before you log in to the admin panel.
+Subscribe to changes with the subscribe() call on the store.
+The catalog in this release is larger; see the changelog in the docs.
+if (ok) {
+    run();
+}
+}
+© 2024 Example Inc. All rights reserved."""
+
+
+def test_compression():
+    """Test that page compression drops boilerplate but keeps lists, tables, prose and code."""
+    print("\nTesting compression...")
+    try:
+        options = Settings.CompressionConfig(steps=["whitespace", "boilerplate", "repeated_lines", "link_lists"])
+        page = PageContent(url="https://example.com", title="WAL", text=COMPRESSION_SAMPLE)
+        text = Compressor(options).compress([page])[0].text
+        for dropped in ("Skip to content", "Home", "We use cookies", "All rights reserved"):
+            assert dropped not in text, f"boilerplate kept: {dropped}"
+        kept = COMPRESSION_SAMPLE.split("\n")[5:-1]
+        assert text.split("\n") == kept, f"content lost:\n{text}"
+        print("[OK] Boilerplate dropped, lists, tables, prose and code kept")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Compression error: {e!r}")
+        return False
+
+async def check_singleflight():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    results = await asyncio.gather(flight.do("k", work), flight.do("k", work))
+    assert results == [1, 1] and flight.stats.executed == 1 and flight.stats.shared == 1
+    print("[OK] Concurrent identical calls share one execution")
+
+    async def chunks():
+        for chunk in "abc":
+            await asyncio.sleep(0.02)
+            yield chunk
+
+    async def read(delay):
+        await asyncio.sleep(delay)
+        return "".join([chunk async for chunk in flight.stream("s", chunks)])
+
+    assert await asyncio.gather(read(0), read(0.03)) == ["abc", "abc"]
+    print("[OK] A late stream joiner replays the chunks it missed")
+
+    # The only waiter leaves, cancelling the work; a caller arriving right after
+    # must start new work rather than join the cancelled task
+    first = asyncio.ensure_future(flight.do("c", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0)  # first leaves and cancels the work; its done callback has not run yet
+    second = flight.do("c", work)
+    assert await second == len(calls)
+    print("[OK] A call after the last waiter left runs fresh work")
+
+
+def test_singleflight():
+    """Test request coalescing: sharing, stream replay and cancellation."""
+    print("\nTesting single flight...")
+    try:
+        asyncio.run(check_singleflight())
+        return True
+    except BaseException as e:
+        print(f"[ERROR] Single flight error: {e!r}")
+        return False
+
+PYTHON_312_PAGES = [
+    ("https://docs.python.org/3.12/whatsnew", "What's New In Python 3.12",
+     "Python 3.12 was released on October 2, 2023. The release adds better error messages, "
+     "a per-interpreter GIL and faster comprehensions. See the release date schedule in PEP 693."),
+    ("https://peps.python.org/pep-0693", "PEP 693 - Python 3.12 Release Schedule",
+     "This PEP lists the release date of each Python 3.12 alpha, beta and candidate. "
+     "The final release date of Python 3.12.0 was October 2, 2023."),
+]
+
+
+async def check_local_index(directory):
+    config = Settings(cache={"directory": directory})
+    session = AskSession(config, llm=FakeLLM("unused"), search_provider=FakeSearch([]))
+    try:
+        session.index.put(PageContent(url=url, title=title, text=text) for url, title, text in PYTHON_312_PAGES)
+        pages = await session.search_index("When was the Python 3.12 release date?", 4)
+        assert len(pages) == 2, "well-matched fresh pages should replace the web search"
+        print("[OK] A question the index covers skips search and fetch")
+        
+        assert await session.search_index("When is the Python 3.14 release date?", 4) == []
+        assert await session.search_index("Python 3.12 release date on Windows?", 4) == []
+        print("[OK] A near-miss question (another version, a rare term) still searches the web")
+        
+        assert len(await session.search_index("When is the Python 3.14 release date?", 4, offline=True)) == 2
+        
+        session.config.cache.page_ttl_seconds = 0
+        time.sleep(0.01)
+        assert await session.search_index("When was the Python 3.12 release date?", 4) == []
+        print("[OK] Pages older than the page cache TTL do not skip the web search")
+    finally:
+        await session.aclose()
+
+
+def test_local_index():
+    """Test when the local page index may stand in for web search and fetch."""
+    print("\nTesting local index...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(check_local_index(directory))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Local index error: {e!r}")
+        return False
+
+ARTICLE_HTML = (
+    "<html><head><title>WAL</title></head><body><article><h1>Write-ahead logging</h1>"
+    + "<p>In WAL mode readers do not block writers and writers do not block readers, "
+    "because changes are appended to a separate log that checkpoints fold back later.</p>" * 3
+    + "</article></body></html>"
+)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves one article with an ETag; ``fail`` switches it to 500s."""
+    fail = False
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if type(self).fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = ARTICLE_HTML.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def check_page_cache(url, directory):
+    from askcli.cache.pages import PageCache
+    from askcli.fetcher import get_page_content_async
+    from askcli.transport import create_async_client
+    
+    result = SearchResult(title="WAL", url=url)
+    async with create_async_client(Settings()) as client:
+        async def fetch(ttl):
+            cache = PageCache(Path(directory) / "pages.sqlite", ttl_seconds=ttl)
+            page = await get_page_content_async(client, result, cache=cache)
+            return page.text, cache.stats()
+        
+        text, stats = await fetch(ttl=3600)
+        assert "readers do not block writers" in text and PageHandler.requests == 1
+        assert await fetch(ttl=3600) == (text, {**stats, "hits": 1}) and PageHandler.requests == 1
+        print("[OK] A fresh cached page skips the download")
+        
+        revalidated, stats = await fetch(ttl=0)
+        assert revalidated == text and stats["revalidated"] == 1 and PageHandler.requests == 2
+        print("[OK] A stale page is revalidated with its ETag (304)")
+        
+        PageHandler.fail = True
+        stale, stats = await fetch(ttl=0)
+        assert stale == text and PageHandler.requests == 3
+        print("[OK] The stale copy is served when revalidation fails")
+
+
+def test_page_cache():
+    """Test the page cache's fresh, revalidated (304) and stale-on-error paths."""
+    print("\nTesting page cache...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(check_page_cache(f"http://127.0.0.1:{server.server_port}/wal", directory))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Page cache error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves test documents: ``/article?delay=s``, ``/big``, ``/pdf`` and ``/disguised-pdf``."""
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        content_type = "text/html; charset=utf-8"
+        if path == "/article":
+            time.sleep(float(query.partition("=")[2] or 0))
+            body = ARTICLE_HTML.encode()
+        elif path == "/big":
+            body = ("<html><body>" + "<p>filler text</p>" * 10_000 + "</body></html>").encode()
+        elif path == "/pdf":
+            content_type, body = "application/pdf", b"%PDF-1.7" + b"\0" * 50_000
+        elif path == "/disguised-pdf":
+            body = b"%PDF-1.7" + b"\0" * 50_000
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading at its byte cap
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def check_body_reader(base):
+    from askcli.fetcher import fetch_page_async
+    from askcli.transport import create_async_client
+    
+    async with create_async_client(Settings()) as client:
+        stats = FetchStats()
+        assert await fetch_page_async(client, f"{base}/pdf", stats=stats) == ""
+        assert await fetch_page_async(client, f"{base}/disguised-pdf", stats=stats) == ""
+        assert stats.pages_skipped == 2 and stats.pages_fetched == 0
+        assert stats.bytes_skipped > 50_000, "the binary bodies should mostly not be downloaded"
+        print(f"[OK] Binary content is skipped by type and by signature ({stats.bytes_skipped:,} bytes not downloaded)")
+        
+        stats = FetchStats()
+        html = await fetch_page_async(client, f"{base}/big", max_bytes=10_000, stats=stats)
+        assert len(html) == 10_000 and html.startswith("<html>")
+        assert stats.pages_truncated == 1 and stats.bytes_fetched == 10_000 and stats.bytes_skipped > 150_000
+        print("[OK] Bodies are cut at max_bytes")
+
+
+def test_body_reader():
+    """Test the streamed download's content-type, binary-signature and byte caps."""
+    print("\nTesting body reader...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(check_body_reader(f"http://127.0.0.1:{server.server_port}"))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Body reader error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+
+
+def test_concurrent_gather():
+    """Test that gather_context downloads concurrently, keeps rank order and honours its deadline."""
+    print("\nTesting concurrent gather...")
+    from askcli.fetcher import gather_context
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        results = [SearchResult(title=str(i), url=f"{base}/article?delay={d}") for i, d in enumerate([0.5, 0.3, 0.5, 0.1])]
+        started = time.perf_counter()
+        pages = gather_context(results, concurrency=4)
+        elapsed = time.perf_counter() - started
+        assert [page.url for page in pages] == [r.url for r in results], "pages keep their search rank"
+        assert elapsed < 1.2, f"four 0.1-0.5s downloads took {elapsed:.2f}s"
+        print(f"[OK] Four pages fetched concurrently in rank order ({elapsed:.2f}s)")
+        
+        slow = [SearchResult(title="slow", url=f"{base}/article?delay=3"), results[3]]
+        started = time.perf_counter()
+        pages = gather_context(slow, deadline=1)
+        assert [page.url for page in pages] == [results[3].url] and time.perf_counter() - started < 2
+        
+        pages = gather_context(results, max_total_chars=500, max_page_chars=400)
+        assert sum(len(page.text) for page in pages) <= 500 and len(pages) < len(results)
+        print("[OK] The deadline drops unfinished pages and the character budget stops the gather")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Concurrent gather error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+
+async def check_hedged_gather(base):
+    from askcli.answer import fetch_plan
+    from askcli.fetcher import gather_context_async
+    
+    config = Settings(fetch={"hedged": True, "accept_pages": 2, "overfetch_factor": 2.0, "hedge_deadline_seconds": 5})
+    candidates, options = fetch_plan(config)
+    assert candidates == 4 and options["accept"] == 2 and options["concurrency"] >= 4
+    assert options["deadline"] == 5
+    assert fetch_plan(Settings(), 3)[0] == 3, "unhedged plans ask for exactly the sources wanted"
+    print(f"[OK] Hedged plan over-fetches {candidates} candidates to accept {options['accept']}")
+    
+    delays = [3, 0, 3, 0.2]
+    results = [SearchResult(title=str(i), url=f"{base}/article?delay={d}") for i, d in enumerate(delays)]
+    stats = FetchStats()
+    started = time.perf_counter()
+    pages = await gather_context_async(results, stats=stats, **options)
+    elapsed = time.perf_counter() - started
+    assert [page.url for page in pages] == [results[1].url, results[3].url], [page.url for page in pages]
+    assert elapsed < 2, f"slow candidates should be cancelled, took {elapsed:.1f}s"
+    print(f"[OK] Hedged gather kept the {len(pages)} fastest pages in rank order ({elapsed:.2f}s)")
+
+
+def test_hedged_gather():
+    """Test that hedged fetching over-fetches and keeps the first pages to arrive."""
+    print("\nTesting hedged fetching...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(check_hedged_gather(f"http://127.0.0.1:{server.server_port}"))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Hedged fetching error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+
+
+async def check_session_events(base, directory):
+    urls = [f"{base}/article", f"{base}/pdf"]
+    config = Settings(cache={"directory": directory})
+    llm = FakeLLM("WAL lets readers and writers run concurrently [1].")
+    session = AskSession(config, llm=llm, llm_provider="fake", search_provider=FakeSearch(urls))
+    try:
+        events = [event async for event in session.events("How does WAL mode work?")]
+        kinds = [event.type for event in events]
+        assert kinds[:2] == ["search", "context"] and kinds[-1] == "result", kinds
+        assert set(kinds[2:-1]) == {"token"}, kinds
+        assert [r.url for r in events[0].outcome.search_results] == urls
+        assert [page.url for page in events[1].outcome.pages] == urls[:1], "the skipped PDF is not context"
+        assert "".join(event.text for event in events[2:-1]) == events[-1].outcome.answer == llm.text
+        print(f"[OK] Events arrive in order: {' -> '.join(dict.fromkeys(kinds))}")
+        
+        events = []
+        await session.ask("How does WAL mode work?", stream=True, on_event=events.append)
+        kinds = [event.type for event in events]
+        assert kinds == ["search", "context", "result"] and llm.calls == 1, kinds
+        print("[OK] A cached answer emits no token events")
+    finally:
+        await session.aclose()
+
+
+def test_session_events():
+    """Test the order of AskSession's progress events."""
+    print("\nTesting session events...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(check_session_events(f"http://127.0.0.1:{server.server_port}", directory))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Session events error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+
+
+async def check_chat(base, directory):
+    from askcli.chat import Conversation
+    
+    config = Settings(cache={"directory": directory})
+    llm = FakeLLM("Readers and writers do not block each other in WAL mode [1].")
+    session = AskSession(config, llm=llm, llm_provider="fake", search_provider=FakeSearch([f"{base}/article"]))
+    try:
+        conversation = Conversation(session, use_cache=False)
+        first = await conversation.ask("Do readers block writers in WAL mode?")
+        assert not first.context_reused and first.fetch_stats.pages_fetched == 1
+        assert [r.url for r in first.search_results] == [f"{base}/article"]
+        
+        follow_up = await conversation.ask("and do writers block readers?")
+        assert follow_up.context_reused and "search" not in follow_up.timings
+        assert [page.url for page in follow_up.pages] == [f"{base}/article"] and follow_up.search_results
+        print("[OK] A follow-up the held pages cover is answered without searching")
+        
+        unrelated = await conversation.ask("How do I bake sourdough bread at home?")
+        assert not unrelated.context_reused and "search" in unrelated.timings
+        assert unrelated.fetch_stats.pages_fetched == 0, "pages already held are not fetched again"
+        assert len(conversation.turns) == 3 and llm.calls == 3
+        assert conversation.history(10_000)[0].question == "Do readers block writers in WAL mode?"
+        assert conversation.history(1) == []
+        print("[OK] A new topic searches again but only fetches sources not yet held")
+    finally:
+        await session.aclose()
+
+
+def test_chat():
+    """Test that ask chat reuses gathered pages across follow-ups."""
+    print("\nTesting chat context reuse...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(check_chat(f"http://127.0.0.1:{server.server_port}", directory))
+        return True
+    except Exception as e:
+        print(f"[ERROR] Chat error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
+
+def sleepy_extract(html):
+    """Stand-in extraction taking ``html`` seconds (picklable for the process pool)."""
+    time.sleep(float(html))
+    return html
+
+
+async def check_extraction():
+    from askcli.extraction import ExtractionExecutor
+    
+    stats = FetchStats()
+    inline = ExtractionExecutor("inline", max_html_chars=10, function=sleepy_extract)
+    assert await inline.extract("0" * 11, stats) == "" and stats.extractions_skipped == 1
+    print("[OK] Documents over max_html_chars are skipped and counted")
+    
+    threads = ExtractionExecutor("thread", max_workers=1, timeout=0.2, function=sleepy_extract)
+    try:
+        assert await threads.extract("0.5", stats) == ""
+    finally:
+        threads.shutdown()
+    
+    processes = ExtractionExecutor("process", max_workers=1, timeout=5.0, function=sleepy_extract)
+    try:
+        assert await processes.extract("0", stats) == "0"  # starts the worker
+        stuck = processes._pool
+        workers = list(stuck._processes.values())
+        processes.timeout = 0.3
+        assert await processes.extract("30", stats) == ""
+        processes.timeout = 5.0
+        # With a single worker this waits 30s unless the stuck one was replaced
+        start = time.perf_counter()
+        assert await processes.extract("0", stats) == "0"
+        assert processes._pool is not stuck and not any(worker.is_alive() for worker in workers)
+        print(f"[OK] A timed-out process worker is killed and replaced ({time.perf_counter() - start:.2f}s)")
+    finally:
+        processes.shutdown()
+    assert stats.extractions_timed_out == 2
+    print("[OK] Timeouts are counted in the fetch stats")
+
+
+def test_extraction():
+    """Test extraction skip limits, timeouts and process worker replacement."""
+    print("\nTesting extraction...")
+    try:
+        asyncio.run(check_extraction())
+        return True
+    except Exception as e:
+        print(f"[ERROR] Extraction error: {e!r}")
+        return False
+
+class RateLimitedResponse:
+    status_code = 429
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class ProviderRateLimit(Exception):
+    """Stand-in for an SDK's 429 error, carrying the HTTP response."""
+
+    def __init__(self, headers):
+        super().__init__("429 Too Many Requests")
+        self.response = RateLimitedResponse(headers)
+
+
+def test_rate_governor():
+    """Test that the rate governor paces calls and retries 429s after Retry-After."""
+    print("\nTesting rate governor...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "ratelimit.sqlite"
+            governor = RateGovernor(path, {"fake": 600}, burst=1)
+            start = time.perf_counter()
+            for _ in range(4):
+                governor.acquire("fake")
+            elapsed = time.perf_counter() - start
+            assert 0.25 < elapsed < 1.0, f"4 calls at 10/s took {elapsed:.2f}s"
+            print(f"[OK] Calls are paced at the configured rate ({elapsed:.2f}s for 4 at 10/s)")
+            
+            wrapped = LLMError("Groq API failed")
+            wrapped.__cause__ = ProviderRateLimit({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m0.5s"})
+            assert rate_limit_delay(wrapped) == 60.5
+            assert rate_limit_delay(LLMError("bad request")) is None
+            
+            attempts = []
+            
+            def flaky():
+                attempts.append(time.perf_counter())
+                if len(attempts) < 3:
+                    raise ProviderRateLimit({"Retry-After": "0.2"})
+                return "ok"
+            
+            governor = RateGovernor(path, burst=1, backoff_base=0.05)
+            assert governor.call("other", flaky) == "ok"
+            assert attempts[-1] - attempts[0] >= 0.4, "retries should wait for Retry-After"
+            # A second process sharing the state file sees the block
+            governor.block("other", 0.3)
+            waited = RateGovernor(path).acquire("other")
+            assert waited >= 0.25, f"block not shared (waited {waited:.2f}s)"
+            print("[OK] 429s are retried after Retry-After and the block is shared")
+            
+            class Limited(FakeLLM):
+                def answer(self, system, user):
+                    self.calls += 1
+                    raise LLMError("Groq API failed") from ProviderRateLimit({"Retry-After": "30"})
+            
+            limited, backup = Limited(""), FakeLLM("backup")
+            composite = GovernedLLMClient(CompositeLLMClient([
+                ("limited", GovernedLLMClient(limited, "limited", governor, patient=False)),
+                ("backup", GovernedLLMClient(backup, "backup", governor, patient=False)),
+            ]), "llm", governor)
+            start = time.perf_counter()
+            assert composite.answer("s", "u") == "backup" and time.perf_counter() - start < 0.5
+            assert limited.calls == 1, "a rate-limited member should fail over, not retry"
+            for _ in range(3):
+                composite.answer("s", "u")
+            assert composite.breakers["limited"].state == "closed", "rate limits should not open the breaker"
+            print("[OK] A rate-limited provider fails over at once in a composite")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Rate governor error: {e!r}")
+        return False
+
+class FakeSearch:
+    """Local stand-in search backend returning fixed URLs after a delay."""
+
+    def __init__(self, urls, delay=0.0, fail=False):
+        self.urls = urls
+        self.delay = delay
+        self.fail = fail
+
+    def search(self, query, n=5):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [SearchResult(title=url, url=url) for url in self.urls[:n]]
+
+
+class SearxNGHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"results": [
+            {"url": "https://example.com/b", "title": "B", "content": "from searxng"},
+            {"url": "https://example.com/d", "title": "D", "content": ""},
+        ]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_search_fusion():
+    """Test multi-backend search: rank fusion, URL dedup, deadlines and early return."""
+    print("\nTesting search fusion...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearxNGHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        searxng = SearxNGProvider(f"http://127.0.0.1:{server.server_port}")
+        assert [r.url for r in searxng.search("q", 2)] == ["https://example.com/b", "https://example.com/d"]
+        print("[OK] SearxNG JSON backend parses results")
+        
+        ddg = FakeSearch(["https://example.com/a", "https://www.example.com/b/?utm_source=ddg", "https://example.com/c"])
+        slow = FakeSearch(["https://example.com/slow"], delay=2.0)
+        broken = FakeSearch([], fail=True)
+        composite = CompositeSearchProvider(
+            [("ddg", ddg), ("searxng", searxng), ("slow", slow), ("broken", broken)],
+            deadlines={"slow": 0.3}, min_backends=2,
+        )
+        start = time.perf_counter()
+        results = composite.search("q", 4)
+        elapsed = time.perf_counter() - start
+        urls = [r.url for r in results]
+        assert elapsed < 1.0, f"waited {elapsed:.2f}s for a backend past its deadline"
+        assert urls[0] == "https://www.example.com/b/?utm_source=ddg", "result found by two backends ranks first"
+        assert len(urls) == 4 and "https://example.com/b" not in urls, "duplicate URL across backends"
+        assert results[0].snippet == "from searxng"
+        print(f"[OK] Fused {len(urls)} results in {elapsed:.2f}s without waiting for the slow backend")
+        
+        late = CompositeSearchProvider([("ddg", ddg), ("slow", slow)], deadlines={"slow": 0.3})
+        start = time.perf_counter()
+        assert len(late.search("q", 3)) == 3 and 0.25 < time.perf_counter() - start < 1.0
+        print("[OK] A backend past its deadline is abandoned")
+        
+        fast = CompositeSearchProvider([("ddg", ddg), ("slow", slow)], min_backends=1)
+        start = time.perf_counter()
+        assert len(fast.search("q", 3)) == 3 and time.perf_counter() - start < 0.5
+        print("[OK] Returns once enough results have arrived")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Search fusion error: {e!r}")
+        return False
+    finally:
+        server.shutdown()
+
 def main():
     """Run all tests."""
     print("ASK CLI Setup Verification")
@@ -84,6 +1157,30 @@ def main():
         test_models,
         test_search,
         test_prompts,
+        test_query_keys,
+        test_dedup,
+        test_passage_ranking,
+        test_tracing,
+        test_streaming_renderer,
+        test_benchmark,
+        test_similar_answers,
+        test_cold_start,
+        test_daemon_forwarding,
+        test_batch_resume,
+        test_answer_tokens,
+        test_llm_routing,
+        test_compression,
+        test_singleflight,
+        test_page_cache,
+        test_body_reader,
+        test_concurrent_gather,
+        test_hedged_gather,
+        test_session_events,
+        test_chat,
+        test_extraction,
+        test_local_index,
+        test_rate_governor,
+        test_search_fusion,
     ]
     
     passed = 0
@@ -100,6 +1197,7 @@ def main():
         print("2. Run: uv run python -m askcli.cli \"Your question here\"")
     else:
         print("\n[FAILED] Some tests failed. Check the errors above.")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file